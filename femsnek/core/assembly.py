@@ -0,0 +1,280 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: assembly
+   :synopsis: Assembly of element matrices into global sparse matrices
+.. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
+
+Sparsity pattern of a mesh is built once: entries of element matrices (in
+order of connectivity lists, elements, rows, columns) are mapped to positions
+in the `data` array of the CSR matrix. Assembly is then a single weighted
+bincount, without sorting or building index arrays. Reassembly into an
+existing matrix adds the entries straight into its `data` array, list by
+list, without temporary arrays. Duplicates are summed in the order of element
+matrix entries, so results are reproducible.
+
+Colored assembly (:meth:`SparsityPattern.assemble_colored`) splits the work
+among threads with element colors (:meth:`femsnek.mesh.feMesh.Mesh.colors`):
+every color is cut into chunks, a thread computes element matrices of its
+chunk by the kernel and adds them to `data`. Elements of one color share no
+node, so their entries go to distinct positions and chunks of a color are
+added concurrently without locks. Colors are processed one after another.
+NumPy releases the GIL in the batched kernels and in the fancy indexed
+additions.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.sparse as sparse
+
+from femsnek.core.elements import connectivityTypes
+
+
+class SparsityPattern:
+    """
+    CSR structure of global matrix and scatter map of element matrix entries.
+
+    Attributes:
+
+        -`_n_rows: int` - number of rows (nodes)
+        -`_indptr: nparray` - CSR row pointers
+        -`_indices: nparray` - CSR column indices, sorted within rows
+        -`_scatter: nparray` - position in CSR data of every element matrix entry
+        -`_tags: nparray` - node tags of all elements, in order of element vectors
+        -`_entry_offsets: nparray` - position of first element matrix entry of every element, `nElem + 1` entries
+        -`_chunks: tuple` - (colors, threads, chunks) of the last colored assembly
+    """
+    __slots__ = (
+                '_n_rows',
+                '_indptr',
+                '_indices',
+                '_scatter',
+                '_tags',
+                '_entry_offsets',
+                '_chunks'
+                )
+
+    def __init__(self, lists: tuple, n_nodes: int):
+        """
+        Creates sparsity pattern of connectivity lists
+
+        :param lists: connectivity lists with local node tags
+        :param n_nodes: number of nodes
+        """
+        rows = []
+        cols = []
+        for con_list in lists:
+            tags = con_list._tags.T
+            n_el, n_nodes_el = tags.shape
+            rows.append(np.broadcast_to(tags[:, :, None], (n_el, n_nodes_el, n_nodes_el)).ravel())
+            cols.append(np.broadcast_to(tags[:, None, :], (n_el, n_nodes_el, n_nodes_el)).ravel())
+
+        keys = np.concatenate([row.astype(np.int64) * n_nodes + col for (row, col) in zip(rows, cols)] +
+                              [np.empty(0, dtype=np.int64)])
+
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        first = np.empty(sorted_keys.shape[0], dtype=bool)
+        first[:1] = True
+        np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=first[1:])
+
+        unique = sorted_keys[first]
+        index_type = np.int32 if max(unique.shape[0], n_nodes) < 2 ** 31 else np.int64
+
+        self._scatter = np.empty(keys.shape[0], dtype=np.int64)
+        self._scatter[order] = np.cumsum(first) - 1
+
+        self._n_rows = n_nodes
+        self._indptr = np.zeros(n_nodes + 1, dtype=index_type)
+        np.cumsum(np.bincount(unique // n_nodes, minlength=n_nodes), out=self._indptr[1:])
+        self._indices = (unique % n_nodes).astype(index_type)
+        self._tags = np.concatenate([con_list._tags.T.ravel() for con_list in lists] +
+                                    [np.empty(0, dtype=np.int64)])
+
+        sizes = [np.full(con_list.n_elements(), con_list.n_nodes() ** 2) for con_list in lists]
+        self._entry_offsets = np.zeros(sum(size.shape[0] for size in sizes) + 1, dtype=np.int64)
+        np.cumsum(np.concatenate(sizes + [np.empty(0, dtype=np.int64)]), out=self._entry_offsets[1:])
+        self._chunks = None
+
+    def n_nonzero(self) -> int:
+        """
+        Get number of stored entries of global matrix.
+
+        :return: number of nonzero entries
+        """
+        return self._indices.shape[0]
+
+    def indptr(self) -> np.ndarray:
+        """
+        Get CSR row pointers.
+
+        :return: array with `nRows + 1` entries
+        """
+        return self._indptr
+
+    def indices(self) -> np.ndarray:
+        """
+        Get CSR column indices.
+
+        :return: array with column of every stored entry
+        """
+        return self._indices
+
+    def matrix(self, data: np.ndarray = None) -> sparse.csr_matrix:
+        """
+        Create CSR matrix with this pattern, arrays are shared, not copied.
+
+        :param data: (optional) values of stored entries, zeros when omitted
+        :return: scipy CSR matrix
+        """
+        if data is None:
+            data = np.zeros(self.n_nonzero())
+        matrix = sparse.csr_matrix((data, self._indices, self._indptr), shape=(self._n_rows, self._n_rows),
+                                   copy=False)
+        matrix.has_sorted_indices = True
+        return matrix
+
+    def assemble(self, element_matrices: list, out: sparse.csr_matrix = None) -> sparse.csr_matrix:
+        """
+        Assemble global matrix from element matrices.
+
+        :param element_matrices: element matrices (nElem, nNodes, nNodes) of every connectivity list
+        :param out: (optional) matrix created by :meth:`matrix`, its data is overwritten in place
+        :return: global matrix
+        """
+        if out is None:
+            return self.matrix(np.bincount(self._scatter, weights=concatenate(element_matrices),
+                                           minlength=self.n_nonzero()))
+
+        out.data[...] = 0.
+        start = 0
+        for matrices in element_matrices:
+            values = np.ravel(matrices)
+            np.add.at(out.data, self._scatter[start:start + values.shape[0]], values)
+            start += values.shape[0]
+        return out
+
+    def assemble_colored(self, kernel, packed, coordinates: np.ndarray, colors: tuple, threads: int = 1,
+                         out: sparse.csr_matrix = None) -> sparse.csr_matrix:
+        """
+        Assemble global matrix by threads, chunks of a color are computed and added in parallel
+
+        :param kernel: function (con_list, coordinates) -> element matrices (nElem, nNodes, nNodes),
+                       e.g. :func:`femsnek.core.matrices.stiffness`
+        :param packed: packed connectivity of the mesh
+        :param coordinates: node coordinates (3, nNodes) indexed by local tags
+        :param colors: element coloring of the mesh (offsets, element indices)
+        :param threads: number of threads
+        :param out: (optional) matrix created by :meth:`matrix`, its data is overwritten in place
+        :return: global matrix
+        """
+        if out is None:
+            out = self.matrix()
+        data = out.data
+        data[...] = 0.
+
+        def add(chunk):
+            (lists, positions) = chunk
+            data[positions] += concatenate([kernel(con_list, coordinates) for con_list in lists])
+
+        if threads == 1:
+            for color_chunks in self.chunks(packed, colors, threads):
+                add(color_chunks[0])
+            return out
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for color_chunks in self.chunks(packed, colors, threads):
+                list(executor.map(add, color_chunks))
+
+        return out
+
+    def chunks(self, packed, colors: tuple, threads: int) -> list:
+        """
+        Get chunks of colored assembly, cached for the last coloring and number of threads
+
+        :param packed: packed connectivity of the mesh
+        :param colors: element coloring (offsets, element indices)
+        :param threads: number of threads
+        :return: list of chunks (connectivity lists, positions in data) of every color
+        """
+        (offsets, elements) = colors
+        if self._chunks is None or self._chunks[0] is not elements or self._chunks[1] != threads:
+            chunks = []
+            for color in range(offsets.shape[0] - 1):
+                color_chunks = []
+                for part in np.array_split(elements[offsets[color]:offsets[color + 1]], threads):
+                    if part.shape[0] == 0:
+                        continue
+                    entries = ranges(self._entry_offsets[part], self._entry_offsets[part + 1])
+                    lists = element_lists(packed.connectivity(), packed.offsets(), packed.types(), part)
+                    color_chunks.append((lists, self._scatter[entries]))
+                chunks.append(color_chunks)
+            self._chunks = (elements, threads, chunks)
+        return self._chunks[2]
+
+    def assemble_vector(self, element_vectors: list) -> np.ndarray:
+        """
+        Assemble global vector from element vectors.
+
+        :param element_vectors: element vectors (nElem, nNodes) of every connectivity list
+        :return: global vector (nRows,)
+        """
+        return np.bincount(self._tags, weights=concatenate(element_vectors), minlength=self._n_rows)
+
+
+def concatenate(arrays: list) -> np.ndarray:
+    """
+    Flatten and join arrays, single array is only flattened
+
+    :param arrays: list of arrays
+    :return: flat array
+    """
+    if len(arrays) == 1:
+        return np.ravel(arrays[0])
+    return np.concatenate([np.ravel(array) for array in arrays])
+
+
+def ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """
+    Concatenate integer ranges [start, stop)
+
+    :param starts: first index of every range
+    :param stops: end index of every range
+    :return: flat array of indices
+    """
+    counts = stops - starts
+    shifts = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return np.arange(shifts.shape[0], dtype=np.int64) + shifts
+
+
+def element_lists(connectivity: np.ndarray, offsets: np.ndarray, types: np.ndarray, elements: np.ndarray) -> list:
+    """
+    Create connectivity lists of selected packed elements
+
+    Consecutive elements of one type form one list, element matrices of the
+    lists joined follow the order of `elements`.
+
+    :param connectivity: packed node tags
+    :param offsets: positions of elements in connectivity, `nElem + 1` entries
+    :param types: element type of every packed element
+    :param elements: selected element indices
+    :return: list of connectivity lists with copied node tags
+    """
+    element_types = types[elements]
+    lists = []
+    for run in np.split(np.arange(elements.shape[0]), np.flatnonzero(element_types[1:] != element_types[:-1]) + 1):
+        if run.shape[0] == 0:
+            continue
+        con_type = connectivityTypes[element_types[run[0]]]
+        tags = connectivity[offsets[elements[run]][:, None] + np.arange(con_type._nNodes)]
+        lists.append(con_type.from_tags(tags.T))
+    return lists
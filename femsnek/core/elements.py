@@ -14,7 +14,7 @@ IGNORE: -----------------------------------------------------------
 .. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
 """
 
-from numpy import zeros, int64, ndarray
+from numpy import zeros, empty, arange, int8, int32, int64, ndarray, array
 
 # Element signatures
 T_Line1 = 1
@@ -32,6 +32,7 @@ class ConnectivityList:
         -`_nNodes: int` - number of nodes per one element
         -`_type: int` - element type signature defined in `__init__.py of this package`
         -`_tags: nparray` - tags of nodes that span elements, has shape equal `(_nNodes, nElem)`
+        -`_facets: tuple` - local nodes of each element facet (edges of 2D elements, end points of lines)
     """
     __slots__ = (
                 '_tags'
@@ -40,6 +41,7 @@ class ConnectivityList:
     _dimension = 1  # element dimension
     _nNodes = 1     # number of nodes per element
     _type = 0       # element type
+    _facets = ()    # local nodes of element facets
 
     def __init__(self, n_elem: int):
         """
@@ -51,6 +53,19 @@ class ConnectivityList:
         """
         self._tags = zeros((self._nNodes, n_elem), dtype=int64)
 
+    @classmethod
+    def from_tags(cls, tags: ndarray):
+        """
+        Creates instance of ConnectivityList object around existing array of node tags.
+
+        :param tags: node tags, array with shape equal `(_nNodes, nElem)`
+        :returns: ConnectivityList object
+        :rtype: ConnectivityList
+        """
+        con_list = cls.__new__(cls)
+        con_list._tags = tags
+        return con_list
+
     def __getitem__(self, idx: int) -> ndarray:
         """
         Get node tags of nodes spanning chosen element in the list.
@@ -97,6 +112,14 @@ class ConnectivityList:
         """
         return self._nNodes
 
+    def facets(self) -> ndarray:
+        """
+        Get node tags of all element facets.
+
+        :return: array with shape `(nElem, nFacets, nFacetNodes)`
+        """
+        return self._tags.T[:, array(self._facets)]
+
     def el_type(self) -> int:
         """
         Get number of element type stored in the list.
@@ -123,6 +146,7 @@ class ListLine1(ConnectivityList):
     _dimension = 1
     _nNodes = 2
     _type = T_Line1
+    _facets = ((0,), (1,))
 
 
 class ListTri1(ConnectivityList):
@@ -142,6 +166,7 @@ class ListTri1(ConnectivityList):
     _dimension = 2
     _nNodes = 3
     _type = T_Tri1
+    _facets = ((0, 1), (1, 2), (2, 0))
 
 
 class ListQuad1(ConnectivityList):
@@ -161,3 +186,137 @@ class ListQuad1(ConnectivityList):
     _dimension = 2
     _nNodes = 4
     _type = T_Quad1
+    _facets = ((0, 1), (1, 2), (2, 3), (3, 0))
+
+
+class PackedConnectivity:
+    """
+    Connectivity of mixed elements packed into flat arrays.
+
+    Elements of all connectivity lists of a region are stored one after
+    another, `_tags` of the packed lists are views of `_connectivity`.
+
+    Attributes:
+
+        -`_connectivity: nparray` - node tags of all elements, element after element (int32)
+        -`_offsets: nparray` - position of each element in `_connectivity`, has `nElem + 1` entries
+        -`_types: nparray` - element type signature of each element (int8)
+    """
+    __slots__ = (
+                '_connectivity',
+                '_offsets',
+                '_types'
+                )
+
+    def __init__(self, connectivity: ndarray, offsets: ndarray, types: ndarray):
+        """
+        Creates instance of PackedConnectivity object around existing arrays.
+
+        :param connectivity: node tags of all elements
+        :param offsets: position of each element in connectivity, `nElem + 1` entries
+        :param types: element type signature of each element
+        """
+        self._connectivity = connectivity
+        self._offsets = offsets
+        self._types = types
+
+    @classmethod
+    def pack(cls, lists: list, connectivity: ndarray = None):
+        """
+        Packs connectivity lists, their `_tags` become views of the packed array.
+
+        :param lists: connectivity lists
+        :param connectivity: (optional) node tags of all elements, element after element, used instead of
+                             tags of the lists (e.g. tags renumbered to local numbering)
+        :returns: PackedConnectivity object
+        :rtype: PackedConnectivity
+        """
+        n_elem = sum(con_list.n_elements() for con_list in lists)
+        size = sum(con_list._tags.size for con_list in lists)
+        offsets = zeros(n_elem + 1, dtype=int64)
+        types = empty(n_elem, dtype=int8)
+
+        if connectivity is None:
+            connectivity = empty(size, dtype=int32)
+            fill = True
+        else:
+            connectivity = connectivity.astype(int32)
+            fill = False
+
+        start = 0
+        first = 0
+        for con_list in lists:
+            n_el = con_list.n_elements()
+            n_nodes = con_list.n_nodes()
+            block = connectivity[start:start + n_el * n_nodes].reshape(n_el, n_nodes)
+
+            if fill:
+                block[...] = con_list._tags.T
+
+            offsets[first + 1:first + n_el + 1] = start + n_nodes * arange(1, n_el + 1)
+            types[first:first + n_el] = con_list.el_type()
+            con_list._tags = block.T
+
+            start += n_el * n_nodes
+            first += n_el
+
+        return cls(connectivity, offsets, types)
+
+    def views(self, types: list, counts: list) -> list:
+        """
+        Creates connectivity lists viewing consecutive blocks of packed elements.
+
+        :param types: element type of each list
+        :param counts: number of elements of each list
+        :return: list of connectivity lists
+        """
+        lists = []
+        first = 0
+        for (el_type, n_el) in zip(types, counts):
+            con_type = connectivityTypes[el_type]
+            start = self._offsets[first]
+            block = self._connectivity[start:start + n_el * con_type._nNodes]
+            lists.append(con_type.from_tags(block.reshape(n_el, con_type._nNodes).T))
+            first += n_el
+
+        return lists
+
+    def n_elements(self) -> int:
+        """
+        Get number of packed elements.
+
+        :return: number of elements
+        """
+        return self._types.shape[0]
+
+    def connectivity(self) -> ndarray:
+        """
+        Get node tags of all elements, element after element.
+
+        :return: flat array with node tags
+        """
+        return self._connectivity
+
+    def offsets(self) -> ndarray:
+        """
+        Get positions of elements in connectivity array.
+
+        :return: array with `nElem + 1` entries, nodes of element `i` are `connectivity[offsets[i]:offsets[i + 1]]`
+        """
+        return self._offsets
+
+    def types(self) -> ndarray:
+        """
+        Get element type signature of each element.
+
+        :return: array with element types
+        """
+        return self._types
+
+
+# Dictionary [fem-snek element type] -> connectivity list class
+connectivityTypes = {
+        T_Line1: ListLine1,
+        T_Tri1: ListTri1,
+        T_Quad1: ListQuad1
+        }
@@ -0,0 +1,96 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: matrices
+   :synopsis: Element matrices of whole connectivity lists
+.. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
+
+Element matrices of all elements of a connectivity list are computed by
+batched tensor contractions, the result has shape `(nElem, nNodes, nNodes)`.
+Coordinates are indexed by tags of the list, for a mesh region use
+:meth:`femsnek.mesh.feMesh.FeMesh.coordinates`.
+"""
+
+import numpy as np
+
+from femsnek.core.elements import T_Line1, T_Tri1, T_Quad1, ConnectivityList
+from femsnek.core.reference import reference
+
+
+# Dictionary [<fem-snek element type>] -> <quadrature order integrating stiffness matrix exactly>
+stiffnessOrders = {
+        T_Line1: 0,
+        T_Tri1: 0,
+        T_Quad1: 2
+        }
+
+# Dictionary [<fem-snek element type>] -> <quadrature order integrating mass matrix exactly>
+massOrders = {
+        T_Line1: 2,
+        T_Tri1: 2,
+        T_Quad1: 2
+        }
+
+
+def stiffness(con_list: ConnectivityList, coordinates: np.ndarray, coefficient=1., order: int = None) -> np.ndarray:
+    """
+    Compute stiffness matrices, integrals of coefficient * grad(N_i) . grad(N_j)
+
+    :param con_list: connectivity list
+    :param coordinates: node coordinates (3, nNodes) indexed by tags of the list
+    :param coefficient: scalar or value of each element (nElem,)
+    :param order: quadrature order, default one is exact for affine elements
+    :return: element matrices (nElem, nNodes, nNodes)
+    """
+    element = reference(con_list.el_type(), stiffnessOrders[con_list.el_type()] if order is None else order)
+    measures, gradients = element.geometry(element.jacobians(con_list, coordinates))
+    volumes = measures * element.weights()
+
+    # (nElem, nQp, nNodes, 3) @ (nElem, nQp, 3, nNodes), summed over quadrature points
+    matrices = np.einsum('eqnc,eqmc,eq->enm', gradients, gradients, volumes, optimize=True)
+    return scale(matrices, coefficient)
+
+
+def mass(con_list: ConnectivityList, coordinates: np.ndarray, coefficient=1., order: int = None) -> np.ndarray:
+    """
+    Compute mass matrices, integrals of coefficient * N_i * N_j
+
+    :param con_list: connectivity list
+    :param coordinates: node coordinates (3, nNodes) indexed by tags of the list
+    :param coefficient: scalar or value of each element (nElem,)
+    :param order: quadrature order, default one is exact for affine elements
+    :return: element matrices (nElem, nNodes, nNodes)
+    """
+    element = reference(con_list.el_type(), massOrders[con_list.el_type()] if order is None else order)
+    volumes = element.measures(element.jacobians(con_list, coordinates)) * element.weights()
+
+    # shape function products are the same for all elements
+    products = element.values()[:, :, None] * element.values()[:, None, :]
+    matrices = (volumes @ products.reshape(element.n_points(), -1)).reshape(-1, con_list.n_nodes(),
+                                                                            con_list.n_nodes())
+    return scale(matrices, coefficient)
+
+
+def scale(matrices: np.ndarray, coefficient) -> np.ndarray:
+    """
+    Multiply element matrices by coefficient, in place
+
+    :param matrices: element matrices (nElem, nNodes, nNodes)
+    :param coefficient: scalar or value of each element (nElem,)
+    :return: scaled matrices
+    """
+    coefficient = np.asarray(coefficient)
+    if coefficient.ndim == 0:
+        if coefficient != 1.:
+            matrices *= coefficient
+    else:
+        matrices *= coefficient[:, None, None]
+    return matrices
@@ -0,0 +1,284 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: operators
+   :synopsis: Matrix-free discrete operators
+.. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
+
+Operators are applied without global matrix. Every element operator is a sum
+of terms, a geometric factor of the element times a matrix of the reference
+element:
+    stiffness   factors volume * (J^T J)^-1, 3 unique entries for 2D elements,
+                matrices of products of reference gradients
+    mass        factor volume, matrix of products of shape functions
+Jacobians of affine elements (lines, triangles, parallelograms) are constant,
+their terms are summed over quadrature points and one factor per term and
+element is stored. Other elements keep factors of every quadrature point.
+
+Elements are applied in chunks: values of chunk nodes are gathered, scaled
+by the factors, multiplied by the stacked reference matrices and scattered
+back by a bincount over the range of nodes the chunk touches, so work arrays
+stay of chunk size. The range is short for meshes with local numbering of
+elements and nodes, as generated by gmsh. Node tags are views of the mesh connectivity, they are
+not copied.
+"""
+
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
+
+from femsnek.core.matrices import stiffnessOrders, massOrders
+from femsnek.core.reference import reference, metric_determinant
+
+
+class MatrixFree(LinearOperator):
+    """
+    Matrix-free operator stiffness * K + mass * M of connectivity lists.
+
+    Attributes:
+
+        -`_blocks: list` - (tags (nNodes, nElem), stacked matrices (nNodes, nTerms * nNodes),
+                            factors (nTerms, nElem), first node of every chunk) of every connectivity list
+        -`_chunk: int` - number of elements applied at once
+    """
+
+    def __init__(self, lists: tuple, coordinates: np.ndarray, stiffness=1., mass=0., chunk: int = 8192):
+        """
+        Creates matrix-free operator, evaluates geometric factors
+
+        Coefficients are scalars or values of each element (in order of lists).
+
+        :param lists: connectivity lists with local node tags
+        :param coordinates: node coordinates (3, nNodes) indexed by tags of the lists
+        :param stiffness: stiffness coefficient
+        :param mass: mass coefficient
+        :param chunk: number of elements applied at once
+        """
+        n_nodes = coordinates.shape[1]
+        super().__init__(dtype=np.float64, shape=(n_nodes, n_nodes))
+
+        self._blocks = []
+        self._chunk = chunk
+        first = 0
+        for con_list in lists:
+            n_el = con_list.n_elements()
+            rules = [(rule, value) for (rule, value) in ((stiffness_terms, stiffness), (mass_terms, mass))
+                     if np.any(value)]
+            if not rules or n_el == 0:
+                first += n_el
+                continue
+
+            # Jacobians are evaluated chunk by chunk, work arrays of construction stay of chunk size too
+            tags = con_list._tags
+            starts = range(0, n_el, chunk)
+            parts = [con_list.from_tags(tags[:, start:start + chunk]) for start in starts]
+            affine = all(is_affine(reference(con_list.el_type()).jacobians(part, coordinates)) for part in parts)
+
+            matrices = []
+            factors = []
+            for (rule, value) in rules:
+                terms = [rule(part, coordinates, coefficient(value, first + start, part.n_elements()), affine)
+                         for (start, part) in zip(starts, parts)]
+                matrices.append(terms[0][0])
+                factors.append(np.concatenate([term[1] for term in terms], axis=1))
+            first += n_el
+
+            matrices = np.concatenate(matrices)
+            lows = np.array([part._tags.min() for part in parts], dtype=np.int64)
+            self._blocks.append((tags, np.ascontiguousarray(matrices.transpose(1, 0, 2).reshape(tags.shape[0], -1)),
+                                 np.concatenate(factors), lows))
+
+    @classmethod
+    def from_mesh(cls, femesh, region: (str, int), stiffness=1., mass=0., chunk: int = 8192):
+        """
+        Creates matrix-free operator of mesh region
+
+        :param femesh: finite element mesh
+        :param region: region tuple
+        :param stiffness: stiffness coefficient
+        :param mass: mass coefficient
+        :param chunk: number of elements applied at once
+        :return: MatrixFree object
+        """
+        return cls(femesh[region]._connectivityLists, femesh.coordinates(region), stiffness, mass, chunk)
+
+    def _matvec(self, x: np.ndarray) -> np.ndarray:
+        return self._matmat(np.ravel(x)[:, None])[:, 0]
+
+    def _matmat(self, x: np.ndarray) -> np.ndarray:
+        n_columns = x.shape[1]
+        y = np.zeros((self.shape[0], n_columns))
+        if not self._blocks:
+            return y
+
+        # work arrays of the largest chunk, reused by all chunks
+        size = max(min(self._chunk, tags.shape[1]) * tags.shape[0] for (tags, _, _, _) in self._blocks) * n_columns
+        n_terms = max(factors.shape[0] for (_, _, factors, _) in self._blocks)
+        (values, scaled, products) = (np.empty(size), np.empty(n_terms * size), np.empty(size))
+        local = np.empty(size // n_columns, dtype=np.intp)
+
+        for (tags, stacked, factors, lows) in self._blocks:
+            (n_nodes, n_terms) = (tags.shape[0], factors.shape[0])
+            for (start, low) in zip(range(0, tags.shape[1], self._chunk), lows):
+                chunk_tags = tags[:, start:start + self._chunk]
+                n = chunk_tags.size * n_columns
+                shape = chunk_tags.shape + (n_columns,)
+
+                # values of chunk nodes scaled by factors of every term, times stacked reference matrices
+                np.take(x, chunk_tags, axis=0, out=values[:n].reshape(shape))
+                np.multiply(factors[:, None, start:start + chunk_tags.shape[1], None], values[:n].reshape(shape),
+                            out=scaled[:n_terms * n].reshape((n_terms,) + shape))
+                np.matmul(stacked, scaled[:n_terms * n].reshape(n_terms * n_nodes, -1),
+                          out=products[:n].reshape(n_nodes, -1))
+
+                # bincount over nodes touched by the chunk only
+                np.subtract(chunk_tags, low, out=local[:chunk_tags.size].reshape(chunk_tags.shape))
+                for column in range(n_columns):
+                    sums = np.bincount(local[:chunk_tags.size], products[column:n:n_columns])
+                    y[low:low + sums.shape[0], column] += sums
+
+        return y
+
+    def _rmatvec(self, x: np.ndarray) -> np.ndarray:
+        # operator is symmetric
+        return self._matvec(x)
+
+    def _rmatmat(self, x: np.ndarray) -> np.ndarray:
+        return self._matmat(x)
+
+    def _adjoint(self):
+        return self
+
+    def diagonal(self) -> np.ndarray:
+        """
+        Get diagonal of the operator, for Jacobi preconditioning
+
+        :return: diagonal (nNodes,)
+        """
+        diagonal = np.zeros(self.shape[0])
+
+        for (tags, stacked, factors, _) in self._blocks:
+            n_nodes = tags.shape[0]
+            # diagonals of reference matrices (nTerms, nNodes)
+            diagonals = stacked.reshape(n_nodes, -1, n_nodes).diagonal(axis1=0, axis2=2)
+            diagonal += np.bincount(tags.ravel(), (diagonals.T @ factors).ravel(), minlength=self.shape[0])
+
+        return diagonal
+
+    def nbytes(self, n_columns: int = 1) -> int:
+        """
+        Get memory held by the operator, node tags are shared with the mesh and not counted
+
+        :param n_columns: number of columns of applied blocks
+        :return: number of bytes of geometric factors and work arrays of one chunk
+        """
+        stored = sum(factors.nbytes + stacked.nbytes + lows.nbytes for (_, stacked, factors, lows) in self._blocks)
+
+        # gathered values, scaled values, products and shifted tags of the largest chunk, one bincount
+        size = max([min(self._chunk, tags.shape[1]) * tags.shape[0] for (tags, _, _, _) in self._blocks], default=0)
+        n_terms = max([factors.shape[0] for (_, _, factors, _) in self._blocks], default=0)
+        return stored + size * (8 * n_columns * (n_terms + 2) + 16)
+
+
+def stiffness_terms(con_list, coordinates: np.ndarray, value, affine: bool) -> (np.ndarray, np.ndarray):
+    """
+    Split element stiffness matrices into terms
+
+    :param con_list: connectivity list
+    :param coordinates: node coordinates (3, nNodes) indexed by tags of the list
+    :param value: stiffness coefficient, scalar or values broadcasting against (nElem, nQp)
+    :param affine: Jacobians are constant in every element
+    :return: reference matrices (nTerms, nNodes, nNodes), factors (nTerms, nElem)
+    """
+    element = reference(con_list.el_type(), stiffnessOrders[con_list.el_type()])
+    jacobians = element.jacobians(con_list, coordinates)
+    determinant, metric = metric_determinant(jacobians)
+    scale = value / np.sqrt(determinant)
+    gradients = element.gradients()
+
+    # volume times inverse of the metric tensor, upper triangle, and products of reference gradients
+    if element.dim() == 1:
+        factors = scale[..., None]
+        products = (gradients[..., 0][:, :, None] * gradients[..., 0][:, None, :])[:, None]
+    else:
+        (g00, g01, g11) = metric
+        factors = np.stack((g11, -g01, g00), axis=-1) * scale[..., None]
+        (d0, d1) = (gradients[..., 0], gradients[..., 1])
+        products = np.stack((d0[:, :, None] * d0[:, None, :],
+                             d0[:, :, None] * d1[:, None, :] + d1[:, :, None] * d0[:, None, :],
+                             d1[:, :, None] * d1[:, None, :]), axis=1)
+
+    return quadrature_terms(element.weights(), products, factors, affine)
+
+
+def mass_terms(con_list, coordinates: np.ndarray, value, affine: bool) -> (np.ndarray, np.ndarray):
+    """
+    Split element mass matrices into terms
+
+    :param con_list: connectivity list
+    :param coordinates: node coordinates (3, nNodes) indexed by tags of the list
+    :param value: mass coefficient, scalar or values broadcasting against (nElem, nQp)
+    :param affine: Jacobians are constant in every element
+    :return: reference matrices (nTerms, nNodes, nNodes), factors (nTerms, nElem)
+    """
+    element = reference(con_list.el_type(), massOrders[con_list.el_type()])
+    jacobians = element.jacobians(con_list, coordinates)
+    values = element.values()
+    products = (values[:, :, None] * values[:, None, :])[:, None]
+    return quadrature_terms(element.weights(), products, (element.measures(jacobians) * value)[..., None], affine)
+
+
+def quadrature_terms(weights: np.ndarray, products: np.ndarray, factors: np.ndarray,
+                     affine: bool) -> (np.ndarray, np.ndarray):
+    """
+    Get terms of element matrices sum_q w_q sum_k factors[e, q, k] * products[q, k]
+
+    Factors of affine elements do not depend on the quadrature point, products
+    are summed over quadrature points once and one factor per term and
+    element is kept.
+
+    :param weights: quadrature weights (nQp,)
+    :param products: reference matrices (nQp, nTerms, nNodes, nNodes) of every quadrature point
+    :param factors: geometric factors (nElem, nQp, nTerms)
+    :param affine: Jacobians are constant in every element
+    :return: reference matrices (nTerms, nNodes, nNodes), factors (nTerms, nElem)
+    """
+    n_nodes = products.shape[-1]
+    if affine:
+        return np.einsum('q,qknm->knm', weights, products), np.ascontiguousarray(factors[:, 0].T)
+
+    return products.reshape(-1, n_nodes, n_nodes), \
+        np.ascontiguousarray((factors * weights[:, None]).reshape(factors.shape[0], -1).T)
+
+
+def is_affine(jacobians: np.ndarray) -> bool:
+    """
+    Check if Jacobians are constant in every element
+
+    :param jacobians: Jacobians (nElem, nQp, 3, dim)
+    :return: True for lines, triangles and parallelograms
+    """
+    variation = np.abs(jacobians - jacobians[:, :1]).max(initial=0.)
+    return bool(variation <= 1e-12 * np.abs(jacobians).max(initial=0.))
+
+
+def coefficient(value, first: int, n_el: int):
+    """
+    Get coefficient of elements of one connectivity list
+
+    :param value: scalar or value of each element
+    :param first: index of the first element of the list
+    :param n_el: number of elements of the list
+    :return: scalar or values broadcasting against (nElem, nQp)
+    """
+    value = np.asarray(value, dtype=np.float64)
+    if value.ndim == 0:
+        return value
+    return value[first:first + n_el, None]
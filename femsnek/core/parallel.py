@@ -0,0 +1,213 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: parallel
+   :synopsis: Assembly of mesh partitions by a pool of processes
+.. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
+
+Elements of a region are split into parts (:meth:`FeMesh.partition`), every
+worker process computes element matrices of one part and sums them into the
+entries of global matrix its part touches. Node coordinates, packed
+connectivity and the assembly plan live in `multiprocessing.shared_memory`
+blocks, workers view them without copying or pickling. Only the part index
+and partial sums go through the pool. Partial sums are added to CSR data of
+the sparsity pattern by the parent at the end.
+
+Kernels are called as `kernel(con_list, coordinates)` with connectivity lists
+of one part and have to be picklable (module functions, functools.partial),
+e.g. :func:`femsnek.core.matrices.stiffness`.
+
+Example:
+    with ParallelAssembler(femesh, ('i', 0), workers=8) as assembler:
+        stiffness = assembler.assemble(matrices.stiffness)
+        mass = assembler.assemble(functools.partial(matrices.mass, coefficient=rho))
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import scipy.sparse as sparse
+
+from femsnek.core.assembly import ranges, concatenate, element_lists
+
+
+class ParallelAssembler:
+    """
+    Process pool assembling parts of one mesh region, plan and shared memory are built once.
+
+    Attributes:
+
+        -`_pattern: SparsityPattern` - sparsity pattern of the region
+        -`_partition: tuple` - (offsets, element indices) of parts
+        -`_positions: list` - positions in CSR data touched by every part, sorted
+        -`_blocks: list` - shared memory blocks
+        -`_spec: dict` - [<array name>] -> (<block name>, <shape>, <dtype>) of shared arrays
+        -`_executor: ProcessPoolExecutor` - worker processes
+    """
+    __slots__ = (
+                '_pattern',
+                '_partition',
+                '_positions',
+                '_blocks',
+                '_spec',
+                '_executor'
+                )
+
+    def __init__(self, femesh, region: (str, int), workers: int = None, partition: tuple = None):
+        """
+        Creates instance of ParallelAssembler, plans assembly of parts and starts workers
+
+        :param femesh: finite element mesh
+        :param region: region tuple
+        :param workers: number of worker processes, number of CPUs by default
+        :param partition: (optional) partition of region elements, one part per worker by default
+        """
+        workers = workers or os.cpu_count()
+        mesh = femesh[region]
+        packed = mesh.packed()
+        self._pattern = mesh.sparsity()
+        self._partition = partition if partition is not None else femesh.partition(region, workers)
+        (offsets, elements) = self._partition
+
+        # entries of element matrices of every part mapped to the CSR positions the part touches
+        self._positions = []
+        inverse = []
+        for part in range(offsets.shape[0] - 1):
+            part_elements = elements[offsets[part]:offsets[part + 1]]
+            entries = ranges(self._pattern._entry_offsets[part_elements],
+                             self._pattern._entry_offsets[part_elements + 1])
+            (positions, local) = np.unique(self._pattern._scatter[entries], return_inverse=True)
+            self._positions.append(positions)
+            inverse.append(local.ravel())
+
+        inverse_offsets = np.zeros(len(inverse) + 1, dtype=np.int64)
+        np.cumsum([local.shape[0] for local in inverse], out=inverse_offsets[1:])
+
+        self._blocks = []
+        self._spec = {}
+        self._executor = None
+        try:
+            self.share('coordinates', femesh.coordinates(region))
+            self.share('connectivity', packed.connectivity())
+            self.share('offsets', packed.offsets())
+            self.share('types', packed.types())
+            self.share('part_offsets', offsets)
+            self.share('elements', elements)
+            self.share('inverse', concatenate(inverse + [np.empty(0, dtype=np.int64)]))
+            self.share('inverse_offsets', inverse_offsets)
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        except BaseException:
+            self.close()
+            raise
+
+    def share(self, name: str, array: np.ndarray) -> None:
+        """
+        Copy array into new shared memory block
+
+        :param name: name of the array for workers
+        :param array: numpy array
+        """
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._blocks.append(block)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        self._spec[name] = (block.name, array.shape, array.dtype.str)
+
+    def partition(self) -> (np.ndarray, np.ndarray):
+        """
+        Get partition of region elements.
+
+        :return: offsets, element indices of parts
+        """
+        return self._partition
+
+    def assemble(self, kernel, out: sparse.csr_matrix = None) -> sparse.csr_matrix:
+        """
+        Assemble global matrix, parts are computed by workers
+
+        :param kernel: picklable function (con_list, coordinates) -> element matrices (nElem, nNodes, nNodes)
+        :param out: (optional) matrix created by the sparsity pattern of the region, its data is overwritten
+        :return: global matrix
+        """
+        jobs = [self._executor.submit(assemble_part, self._spec, part, kernel, positions.shape[0])
+                for (part, positions) in enumerate(self._positions)]
+
+        data = np.zeros(self._pattern.n_nonzero())
+        for (job, positions) in zip(jobs, self._positions):
+            data[positions] += job.result()
+
+        if out is None:
+            return self._pattern.matrix(data)
+
+        out.data[...] = data
+        return out
+
+    def close(self) -> None:
+        """
+        Stop workers and release shared memory
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def assemble_part(spec: dict, part: int, kernel, n_positions: int) -> np.ndarray:
+    """
+    Compute element matrices of one part and sum them by CSR positions, runs in worker process
+
+    :param spec: [<array name>] -> (<block name>, <shape>, <dtype>) of shared arrays
+    :param part: index of the part
+    :param kernel: function (con_list, coordinates) -> element matrices
+    :param n_positions: number of CSR positions touched by the part
+    :return: sums of entries at positions of the part
+    """
+    blocks = {name: shared_memory.SharedMemory(name=block_name) for (name, (block_name, _, _)) in spec.items()}
+    try:
+        # views of shared arrays do not outlive this call, blocks can be closed afterwards
+        return part_sums({name: np.ndarray(spec[name][1], dtype=spec[name][2], buffer=block.buf)
+                          for (name, block) in blocks.items()}, part, kernel, n_positions)
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+def part_sums(arrays: dict, part: int, kernel, n_positions: int) -> np.ndarray:
+    """
+    Compute element matrices of one part and sum them by CSR positions
+
+    Elements of the part are sorted, consecutive elements of one type form
+    connectivity lists in the order used by the assembly plan.
+
+    :param arrays: [<array name>] -> shared array
+    :param part: index of the part
+    :param kernel: function (con_list, coordinates) -> element matrices
+    :param n_positions: number of CSR positions touched by the part
+    :return: sums of entries at positions of the part
+    """
+    part_offsets = arrays['part_offsets']
+    elements = arrays['elements'][part_offsets[part]:part_offsets[part + 1]]
+    values = [kernel(con_list, arrays['coordinates'])
+              for con_list in element_lists(arrays['connectivity'], arrays['offsets'], arrays['types'], elements)]
+
+    inverse_offsets = arrays['inverse_offsets']
+    inverse = arrays['inverse'][inverse_offsets[part]:inverse_offsets[part + 1]]
+    return np.bincount(inverse, weights=concatenate(values + [np.empty(0)]), minlength=n_positions)
@@ -0,0 +1,327 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: reference
+   :synopsis: Reference elements, shape functions and quadrature rules
+.. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
+
+Reference elements are keyed by element signatures of
+:mod:`femsnek.core.elements`. Shape functions and their gradients are
+tabulated once at the quadrature points of every (element type, order) pair
+and cached. Geometry of all elements of a connectivity list is evaluated in
+batched array operations, arrays have shapes:
+    Jacobians      (nElem, nQp, 3, dim)
+    measures       (nElem, nQp)
+    gradients      (nElem, nQp, nNodes, 3)
+
+Reference domains:
+    Line1  [-1, 1]
+    Tri1   (0, 0), (1, 0), (0, 1)
+    Quad1  [-1, 1] x [-1, 1], nodes counterclockwise from (-1, -1)
+"""
+
+import numpy as np
+from numpy.polynomial.legendre import leggauss
+
+from femsnek.core.elements import T_Line1, T_Tri1, T_Quad1, ConnectivityList
+
+
+# Default quadrature order, integrates mass matrices of linear elements exactly
+DEFAULT_ORDER = 2
+
+
+def gauss_line(order: int) -> (np.ndarray, np.ndarray):
+    """
+    Gauss-Legendre rule on [-1, 1]
+
+    :param order: highest polynomial order integrated exactly
+    :return: points (nQp, 1), weights (nQp,)
+    """
+    points, weights = leggauss(order // 2 + 1)
+    return points[:, None], weights
+
+
+def gauss_quad(order: int) -> (np.ndarray, np.ndarray):
+    """
+    Tensor product Gauss-Legendre rule on [-1, 1] x [-1, 1]
+
+    :param order: highest polynomial order integrated exactly in each direction
+    :return: points (nQp, 2), weights (nQp,)
+    """
+    points, weights = leggauss(order // 2 + 1)
+    xi, eta = np.meshgrid(points, points, indexing='ij')
+    return np.column_stack((xi.ravel(), eta.ravel())), np.outer(weights, weights).ravel()
+
+
+def gauss_tri(order: int) -> (np.ndarray, np.ndarray):
+    """
+    Rule on reference triangle, symmetric rules up to order 2, collapsed Gauss rule above
+
+    :param order: highest polynomial order integrated exactly
+    :return: points (nQp, 2), weights (nQp,)
+    """
+    if order <= 1:
+        return np.array([[1. / 3., 1. / 3.]]), np.array([0.5])
+    if order == 2:
+        return np.array([[1. / 6., 1. / 6.], [2. / 3., 1. / 6.], [1. / 6., 2. / 3.]]), np.full(3, 1. / 6.)
+
+    # square [0, 1]^2 collapsed onto triangle, the Jacobian (1 - a) raises the order by one
+    points, weights = leggauss((order + 1) // 2 + 1)
+    points = (points + 1.) / 2.
+    weights = weights / 2.
+    a, b = np.meshgrid(points, points, indexing='ij')
+    wa, wb = np.meshgrid(weights, weights, indexing='ij')
+    return np.column_stack((a.ravel(), (b * (1. - a)).ravel())), (wa * wb * (1. - a)).ravel()
+
+
+def shape_line1(xi: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+    Shape functions of first order line
+
+    :param xi: reference coordinates (nP, 1)
+    :return: values (nP, 2), gradients (nP, 2, 1)
+    """
+    x = xi[:, 0]
+    values = np.column_stack((1. - x, 1. + x)) / 2.
+    gradients = np.broadcast_to(np.array([[-0.5], [0.5]]), (xi.shape[0], 2, 1))
+    return values, np.array(gradients)
+
+
+def shape_tri1(xi: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+    Shape functions of first order triangle
+
+    :param xi: reference coordinates (nP, 2)
+    :return: values (nP, 3), gradients (nP, 3, 2)
+    """
+    values = np.column_stack((1. - xi[:, 0] - xi[:, 1], xi[:, 0], xi[:, 1]))
+    gradients = np.broadcast_to(np.array([[-1., -1.], [1., 0.], [0., 1.]]), (xi.shape[0], 3, 2))
+    return values, np.array(gradients)
+
+
+def shape_quad1(xi: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+    Shape functions of first order quadrilateral
+
+    :param xi: reference coordinates (nP, 2)
+    :return: values (nP, 4), gradients (nP, 4, 2)
+    """
+    # reference coordinates of the nodes
+    corners = np.array([[-1., -1.], [1., -1.], [1., 1.], [-1., 1.]])
+    x = 1. + xi[:, None, 0] * corners[None, :, 0]
+    y = 1. + xi[:, None, 1] * corners[None, :, 1]
+
+    values = x * y / 4.
+    gradients = np.stack((corners[None, :, 0] * y, x * corners[None, :, 1]), axis=2) / 4.
+    return values, gradients
+
+
+# Dictionary [<fem-snek element type>] -> (<dimension>, <number of nodes>, <shape functions>, <quadrature>)
+referenceTypes = {
+        T_Line1: (1, 2, shape_line1, gauss_line),
+        T_Tri1: (2, 3, shape_tri1, gauss_tri),
+        T_Quad1: (2, 4, shape_quad1, gauss_quad)
+        }
+
+
+class ReferenceElement:
+    """
+    Shape functions of one element type tabulated at quadrature points.
+
+    Instances are cached, use :func:`reference` to get them.
+
+    Attributes:
+
+        -`_type: int` - element type signature
+        -`_dimension: int` - dimension of element type
+        -`_order: int` - order of quadrature rule
+        -`_points: nparray` - quadrature points in reference coordinates (nQp, dim)
+        -`_weights: nparray` - quadrature weights (nQp,)
+        -`_values: nparray` - shape function values at quadrature points (nQp, nNodes)
+        -`_gradients: nparray` - reference gradients at quadrature points (nQp, nNodes, dim)
+    """
+    __slots__ = (
+                '_type',
+                '_dimension',
+                '_order',
+                '_points',
+                '_weights',
+                '_values',
+                '_gradients'
+                )
+
+    def __init__(self, el_type: int, order: int = DEFAULT_ORDER):
+        """
+        Creates instance of ReferenceElement, tabulates shape functions
+
+        :param el_type: element type signature
+        :param order: order of quadrature rule
+        """
+        (dimension, _, shape, quadrature) = referenceTypes[el_type]
+        self._type = el_type
+        self._dimension = dimension
+        self._order = order
+        self._points, self._weights = quadrature(order)
+        self._values, self._gradients = shape(self._points)
+
+        for array in (self._points, self._weights, self._values, self._gradients):
+            array.flags.writeable = False
+
+    def el_type(self) -> int:
+        """
+        Get element type signature.
+
+        :return: element type number
+        """
+        return self._type
+
+    def dim(self) -> int:
+        """
+        Get dimension of element type.
+
+        :return: element dimension
+        """
+        return self._dimension
+
+    def n_points(self) -> int:
+        """
+        Get number of quadrature points.
+
+        :return: number of quadrature points
+        """
+        return self._weights.shape[0]
+
+    def points(self) -> np.ndarray:
+        """
+        Get quadrature points in reference coordinates.
+
+        :return: array with shape `(nQp, dim)`
+        """
+        return self._points
+
+    def weights(self) -> np.ndarray:
+        """
+        Get quadrature weights.
+
+        :return: array with shape `(nQp,)`
+        """
+        return self._weights
+
+    def values(self) -> np.ndarray:
+        """
+        Get shape function values at quadrature points.
+
+        :return: array with shape `(nQp, nNodes)`
+        """
+        return self._values
+
+    def gradients(self) -> np.ndarray:
+        """
+        Get shape function gradients in reference coordinates at quadrature points.
+
+        :return: array with shape `(nQp, nNodes, dim)`
+        """
+        return self._gradients
+
+    def jacobians(self, con_list: ConnectivityList, coordinates: np.ndarray) -> np.ndarray:
+        """
+        Evaluate Jacobians of all elements at all quadrature points
+
+        :param con_list: connectivity list of this element type
+        :param coordinates: node coordinates (3, nNodes) indexed by tags of the list
+        :return: Jacobians dx/dxi (nElem, nQp, 3, dim)
+        """
+        # (nElem, nNodes, 3) coordinates of element nodes
+        element_nodes = coordinates.T[con_list._tags.T]
+        return np.einsum('enc,qnd->eqcd', element_nodes, self._gradients, optimize=True)
+
+    def measures(self, jacobians: np.ndarray) -> np.ndarray:
+        """
+        Get Jacobian determinants, for elements embedded in 3D sqrt(det(J^T J))
+
+        :param jacobians: result of :meth:`jacobians`
+        :return: determinants (nElem, nQp)
+        """
+        return np.sqrt(metric_determinant(jacobians)[0])
+
+    def physical_gradients(self, jacobians: np.ndarray) -> np.ndarray:
+        """
+        Get shape function gradients in physical coordinates
+
+        Uses the pseudo inverse J (J^T J)^-1, which is the inverse of J for
+        elements of full dimension.
+
+        :param jacobians: result of :meth:`jacobians`
+        :return: gradients (nElem, nQp, nNodes, 3)
+        """
+        return self.geometry(jacobians)[1]
+
+    def geometry(self, jacobians: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Get Jacobian determinants and physical gradients, metric tensor is computed once
+
+        :param jacobians: result of :meth:`jacobians`
+        :return: determinants (nElem, nQp), gradients (nElem, nQp, nNodes, 3)
+        """
+        determinant, metric = metric_determinant(jacobians)
+
+        # columns of the pseudo inverse, explicit inverse of 1x1 or 2x2 metric
+        if self._dimension == 1:
+            columns = [jacobians[..., 0] / determinant[..., None]]
+        else:
+            (g00, g01, g11) = metric
+            columns = [(jacobians[..., 0] * g11[..., None] - jacobians[..., 1] * g01[..., None]) /
+                       determinant[..., None],
+                       (jacobians[..., 1] * g00[..., None] - jacobians[..., 0] * g01[..., None]) /
+                       determinant[..., None]]
+
+        gradients = columns[0][:, :, None, :] * self._gradients[None, :, :, 0, None]
+        for (d, column) in enumerate(columns[1:], 1):
+            gradients += column[:, :, None, :] * self._gradients[None, :, :, d, None]
+        return np.sqrt(determinant), gradients
+
+
+def metric_determinant(jacobians: np.ndarray) -> (np.ndarray, tuple):
+    """
+    Compute determinant and entries of metric tensor J^T J
+
+    :param jacobians: Jacobians (nElem, nQp, 3, dim), dim 1 or 2
+    :return: determinant (nElem, nQp), upper triangle entries of metric tensor
+    """
+    def dot(a, b):
+        return a[..., 0] * b[..., 0] + a[..., 1] * b[..., 1] + a[..., 2] * b[..., 2]
+
+    if jacobians.shape[-1] == 1:
+        g00 = dot(jacobians[..., 0], jacobians[..., 0])
+        return g00, (g00,)
+
+    g00 = dot(jacobians[..., 0], jacobians[..., 0])
+    g01 = dot(jacobians[..., 0], jacobians[..., 1])
+    g11 = dot(jacobians[..., 1], jacobians[..., 1])
+    return g00 * g11 - g01 * g01, (g00, g01, g11)
+
+
+# Dictionary [(<fem-snek element type>, <quadrature order>)] -> ReferenceElement
+referenceCache = {}
+
+
+def reference(el_type: int, order: int = DEFAULT_ORDER) -> ReferenceElement:
+    """
+    Get cached reference element
+
+    :param el_type: element type signature
+    :param order: order of quadrature rule
+    :return: ReferenceElement object
+    """
+    key = (el_type, order)
+    if key not in referenceCache:
+        referenceCache[key] = ReferenceElement(el_type, order)
+    return referenceCache[key]
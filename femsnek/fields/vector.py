@@ -0,0 +1,113 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: vector
+   :synopsis: Provides vector field operation capabilities
+.. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
+"""
+
+import numpy as np
+from femsnek.fields.field import FieldBase
+from femsnek.fields.scalar import ScalarField
+from femsnek.mesh.feMesh import FeMesh
+from numpy import ndarray
+from femsnek.fio.stream import WritableBase
+from femsnek.fio.error import FieldOperationError
+
+
+class VectorField(FieldBase, WritableBase):
+    """
+    Field of 3 component vectors, nodal values are stored interleaved as
+    (nNodes, 3) C-contiguous array.
+    """
+    __slots__ = '_value'
+    _order = 2
+
+    def __init__(self, name: str, value: ndarray, mesh: FeMesh, region: (str, int) = (None, None)):
+        """
+        Create instance of VectorField class
+
+        :param name: name of the vector field
+        :param value: numpy array with nodal values (nNodes, 3)
+        :param mesh: finite element mesh
+        :param region: tuple describing region of the mesh
+        """
+
+        if region == (None, None):
+            region = ('i', 0)
+
+        self._region = region
+        self._ref_feMesh = mesh
+        if value.ndim != 2 or value.shape[1] != 3:
+            raise FieldOperationError('Vector field values must have shape (nNodes, 3)!')
+        elif value.shape[0] != mesh[region].n_nodes():
+            raise FieldOperationError('Number of field values and mesh nodes not equal for specified mesh '
+                                      'region!')
+        else:
+            self._value = np.ascontiguousarray(value)
+
+        self._name = name
+
+    @classmethod
+    def by_region_name(cls, name: str, value: ndarray, mesh: FeMesh, region_name: str):
+        """
+        Create instance of VectorField class (region by its physical name)
+
+        :param name: name of the vector field
+        :param value: numpy array with nodal values (nNodes, 3)
+        :param mesh: finite element mesh
+        :param region_name: name of the chosen mesh region
+        """
+
+        return cls(name, value, mesh, mesh(region_name))
+
+    @classmethod
+    def by_fun(cls, name: str, v_by_lambda, mesh: FeMesh, region: (str, int) = (None, None)):
+        """
+        Create instance of VectorField class (values by lambda function)
+
+        :param name: name of the vector field
+        :param v_by_lambda: lambda function with signature foo(x, y, z) returning 3 components
+        :param mesh: finite element mesh
+        :param region: tuple describing region of the mesh
+        """
+
+        if region == (None, None):
+            region = ('i', 0)
+
+        node_tags = mesh[region]._node_tags
+        value = np.empty((node_tags.shape[0], 3))
+        for (i, component) in enumerate(v_by_lambda(mesh._nodes[0, node_tags],
+                                                    mesh._nodes[1, node_tags],
+                                                    mesh._nodes[2, node_tags])):
+            value[:, i] = component
+
+        return cls(name, value, mesh, region)
+
+    def components(self):
+        """
+        Decomposes field into scalar fields <name>_x, <name>_y, <name>_z
+
+        :return: list of scalar fields, their values are views of vector values
+        """
+        return [ScalarField(self._name + '_' + axis, self._value[:, i], self._ref_feMesh, self._region)
+                for (i, axis) in enumerate('xyz')]
+
+    def nodal(self) -> ndarray:
+        """
+        Returns nodal values of the field.
+
+        :return: numpy array with nodal values of the field (nNodes, 3)
+        """
+        return self._value
+
+    def __repr__(self) -> str:
+        return 'VectorField(\n \'' + self._name + '\',\n' + repr(self._value) + ',\n' + str(self._region) + '\n)'
@@ -0,0 +1,165 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: cache
+   :synopsis: On-disk cache of imported finite element meshes
+.. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
+
+Cache entry is a directory with one .npy file per array of the finished
+:class:`femsnek.mesh.feMesh.FeMesh` (nodes, node tags and packed connectivity
+of every region) and a `mesh.json` manifest describing its regions. Arrays of
+loaded meshes are memory mapped (read only).
+
+Entry name contains a hash of `femsnek.fio.gmsh.READER_VERSION` and of the
+absolute path, size and modification time of the mesh file, so looking an
+entry up costs one `os.stat` and does not read the file. A changed file gets
+a new entry, old entries are left unused. Edits keeping both size and
+modification time are not detected, with `content_hash` entries are keyed by
+the whole file content instead, at the cost of reading the file every load.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from femsnek.core.elements import PackedConnectivity
+from femsnek.fio.gmsh import READER_VERSION
+from femsnek.mesh.feMesh import FeMesh, Mesh
+
+
+# Version of the cache layout, change it whenever the layout changes
+CACHE_VERSION = 2
+
+MANIFEST = 'mesh.json'
+
+
+def key(path_to_file: str, content_hash: bool = False) -> str:
+    """
+    Compute cache key of mesh file
+
+    :param path_to_file: path to mesh file
+    :param content_hash: hash file content instead of its path, size and modification time
+    :return: hex digest of file identity, reader and cache versions
+    """
+    digest = hashlib.sha256()
+    digest.update(('reader %d cache %d' % (READER_VERSION, CACHE_VERSION)).encode())
+
+    if not content_hash:
+        status = os.stat(path_to_file)
+        digest.update(('%s %d %d' % (os.path.abspath(path_to_file), status.st_size, status.st_mtime_ns)).encode())
+        return digest.hexdigest()[:32]
+
+    # sha256 is hardware accelerated on most CPUs, faster than blake2 or md5 there
+    digest.update(b'content')
+    with open(path_to_file, 'rb') as file:
+        while True:
+            chunk = file.read(1 << 24)
+            if not chunk:
+                break
+            digest.update(chunk)
+
+    return digest.hexdigest()[:32]
+
+
+def entry_path(path_to_file: str, cache_dir: str = None, content_hash: bool = False) -> str:
+    """
+    Get path of cache entry for mesh file
+
+    :param path_to_file: path to mesh file
+    :param cache_dir: directory with cached meshes, directory of the mesh file by default
+    :param content_hash: key entry by file content, see :func:`key`
+    :return: path to cache entry directory
+    """
+    if cache_dir is None:
+        cache_dir = os.path.dirname(os.path.abspath(path_to_file))
+
+    return os.path.join(cache_dir, os.path.basename(path_to_file) + '.' + key(path_to_file, content_hash) + '.cache')
+
+
+def exists(entry: str) -> bool:
+    """
+    Check if cache entry is complete
+
+    :param entry: path to cache entry directory
+    :return: True if entry can be loaded
+    """
+    return os.path.isfile(os.path.join(entry, MANIFEST))
+
+
+def save(femesh: FeMesh, entry: str) -> None:
+    """
+    Store finished mesh in cache entry
+
+    Entry is written to temporary directory and renamed, so readers never see
+    partially written entries.
+
+    :param femesh: finite element mesh
+    :param entry: path to cache entry directory
+    """
+    parent = os.path.dirname(os.path.abspath(entry))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+
+    try:
+        np.save(os.path.join(tmp, 'nodes.npy'), np.ascontiguousarray(femesh._nodes))
+
+        manifest = {'info': femesh._info, 'regions': []}
+        for (kind, regions) in (('i', femesh._internalMesh), ('b', femesh._boundaryMesh)):
+            for (i, mesh) in enumerate(regions):
+                prefix = kind + str(i)
+                np.save(os.path.join(tmp, prefix + '.node_tags.npy'), mesh._node_tags)
+                np.save(os.path.join(tmp, prefix + '.connectivity.npy'), mesh.packed().connectivity())
+                np.save(os.path.join(tmp, prefix + '.offsets.npy'), mesh.packed().offsets())
+                np.save(os.path.join(tmp, prefix + '.types.npy'), mesh.packed().types())
+
+                manifest['regions'].append({'region': kind,
+                                            'id': mesh.id(),
+                                            'types': [con_list.el_type() for con_list in mesh._connectivityLists],
+                                            'counts': [con_list.n_elements() for con_list in mesh._connectivityLists]})
+
+        # manifest is written last, it marks entry as complete
+        with open(os.path.join(tmp, MANIFEST), 'w') as file:
+            json.dump(manifest, file)
+
+        os.rename(tmp, entry)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        # entry written by a concurrent process is as good as ours
+        if not exists(entry):
+            raise
+
+
+def load(entry: str) -> FeMesh:
+    """
+    Load mesh from cache entry, arrays are memory mapped
+
+    :param entry: path to cache entry directory
+    :return: finite element mesh
+    """
+    with open(os.path.join(entry, MANIFEST)) as file:
+        manifest = json.load(file)
+
+    def array(name):
+        return np.load(os.path.join(entry, name + '.npy'), mmap_mode='r')
+
+    regions = {'i': [], 'b': []}
+    for region in manifest['regions']:
+        prefix = region['region'] + str(len(regions[region['region']]))
+        packed = PackedConnectivity(array(prefix + '.connectivity'), array(prefix + '.offsets'),
+                                    array(prefix + '.types'))
+        lists = packed.views(region['types'], region['counts'])
+        regions[region['region']].append(Mesh.from_local(lists, region['id'], array(prefix + '.node_tags'), packed))
+
+    return FeMesh.from_regions(manifest['info'], array('nodes'), regions['i'], regions['b'])
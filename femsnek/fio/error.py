@@ -29,3 +29,10 @@ class FieldOperationError(Error):
    """
    pass
 
+class SolverError(Error):
+   """Raised when linear system can not be solved"""
+   pass
+
+class WriterError(Error):
+   """Raised when output can not be written"""
+   pass
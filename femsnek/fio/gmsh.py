@@ -16,10 +16,17 @@ IGNORE: -----------------------------------------------------------
 
 import femsnek.core.elements as elements
 import numpy as np
+import io
+import mmap
+import traceback
+from itertools import islice
 from femsnek.fio.error import MeshFormatError
 from _io import TextIOWrapper
 
 
+# Version of the readers, change it whenever parsed data changes (invalidates mesh caches)
+READER_VERSION = 1
+
 # Dictionary [gmsh element type] -> fem-snek element type
 # fem-snek element type is obtainable from connectivityList object
 gmshTypes = {
@@ -28,6 +35,106 @@ gmshTypes = {
         3: elements.ListQuad1
         }
 
+# Dictionary [gmsh element type] -> number of nodes
+# needed to find block sizes in binary files, also for unsupported types
+gmshNodeCounts = {
+        1: 2, 2: 3, 3: 4, 4: 4, 5: 8, 6: 6, 7: 5,
+        8: 3, 9: 6, 10: 9, 11: 10, 15: 1
+        }
+
+
+#       File readers
+# ~~~~~~~~~~~~~~~~~~~~~~~
+
+def read(path_to_file: str) -> dict:
+    """
+    Read .msh file, ascii or binary
+
+    :param path_to_file: path to .msh file
+    :return: dictionary with data describing mesh
+    """
+
+    # dict that will be passed to any reader
+    data = {}
+
+    # $MeshFormat is ascii in both variants, latin-1 decodes binary data that follows it
+    with open(path_to_file, encoding='latin-1') as file:
+        check_ending('$MeshFormat\n', file.readline())
+        read_MeshFormat(file, data)
+
+    if data['binary']:
+        read_binary(path_to_file, data)
+    else:
+        with open(path_to_file) as file:
+            while True:
+                section_name = file.readline()
+                if len(section_name) == 0:
+                    break
+
+                reader = get_section_reader(section_name)
+                reader(file, data)
+
+    return data
+
+
+def read_binary(path_to_file: str, data: dict):
+    """
+    Read binary .msh file
+
+    The file is memory mapped and walked section by section, positions of
+    section bodies are stored in `data['sections']`. Node and element blocks
+    are taken straight from the mapped buffer with `np.frombuffer`, sections
+    that stay ascii in binary files are passed to their ascii readers. Other
+    sections ($NodeData, $Periodic, ...) may hold binary data, they are
+    skipped by the position of their end marker without decoding.
+
+    :param path_to_file: path to binary .msh file
+    :param data: dictionary with data describing mesh, filled by read_MeshFormat
+    """
+    if data['version'] != 'MSH 4.1 binary' or data['data_size'] != 8:
+        raise MeshFormatError('Unsupported format <' + data['version'] + '>, expected <MSH 4.1 binary>!')
+
+    data['sections'] = {}
+
+    with open(path_to_file, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        try:
+            read_sections(buffer, data)
+        except BaseException as error:
+            # frames of the traceback hold views of the buffer, the map cannot be closed while they live
+            traceback.clear_frames(error.__traceback__)
+            raise
+
+
+def read_sections(buffer: mmap.mmap, data: dict):
+    """
+    Walk sections of mapped binary .msh file
+
+    :param buffer: mapped .msh file
+    :param data: dictionary with data describing mesh
+    """
+    position = 0
+    while position < len(buffer):
+        section_name = next_line(buffer, position)
+        name = section_name[1:-1]
+        begin = position + len(section_name)
+
+        reader = get_binary_section_reader(section_name)
+        if reader is not None:
+            # binary data is followed by new line
+            end = reader(buffer, begin, data) + 1
+            ending = next_line(buffer, end)
+            check_ending('$End' + name + '\n', ending)
+        else:
+            end = buffer.find(('\n$End' + name + '\n').encode(), begin - 1) + 1
+            if end == 0:
+                raise MeshFormatError('Expected <$End' + name + '>, got end of file')
+            ending = next_line(buffer, end)
+            if name in asciiSections:
+                get_section_reader(section_name)(io.StringIO(buffer[begin:end + len(ending)].decode()), data)
+
+        data['sections'][name] = (begin, end)
+        position = end + len(ending)
+
 
 #       Readers
 # ~~~~~~~~~~~~~~~~~~~~~~~
@@ -46,16 +153,25 @@ def skip_section(file: TextIOWrapper, data: dict):
 
 def read_MeshFormat(file: TextIOWrapper, data: dict):
     """
-    Read version of .msh file
+    Read version of .msh file and check if it is binary
 
     :param file: opened .msh file
     :param data: dictionary with data describing mesh
     """
 
     mesh_format = file.readline()
-    mesh_format = mesh_format.split(' ')
+    mesh_format = mesh_format.split()
+
+    data['binary'] = mesh_format[1] == '1'
+    data['data_size'] = int(mesh_format[2])
 
-    data['version'] = 'MSH ' + mesh_format[0] + ' ASCII'
+    if data['binary']:
+        # integer 1 written in binary tells the byte order
+        one = file.readline()
+        data['byteorder'] = '<' if one[0] == '\x01' else '>'
+        data['version'] = 'MSH ' + mesh_format[0] + ' binary'
+    else:
+        data['version'] = 'MSH ' + mesh_format[0] + ' ASCII'
 
     check_ending('$EndMeshFormat\n', file.readline())
 
@@ -138,21 +254,24 @@ def read_Nodes(file: TextIOWrapper, data: dict):
     """
     Read Nodes section from .msh file
 
+    Every entity block is parsed with a single NumPy call, so the cost is
+    linear in the number of nodes and independent of the block layout.
+
     :param file: opened .msh file
     :param data: dictionary with data describing mesh
     """
     n_entities, n_nodes = entity_block_info(file)
     node_list = np.empty((3, n_nodes))
-    node_tags = []
+    node_tags = np.empty(n_nodes, dtype=np.int64)
     j = 0
     for i in range(n_entities):
 
-        nodes = parse_nodes(file, node_tags)
+        tags, coordinates = parse_nodes(file)
 
-        for node in nodes:
-            node = node.split(' ')
-            node_list[:, j] = [float(node[0]), float(node[1]), float(node[2])]
-            j += 1
+        n = tags.shape[0]
+        node_tags[j:j + n] = tags
+        node_list[:, j:j + n] = coordinates
+        j += n
 
     check_ending('$EndNodes\n', file.readline())
 
@@ -164,6 +283,9 @@ def read_Elements(file: TextIOWrapper, data: dict):
     """
     Read Elements section from .msh file
 
+    Every entity block is parsed as one integer matrix which is written
+    straight into the `_tags` array of the matching connectivity list.
+
     :param file: opened .msh file
     :param data: dictionary with data describing mesh
     """
@@ -173,25 +295,161 @@ def read_Elements(file: TextIOWrapper, data: dict):
     data['id_list'] = []
 
     for i in range(n_entities):
-        n_elements, elements_str_list, el_type, tag, dim = parse_entity(file)
-        if dim != 0:
-            data['id_list'].append(
-                    data['entities'][dim][tag]
-                    )
-            element_list = gmshTypes[el_type](n_elements)
-            for j in range(n_elements):
-                el = elements_str_list[j]
-                connectivity = [(int(i) - 1) for i in el.split(' ')]
-                element_list[j] = connectivity[1:]
-
-            data['element_lists'].append(element_list)
+        n_elements, elements_table, el_type, tag, dim = parse_entity(file)
+        store_elements(data, dim, tag, el_type, elements_table)
 
     check_ending('$EndElements\n', file.readline())
 
 
+#       Binary readers
+# ~~~~~~~~~~~~~~~~~~~~~~~
+
+def read_Entities_binary(buffer: mmap.mmap, offset: int, data: dict) -> int:
+    """
+    Read information about entities from binary .msh file
+
+    :param buffer: mapped .msh file
+    :param offset: position of the section body in the buffer
+    :param data: dictionary with data describing mesh
+    :return: position of the first byte after section data
+    """
+    counts, offset = binary_block(buffer, offset, 'u8', 4, data)
+    counts = [int(i) for i in counts]
+    data['#points'] = counts[0]
+    data['#curves'] = counts[1]
+    data['#surfaces'] = counts[2]
+    data['#volumes'] = counts[3]
+
+    data['entities'] = {0: {}, 1: {}, 2: {}, 3: {}}
+    names = data.get('phys_names', {0: {}, 1: {}, 2: {}, 3: {}})
+
+    for dim in range(4):
+        for i in range(counts[dim]):
+            tag, offset = binary_block(buffer, offset, 'i4', 1, data)
+
+            # points store their coordinates, other entities a bounding box
+            offset += 24 if dim == 0 else 48
+
+            n_physical, offset = binary_block(buffer, offset, 'u8', 1, data)
+            physical, offset = binary_block(buffer, offset, 'i4', int(n_physical[0]), data)
+
+            if dim > 0:
+                n_bounding, offset = binary_block(buffer, offset, 'u8', 1, data)
+                offset += 4 * int(n_bounding[0])
+
+                # entities outside of any physical group get id 0
+                physical = int(physical[0]) if physical.shape[0] else 0
+                data['entities'][dim][int(tag[0])] = names[dim].get(physical, physical)
+
+    return offset
+
+
+def read_Nodes_binary(buffer: mmap.mmap, offset: int, data: dict) -> int:
+    """
+    Read Nodes section from binary .msh file
+
+    :param buffer: mapped .msh file
+    :param offset: position of the section body in the buffer
+    :param data: dictionary with data describing mesh
+    :return: position of the first byte after section data
+    """
+    header, offset = binary_block(buffer, offset, 'u8', 4, data)
+    n_entities, n_nodes = int(header[0]), int(header[1])
+
+    node_list = np.empty((3, n_nodes))
+    node_tags = np.empty(n_nodes, dtype=np.int64)
+    j = 0
+    for i in range(n_entities):
+        info, offset = binary_block(buffer, offset, 'i4', 3, data)
+        n, offset = binary_block(buffer, offset, 'u8', 1, data)
+        n = int(n[0])
+        n_columns = node_columns(int(info[0]), int(info[2]))
+
+        tags, offset = binary_block(buffer, offset, 'u8', n, data)
+        coordinates, offset = binary_block(buffer, offset, 'f8', n * n_columns, data)
+
+        node_tags[j:j + n] = tags
+        node_list[:, j:j + n] = coordinates.reshape(n, n_columns)[:, :3].T
+        j += n
+
+    data['nodes'] = node_list
+    data['node_tags'] = node_tags
+
+    return offset
+
+
+def read_Elements_binary(buffer: mmap.mmap, offset: int, data: dict) -> int:
+    """
+    Read Elements section from binary .msh file
+
+    :param buffer: mapped .msh file
+    :param offset: position of the section body in the buffer
+    :param data: dictionary with data describing mesh
+    :return: position of the first byte after section data
+    """
+    header, offset = binary_block(buffer, offset, 'u8', 4, data)
+
+    data['element_lists'] = []
+    data['id_list'] = []
+
+    for i in range(int(header[0])):
+        info, offset = binary_block(buffer, offset, 'i4', 3, data)
+        n, offset = binary_block(buffer, offset, 'u8', 1, data)
+        dim, tag, el_type, n = int(info[0]), int(info[1]), int(info[2]), int(n[0])
+
+        if el_type not in gmshNodeCounts:
+            raise MeshFormatError('Unsupported element type <' + str(el_type) + '>!')
+
+        # tags are size_t, viewing them as int64 is safe for any real mesh
+        table, offset = binary_block(buffer, offset, 'i8', n * (gmshNodeCounts[el_type] + 1), data)
+        store_elements(data, dim, tag, el_type, table.reshape(n, gmshNodeCounts[el_type] + 1))
+
+    return offset
+
+
 #       Helpers
 # ~~~~~~~~~~~~~~~~~~~~~~~
 
+def store_elements(data: dict, dim: int, tag: int, el_type: int, elements_table: np.ndarray):
+    """
+    Convert one block of elements into connectivity list and store it
+
+    :param data: dictionary with data describing mesh
+    :param dim: entity dimension
+    :param tag: entity tag
+    :param el_type: gmsh element type
+    :param elements_table: element tag followed by node tags, one row per element
+    """
+    if dim != 0:
+        if el_type not in gmshTypes:
+            raise MeshFormatError('Unsupported element type <' + str(el_type) + '>!')
+        data['id_list'].append(
+                data['entities'][dim][tag]
+                )
+        element_list = gmshTypes[el_type](elements_table.shape[0])
+
+        # first column holds element tags, gmsh node tags start from 1
+        if elements_table.shape[0]:
+            np.subtract(elements_table[:, 1:].T, 1, out=element_list._tags)
+
+        data['element_lists'].append(element_list)
+
+
+def node_columns(entity_dimension: int, parametric: int) -> int:
+    """
+    Number of values stored for each node of $Nodes entity block
+
+    :param entity_dimension: entity dimension
+    :param parametric: 1 if parametric coordinates are stored
+    :return: number of values per node
+    """
+
+    # parametric blocks store u (curves) or u v (surfaces) after x y z
+    if parametric and entity_dimension < 3:
+        return 3 + entity_dimension
+    return 3
+
+
 def entity_block_info(file: TextIOWrapper) -> (int, int):
     """
     Read information about current entity block
@@ -206,55 +464,62 @@ def entity_block_info(file: TextIOWrapper) -> (int, int):
     return block[0], block[1]
 
 
-def parse_nodes(file: TextIOWrapper, ref_node_tags: list) -> list:
+def parse_nodes(file: TextIOWrapper) -> (np.ndarray, np.ndarray):
     """
     Parse one $Nodes entity block in .msh format
 
     :param file: opened .msh file
-    :param ref_node_tags: mutable node tags list
-    :return: nodal coordinates as string
+    :return: node tags, nodal coordinates with shape (3, number of nodes)
     """
     info = file.readline()
-    info = [int(i) for i in info[:-1].split(' ')]
-
-    nodes = []
+    info = [int(i) for i in info.split()]
 
+    entity_dimension = info[0]
+    parametric = info[2]
     n_nodes = info[3]
 
-    # read node tags in order to check if eny nodes have been skiped
-    for i in range(n_nodes):
-        ref_node_tags.append(int(file.readline()[:-1]))
+    n_columns = node_columns(entity_dimension, parametric)
 
-    # read nodal coordinates as strings
-    for i in range(n_nodes):
-        nodes.append(file.readline()[:-1])  # append but delete <\n>
+    node_tags = read_block(file, n_nodes, np.int64)
+    coordinates = read_block(file, n_nodes, np.float64).reshape(n_nodes, n_columns)
 
-    return nodes
+    return node_tags, coordinates[:, :3].T
 
 
-def parse_entity(file: TextIOWrapper) -> (int, list, int, int, int):
+def parse_entity(file: TextIOWrapper) -> (int, np.ndarray, int, int, int):
     """
     Parse one entity block in .msh format
 
     :param file: opened .msh file
-    :return: number of objects, objects, objects type, entity tag, entity dimension
+    :return: number of objects, objects table (one row per object), objects type, entity tag, entity dimension
     """
     info = file.readline()
-    info = [int(i) for i in info[:-1].split(' ')]
+    info = [int(i) for i in info.split()]
 
-    objects = []
     entity_dimension = info[0]
     entity_tag = info[1]
     obj_type = info[2]
     n_object = info[3]
 
-    # read objects as strings
-    for i in range(n_object):
-        objects.append(file.readline()[:-2])  # append but delete <\n>
+    # read all objects at once, every row has the same number of entries
+    objects = read_block(file, n_object, np.int64)
+    objects = objects.reshape(n_object, objects.shape[0] // max(n_object, 1))
 
     return n_object, objects, obj_type, entity_tag, entity_dimension
 
 
+def read_block(file: TextIOWrapper, n_lines: int, dtype) -> np.ndarray:
+    """
+    Read block of lines with whitespace separated numbers in one call
+
+    :param file: opened .msh file
+    :param n_lines: number of lines in the block
+    :param dtype: numpy type of the numbers
+    :return: flat array with all the numbers from the block
+    """
+    return np.fromstring(''.join(islice(file, n_lines)), dtype=dtype, sep=' ')
+
+
 def get_section_reader(section_name: str):
     """
     Get appropriate reader for each gmsh section
@@ -277,6 +542,57 @@ def get_section_reader(section_name: str):
     return gmsh_sections.get(section_name, skip_section)
 
 
+# Sections that stay ascii in binary files and are read ($MeshFormat is read before the sections)
+asciiSections = {'PhysicalNames'}
+
+
+def get_binary_section_reader(section_name: str):
+    """
+    Get binary reader for gmsh section
+
+    :param section_name: name of the current section
+    :return: section reader or None when the section is ascii also in binary files
+    """
+
+    # Dictionary [gmsh section name] -> binary section reader
+    gmsh_sections = {'Nodes':         read_Nodes_binary,
+                     'Elements':      read_Elements_binary,
+                     'Entities':      read_Entities_binary}
+
+    return gmsh_sections.get(section_name[1:-1])
+
+
+def binary_block(buffer: mmap.mmap, offset: int, dtype: str, count: int, data: dict) -> (np.ndarray, int):
+    """
+    View block of binary numbers in the mapped file
+
+    :param buffer: mapped .msh file
+    :param offset: position of the block in the buffer
+    :param dtype: numpy type of the numbers, without byte order
+    :param count: number of values in the block
+    :param data: dictionary with data describing mesh
+    :return: array viewing the buffer, position of the first byte after the block
+    """
+    dtype = np.dtype(data['byteorder'] + dtype)
+    if offset + count * dtype.itemsize > len(buffer):
+        raise MeshFormatError('Unexpected end of file in binary block!')
+    return np.frombuffer(buffer, dtype=dtype, count=count, offset=offset), offset + count * dtype.itemsize
+
+
+def next_line(buffer: mmap.mmap, position: int) -> str:
+    """
+    Get line of the mapped file that starts at given position
+
+    :param buffer: mapped .msh file
+    :param position: position of the line in the buffer
+    :return: line with new line character
+    """
+    end = buffer.find(b'\n', position)
+    if end < 0:
+        end = len(buffer) - 1
+    return buffer[position:end + 1].decode()
+
+
 def check_ending(expected_name: str, string: str):
     """
     Check section ending
@@ -14,27 +14,37 @@ IGNORE: -----------------------------------------------------------
 .. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
 """
 
-import pyevtk as evtk
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from femsnek.fio.error import WriterError
+from femsnek.fio.vtu import write_unstructured
 from femsnek.mesh.feMesh import FeMesh, Mesh
 import numpy as np
 import femsnek.fields as fields
+from femsnek.fields.vector import VectorField
 
 
 # Data ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-# Dictionary [<fem-snek element type>] -> <VTK Element type>
+# Dictionary [<fem-snek element type>] -> <VTK cell type id>
 # fem-snek element type is obtainable from connectivityList object
 vtkTypes = {
-        1: evtk.vtk.VtkLine,
-        3: evtk.vtk.VtkQuad,
-        2: evtk.vtk.VtkTriangle,
+        1: 3,   # VTK_LINE
+        3: 9,   # VTK_QUAD
+        2: 5,   # VTK_TRIANGLE
         0: None
         }
 
+# Array [<fem-snek element type>] -> <VTK cell type id>, for vectorized lookup
+vtkCellTypes = np.array([vtkTypes[i] if vtkTypes[i] is not None else 0 for i in range(len(vtkTypes))],
+                        dtype=np.uint8)
 
-def write(path: str, femesh: FeMesh, fields_list = None) -> None:
+
+def write(path: str, femesh: FeMesh, fields_list = None, workers: int = 1, processes: bool = False,
+          compression: int = None, threads: int = 1, cell_fields: dict = None) -> None:
     """
-    Exports mesh (and in the future) scalar/vector/tensor fields
+    Exports mesh, scalar/vector fields and element values
 
     Mesh will be decomposed into internal regions and boundary regions based
     on their physical ids. Each region will be stored in different .vtu file
@@ -45,57 +55,328 @@ def write(path: str, femesh: FeMesh, fields_list = None) -> None:
     Boundary region:
         <path>.b.<region name>.vtu
 
+    With more than one worker regions are written in parallel by a thread pool
+    (or a process pool), files are identical to the serial ones. Arrays of
+    every region are gathered here and handed to the workers, errors of the
+    workers are raised here.
+
+    Files are written by :func:`femsnek.fio.vtu.write_unstructured`, arrays
+    are stored as appended raw binary or zlib compressed blocks. Vector fields
+    are written as 3 component arrays, other non-scalar fields as their scalar
+    components. Element values are given per region in the order of its packed
+    connectivity.
+
        :param path: - path to file.
        :param fields_list: list of fields 
        :param femesh: - finite element mesh object
+       :param workers: - number of parallel writers
+       :param processes: - use process pool instead of thread pool
+       :param compression: - zlib compression level (1-9), None writes raw data
+       :param threads: - number of threads compressing each file
+       :param cell_fields: - dict [region] -> dict [name] -> element values (nElem,) or (nElem, nComponents)
     """
     if fields_list is not None:
         point_fields = convert_field_list(fields_list)
     else:
         point_fields = dict()
 
-    # export internal regions
-    for i in range(len(femesh._internalMesh)):
-        export_region(path, ('i', i), point_fields.get(('i', i)), femesh)
-
-    for i in range(len(femesh._boundaryMesh)):
-        export_region(path, ('b', i), point_fields.get(('b', i)), femesh)
-
-
-def export_region(path: str, region: (str, int), fields: dict, femesh: FeMesh):
-    vtk_connectivity = np.empty(0, dtype=np.int32)
-    vtk_offsets = np.empty(1, dtype=np.int32)
-    vtk_offsets[0] = 0
-    vtk_cell_types = np.empty(0, dtype=np.int8)
-    for con_list in femesh[region]._connectivityLists:
-        n_el = con_list.n_elements()
-        el_nodes = con_list.n_nodes()
-        vtk_connectivity = np.append(vtk_connectivity, con_list._tags.flatten('f'), axis=0)
-        vtk_offsets = np.append(vtk_offsets,
-                                [el_nodes * (i + 1) + vtk_offsets[-1] for i in range(n_el)],
-                                axis=0)
-        vtk_cell_types = np.append(vtk_cell_types,
-                                   vtkTypes[con_list.el_type()].tid *
-                                   np.ones((n_el,), dtype=np.int8),
-                                   axis=0)
-
-        filename = path + '.' + region[0] + '.' + str(femesh[region].id())
-
-        evtk.hl.unstructuredGridToVTK(filename,
-                                      femesh._nodes[0, femesh[region]._node_tags],
-                                      femesh._nodes[1, femesh[region]._node_tags],
-                                      femesh._nodes[2, femesh[region]._node_tags],
-                                      vtk_connectivity,
-                                      vtk_offsets[1:],
-                                      vtk_cell_types,
-                                      pointData=fields)
+    write_point_fields(path, femesh, point_fields, workers, processes, compression, threads, cell_fields)
+
+
+def write_point_fields(path: str, femesh: FeMesh, point_fields: dict, workers: int = 1,
+                       processes: bool = False, compression: int = None, threads: int = 1,
+                       cell_fields: dict = None) -> None:
+    """
+    Exports mesh with nodal values already converted by :func:`convert_field_list`
+
+       :param path: - path to file.
+       :param femesh: - finite element mesh object
+       :param point_fields: - dict [region] -> dict [field name] -> nodal values
+       :param workers: - number of parallel writers
+       :param processes: - use process pool instead of thread pool
+       :param compression: - zlib compression level (1-9), None writes raw data
+       :param threads: - number of threads compressing each file
+       :param cell_fields: - dict [region] -> dict [name] -> element values, or None
+    """
+    if cell_fields is None:
+        cell_fields = dict()
+
+    # internal regions first, then boundary regions
+    regions = [('i', i) for i in range(len(femesh._internalMesh))] + \
+              [('b', i) for i in range(len(femesh._boundaryMesh))]
+
+    write_pieces([region_piece(path, region, point_fields.get(region), femesh, cell_fields.get(region))
+                  for region in regions],
+                 workers, processes, compression, threads)
+
+
+def write_pieces(pieces: list, workers: int = 1, processes: bool = False, compression: int = None,
+                 threads: int = 1) -> None:
+    """
+    Writes .vtu pieces serially or by a pool of workers
+
+       :param pieces: - list of :func:`write_piece` arguments
+       :param workers: - number of parallel writers
+       :param processes: - use process pool instead of thread pool
+       :param compression: - zlib compression level (1-9), None writes raw data
+       :param threads: - number of threads compressing each file
+    """
+    if workers <= 1:
+        for piece in pieces:
+            write_piece(*piece, compression, threads)
+        return
+
+    executor_type = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_type(max_workers=workers) as executor:
+        jobs = [executor.submit(write_piece, *piece, compression, threads) for piece in pieces]
+        for job in jobs:
+            job.result()
+
+
+def export_region(path: str, region: (str, int), fields: dict, femesh: FeMesh, cell_fields: dict = None):
+    """
+    Exports one mesh region to .vtu file
+
+    Connectivity, offsets and cell types are taken from packed connectivity
+    of the region, the file is written once for all element types.
+
+       :param path: - path to file.
+       :param region: - region tuple
+       :param fields: - dict [field name] -> nodal values, or None
+       :param femesh: - finite element mesh object
+       :param cell_fields: - dict [name] -> element values in order of packed connectivity, or None
+    """
+    write_piece(*region_piece(path, region, fields, femesh, cell_fields))
+
+
+def region_piece(path: str, region: (str, int), fields: dict, femesh: FeMesh, cell_fields: dict = None) -> tuple:
+    """
+    Gathers arrays describing one mesh region as .vtu piece
+
+       :param path: - path to file.
+       :param region: - region tuple
+       :param fields: - dict [field name] -> nodal values, or None
+       :param femesh: - finite element mesh object
+       :param cell_fields: - dict [name] -> element values, or None
+       :return: arguments of :func:`write_piece`
+    """
+    return (region_filename(path, region, femesh),) + region_geometry(region, femesh) + (fields, cell_fields)
+
+
+def region_filename(path: str, region: (str, int), femesh: FeMesh) -> str:
+    """
+    Name of .vtu file of mesh region, without extension
+
+       :param path: - path to file.
+       :param region: - region tuple
+       :param femesh: - finite element mesh object
+       :return: <path>.<i/b>.<region name>
+    """
+    return path + '.' + region[0] + '.' + str(femesh[region].id())
+
+
+def region_geometry(region: (str, int), femesh: FeMesh) -> tuple:
+    """
+    Gathers geometry arrays of mesh region
+
+       :param region: - region tuple
+       :param femesh: - finite element mesh object
+       :return: points, connectivity, offsets and cell types arguments of :func:`write_piece`
+    """
+    mesh = femesh[region]
+    packed = mesh.packed()
+
+    # one gather gives interleaved (nNodes, 3) coordinates
+    return (femesh._nodes.T[mesh._node_tags],
+            packed.connectivity(),
+            packed.offsets()[1:],
+            vtkCellTypes[packed.types()])
+
+
+def write_piece(filename: str, points: np.ndarray, connectivity: np.ndarray, offsets: np.ndarray,
+                cell_types: np.ndarray, fields: dict, cell_fields: dict = None, compression: int = None,
+                threads: int = 1) -> None:
+    """
+    Writes one .vtu piece
+
+       :param filename: - path to file without extension
+       :param points: - coordinates of nodes (nNodes, 3)
+       :param connectivity: - node tags of all cells, cell after cell
+       :param offsets: - end of each cell in connectivity
+       :param cell_types: - vtk cell type of each cell
+       :param fields: - dict [field name] -> nodal values (nNodes,) or (nNodes, nComponents), or None
+       :param cell_fields: - dict [name] -> element values (nElem,) or (nElem, nComponents), or None
+       :param compression: - zlib compression level (1-9), None writes raw data
+       :param threads: - number of threads compressing the file
+    """
+    write_unstructured(filename + '.vtu', points, connectivity, offsets, cell_types, point_data=fields,
+                       cell_data=cell_fields, compression=compression, threads=threads)
+
+
+class AsyncWriter:
+    """
+    Background writer of .vtu files.
+
+    Nodal values of the fields are snapshot (copied) when a write is submitted
+    and files are written by one background thread, so the solver can carry
+    on with the next step while the previous one goes to disk. At most `depth`
+    snapshots wait in the queue, :meth:`write` blocks when the queue is full.
+
+    First error of the background thread is raised by the next call of
+    :meth:`write`, :meth:`flush` or :meth:`close`, writes queued behind the
+    failed one are dropped. When the body of a `with` block raises, its error
+    is propagated with the error of the background thread as its cause.
+
+    Example:
+        with AsyncWriter() as writer:
+            for time in times:
+                ...
+                writer.write_series(series, time, [u])
+    """
+
+    __slots__ = (
+            '_queue',
+            '_thread',
+            '_error',
+            '_copy'
+            )
+
+    def __init__(self, depth: int = 2, copy: bool = True):
+        """
+        Creates instance of AsyncWriter and starts its thread
+
+           :param depth: - maximal number of pending writes
+           :param copy: - copy nodal values on submit, with False the caller hands
+                          over ownership and must not modify fields until they are written
+        """
+        self._queue = queue.Queue(maxsize=depth)
+        self._error = None
+        self._copy = copy
+        self._thread = threading.Thread(target=self._run, name='vtk-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, path: str, femesh: FeMesh, fields_list: list = None, workers: int = 1,
+              compression: int = None, threads: int = 1, cell_fields: dict = None) -> None:
+        """
+        Submits :func:`write` of fields
+
+           :param path: - path to file.
+           :param femesh: - finite element mesh object
+           :param fields_list: - list of fields
+           :param workers: - number of parallel writers used by the background thread
+           :param compression: - zlib compression level (1-9), None writes raw data
+           :param threads: - number of threads compressing each file
+           :param cell_fields: - dict [region] -> dict [name] -> element values, or None
+        """
+        self.submit(write_point_fields, path, femesh, self.snapshot(fields_list), workers, False,
+                    compression, threads, self.snapshot_cells(cell_fields))
+
+    def write_series(self, series, time: float, fields_list: list = None, cell_fields: dict = None) -> None:
+        """
+        Submits :meth:`femsnek.fio.xdmf.TimeSeries.write` of fields
+
+           :param series: - time series writer, used only by this AsyncWriter until flushed
+           :param time: - time of the step
+           :param fields_list: - list of fields
+           :param cell_fields: - dict [region] -> dict [name] -> element values, or None
+        """
+        self.submit(series.write_point_fields, time, self.snapshot(fields_list), self.snapshot_cells(cell_fields))
+
+    def snapshot(self, fields_list: list) -> dict:
+        """
+        Converts fields to nodal values owned by the writer
+
+           :param fields_list: - list of fields, or None
+           :return: dict [region] -> dict [field name] -> nodal values
+        """
+        return self.snapshot_cells(convert_field_list(fields_list) if fields_list is not None else dict())
+
+    def snapshot_cells(self, cell_fields: dict) -> dict:
+        """
+        Copies values of region dicts, unless ownership is handed over
+
+           :param cell_fields: - dict [region] -> dict [name] -> values, or None
+           :return: dict [region] -> dict [name] -> values owned by the writer
+        """
+        if cell_fields is None or not self._copy:
+            return cell_fields
+        return {region: {name: np.array(values) for (name, values) in region_fields.items()}
+                for (region, region_fields) in cell_fields.items()}
+
+    def submit(self, function, *args) -> None:
+        """
+        Queues call of function in the background thread, blocks while the queue is full
+
+           :param function: - callable
+           :param args: - its arguments
+        """
+        self.raise_error()
+        if not self._thread.is_alive():
+            raise WriterError('AsyncWriter is closed!')
+        self._queue.put((function, args))
+
+    def flush(self) -> None:
+        """
+        Waits until all submitted writes are finished
+        """
+        self._queue.join()
+        self.raise_error()
+
+    def close(self) -> None:
+        """
+        Flushes pending writes and stops the background thread
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self.raise_error()
+
+    def raise_error(self) -> None:
+        """
+        Raises error of the background thread, if there was one
+        """
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _run(self) -> None:
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                if self._error is None:
+                    task[0](*task[1])
+            except BaseException as error:
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+            return
+
+        # error of the with body is raised, error of the background thread becomes its cause
+        try:
+            self.close()
+        except Exception as error:
+            raise exc_value from error
 
 
 def convert_field_list(field_list: list, point_fields=None) -> dict:
     if point_fields is None:
         point_fields = dict()
     for field in field_list:
-        if not isinstance(field, fields.scalar.ScalarField):
+        if isinstance(field, VectorField):
+            # interleaved (nNodes, 3) values are written as one 3 component array
+            if field.region() not in point_fields:
+                point_fields[field.region()] = dict()
+            point_fields[field.region()][field.name()] = field.nodal()
+        elif not isinstance(field, fields.scalar.ScalarField):
             # convert to list of scalars and than export
             point_fields = convert_field_list(field.components(), point_fields)
         else:
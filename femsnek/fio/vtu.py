@@ -0,0 +1,170 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: vtu
+   :synopsis: Writer of VTK unstructured grid (.vtu) files with appended binary data
+.. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
+
+All arrays are stored in the appended section of the file. Raw arrays are
+written straight from their buffers (no copies for C-contiguous arrays of the
+native byte order). Compressed arrays are split into blocks of
+`BLOCK_SIZE` bytes compressed with zlib, optionally by a pool of threads
+(zlib releases the GIL while compressing).
+"""
+
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+
+# Size of uncompressed blocks of compressed arrays
+BLOCK_SIZE = 1 << 20
+
+# Dictionary [<numpy dtype>] -> <VTK data type name>
+vtuDataTypes = {
+        np.dtype(np.int8): 'Int8',
+        np.dtype(np.uint8): 'UInt8',
+        np.dtype(np.int16): 'Int16',
+        np.dtype(np.uint16): 'UInt16',
+        np.dtype(np.int32): 'Int32',
+        np.dtype(np.uint32): 'UInt32',
+        np.dtype(np.int64): 'Int64',
+        np.dtype(np.uint64): 'UInt64',
+        np.dtype(np.float32): 'Float32',
+        np.dtype(np.float64): 'Float64'
+        }
+
+BYTE_ORDER = 'LittleEndian' if sys.byteorder == 'little' else 'BigEndian'
+
+HEADER_TYPE = np.uint64
+
+
+def write_unstructured(filename: str, points: np.ndarray, connectivity: np.ndarray, offsets: np.ndarray,
+                       cell_types: np.ndarray, point_data: dict = None, cell_data: dict = None,
+                       compression: int = None, threads: int = 1) -> None:
+    """
+    Write unstructured grid to .vtu file
+
+    :param filename: path to file, with extension
+    :param points: coordinates of points (nPoints, 3)
+    :param connectivity: point indices of all cells, cell after cell
+    :param offsets: end of each cell in connectivity
+    :param cell_types: vtk cell type of each cell
+    :param point_data: dict [name] -> values (nPoints,) or (nPoints, nComponents)
+    :param cell_data: dict [name] -> values (nCells,) or (nCells, nComponents)
+    :param compression: zlib compression level (1-9), None writes raw data
+    :param threads: number of threads compressing blocks
+    """
+    arrays = []
+    xml = ['<?xml version="1.0"?>\n'
+           '<VTKFile type="UnstructuredGrid" version="1.0" byte_order="%s" header_type="%s"%s>\n'
+           '<UnstructuredGrid>\n'
+           '<Piece NumberOfPoints="%d" NumberOfCells="%d">\n'
+           % (BYTE_ORDER, vtuDataTypes[np.dtype(HEADER_TYPE)],
+              ' compressor="vtkZLibDataCompressor"' if compression else '',
+              points.shape[0], cell_types.shape[0])]
+
+    def data_array(name, values):
+        values = native(values)
+        components = values.shape[1] if values.ndim == 2 else 1
+        xml.append('<DataArray type="%s" Name=%s NumberOfComponents="%d" format="appended" offset="%%d"/>\n'
+                   % (vtuDataTypes[values.dtype], quoteattr(name).replace('%', '%%'), components))
+        arrays.append(values)
+
+    def data_section(tag, data):
+        if not data:
+            return
+        xml.append('<%s>\n' % tag)
+        for (name, values) in data.items():
+            data_array(name, values)
+        xml.append('</%s>\n' % tag)
+
+    data_section('PointData', point_data)
+    data_section('CellData', cell_data)
+    xml.append('<Points>\n')
+    data_array('Points', points)
+    xml.append('</Points>\n<Cells>\n')
+    data_array('connectivity', connectivity)
+    data_array('offsets', offsets)
+    data_array('types', cell_types)
+    xml.append('</Cells>\n'
+               '</Piece>\n'
+               '</UnstructuredGrid>\n'
+               '<AppendedData encoding="raw">\n_')
+
+    if compression:
+        blocks = compress(arrays, compression, threads)
+    else:
+        blocks = [[np.array([array.nbytes], dtype=HEADER_TYPE), array] for array in arrays]
+
+    # offset of every array in the appended section
+    offsets = np.cumsum([0] + [sum(memoryview(part).nbytes for part in parts) for parts in blocks])
+    xml = ''.join(xml)
+    xml = xml % tuple(offsets[:-1])
+
+    with open(filename, 'wb') as file:
+        file.write(xml.encode('ascii'))
+        for parts in blocks:
+            for part in parts:
+                file.write(memoryview(part).cast('B'))
+        file.write(b'\n</AppendedData>\n</VTKFile>\n')
+
+
+def native(values: np.ndarray) -> np.ndarray:
+    """
+    Get C-contiguous array of native byte order, without copy when possible
+
+    :param values: array
+    :return: array ready to be written from its buffer
+    """
+    values = np.asarray(values)
+    if values.dtype == np.bool_:
+        values = values.astype(np.uint8)
+    return np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('='))
+
+
+def compress(arrays: list, level: int, threads: int = 1) -> list:
+    """
+    Compress arrays in blocks
+
+    :param arrays: list of native arrays
+    :param level: zlib compression level
+    :param threads: number of threads compressing blocks
+    :return: list of [header, block 1, block 2, ...] of each array
+    """
+    buffers = [memoryview(array).cast('B') for array in arrays]
+    jobs = [(i, buffer[start:start + BLOCK_SIZE])
+            for (i, buffer) in enumerate(buffers) for start in range(0, buffer.nbytes, BLOCK_SIZE)]
+
+    def run(job):
+        return zlib.compress(job[1], level)
+
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            compressed = list(executor.map(run, jobs))
+    else:
+        compressed = [run(job) for job in jobs]
+
+    blocks = [[] for _ in arrays]
+    for (job, data) in zip(jobs, compressed):
+        blocks[job[0]].append(data)
+
+    result = []
+    for (buffer, array_blocks) in zip(buffers, blocks):
+        # size of the last block is stored only when it is partial
+        header = np.array([len(array_blocks), BLOCK_SIZE, buffer.nbytes % BLOCK_SIZE] +
+                          [len(block) for block in array_blocks], dtype=HEADER_TYPE)
+        result.append([header] + array_blocks)
+
+    return result
@@ -0,0 +1,309 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: xdmf
+   :synopsis: Module providing output to XDMF file format
+.. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
+
+XDMF output is split into light data, an .xmf XML file describing the grids,
+and heavy data, one raw binary (or .npy) file per array. Readers memory map
+only the arrays they need. Every mesh region is one grid of a spatial
+collection, its heavy data files are named:
+    <path>.<i/b>.<region name>.points.<bin/npy>
+    <path>.<i/b>.<region name>.topology.<bin/npy>
+    <path>[.<step>].<i/b>.<region name>.<field name>.<bin/npy>
+    <path>.<step>.<i/b>.<region name>.<field name>.cell.<bin/npy>
+"""
+
+import os
+import sys
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from femsnek.fio.vtk import convert_field_list, region_filename
+from femsnek.mesh.feMesh import FeMesh
+
+
+# Data ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Dictionary [<fem-snek element type>] -> (<XDMF topology type>, <XDMF mixed topology id>, <nodes per element>)
+# fem-snek element type is obtainable from connectivityList object
+xdmfTypes = {
+        1: ('Polyline', 2, 2),
+        3: ('Quadrilateral', 5, 4),
+        2: ('Triangle', 4, 3),
+        0: None
+        }
+
+# Array [<fem-snek element type>] -> <XDMF mixed topology id>, for vectorized lookup
+xdmfCellTypes = np.array([xdmfTypes[i][1] if xdmfTypes[i] is not None else 0 for i in range(len(xdmfTypes))],
+                         dtype=np.int64)
+
+# Dictionary [<numpy dtype kind>] -> <XDMF number type>
+xdmfNumberTypes = {
+        'i': 'Int',
+        'u': 'UInt',
+        'f': 'Float'
+        }
+
+ENDIAN = 'Little' if sys.byteorder == 'little' else 'Big'
+
+
+def write(path: str, femesh: FeMesh, fields_list: list = None, npy: bool = False) -> None:
+    """
+    Exports mesh and scalar fields to <path>.xmf and heavy data files
+
+       :param path: - path to files, without extension
+       :param femesh: - finite element mesh object
+       :param fields_list: - list of fields
+       :param npy: - store heavy data as .npy instead of raw binary files
+    """
+    point_fields = convert_field_list(fields_list) if fields_list is not None else dict()
+
+    grids = [region_grid(path, region, femesh, npy) for region in regions(femesh)]
+    attributes = [write_attributes(path, region, point_fields.get(region), femesh, npy)
+                  for region in regions(femesh)]
+
+    write_light(path, [spatial_collection(grids, attributes)])
+
+
+class TimeSeries:
+    """
+    Writer of transient results to XDMF.
+
+    Points and topology of every region are written once, at construction,
+    and are referenced by all steps. Every call of :meth:`write` stores only
+    the nodal and element values of the step and rewrites <path>.xmf with a
+    temporal collection of all written steps, ParaView opens it as one time
+    series. Steps can be written in the background by
+    :meth:`femsnek.fio.vtk.AsyncWriter.write_series`.
+    """
+
+    __slots__ = (
+            '_path',
+            '_femesh',
+            '_grids',
+            '_steps',
+            '_npy'
+            )
+
+    def __init__(self, path: str, femesh: FeMesh, npy: bool = False):
+        """
+        Creates instance of TimeSeries writer
+
+           :param path: - path to files, without extension
+           :param femesh: - finite element mesh object
+           :param npy: - store heavy data as .npy instead of raw binary files
+        """
+        self._path = path
+        self._femesh = femesh
+        self._npy = npy
+        self._grids = [region_grid(path, region, femesh, npy) for region in regions(femesh)]
+        self._steps = []
+
+    def write(self, time: float, fields_list: list = None, cell_fields: dict = None) -> None:
+        """
+        Writes one time step
+
+           :param time: - time of the step
+           :param fields_list: - list of fields
+           :param cell_fields: - dict [region] -> dict [name] -> element values in order of packed connectivity
+        """
+        self.write_point_fields(time, convert_field_list(fields_list) if fields_list is not None else dict(),
+                                cell_fields)
+
+    def write_point_fields(self, time: float, point_fields: dict, cell_fields: dict = None) -> None:
+        """
+        Writes one time step of nodal values already converted by :func:`convert_field_list`
+
+           :param time: - time of the step
+           :param point_fields: - dict [region] -> dict [field name] -> nodal values
+           :param cell_fields: - dict [region] -> dict [name] -> element values, or None
+        """
+        if cell_fields is None:
+            cell_fields = dict()
+        step_path = self._path + '.' + str(len(self._steps))
+
+        attributes = [write_attributes(step_path, region, point_fields.get(region), self._femesh, self._npy) +
+                      write_attributes(step_path, region, cell_fields.get(region), self._femesh, self._npy, 'Cell')
+                      for region in regions(self._femesh)]
+        self._steps.append(spatial_collection(self._grids, attributes, time))
+
+        write_light(self._path, ['<Grid Name="series" GridType="Collection" CollectionType="Temporal">\n'] +
+                    self._steps + ['</Grid>\n'])
+
+
+def regions(femesh: FeMesh) -> list:
+    """
+    List all regions of mesh, internal regions first
+
+       :param femesh: - finite element mesh object
+       :return: list of region tuples
+    """
+    return [('i', i) for i in range(len(femesh._internalMesh))] + \
+           [('b', i) for i in range(len(femesh._boundaryMesh))]
+
+
+def region_grid(path: str, region: (str, int), femesh: FeMesh, npy: bool = False) -> (str, str):
+    """
+    Writes heavy data of region geometry
+
+    Regions of one element type get topology of that type, connectivity is
+    written as is. Other regions get mixed topology, every element is preceded
+    by its XDMF type id (and number of nodes for polylines).
+
+       :param path: - path to files, without extension
+       :param region: - region tuple
+       :param femesh: - finite element mesh object
+       :param npy: - store heavy data as .npy instead of raw binary files
+       :return: opening tag and geometry XML of the grid
+    """
+    mesh = femesh[region]
+    packed = mesh.packed()
+    points = femesh._nodes.T[mesh._node_tags]
+    filename = region_filename(path, region, femesh)
+
+    types = np.unique(np.asarray(packed.types()))
+    if types.shape[0] == 1:
+        (name, _, nodes_per_element) = xdmfTypes[int(types[0])]
+        connectivity = np.asarray(packed.connectivity()).reshape(-1, nodes_per_element)
+        topology = '<Topology TopologyType="%s" NumberOfElements="%d" NodesPerElement="%d">\n' % \
+                   (name, packed.n_elements(), nodes_per_element)
+    else:
+        connectivity = mixed_topology(packed.connectivity(), packed.offsets(), packed.types())
+        topology = '<Topology TopologyType="Mixed" NumberOfElements="%d">\n' % packed.n_elements()
+
+    return ('<Grid Name=%s GridType="Uniform">\n' % quoteattr(region[0] + '.' + str(mesh.id())),
+            topology +
+            data_item(save(filename + '.topology', connectivity, npy), connectivity) +
+            '</Topology>\n'
+            '<Geometry GeometryType="XYZ">\n' +
+            data_item(save(filename + '.points', points, npy), points) +
+            '</Geometry>\n')
+
+
+def mixed_topology(connectivity: np.ndarray, offsets: np.ndarray, types: np.ndarray) -> np.ndarray:
+    """
+    Builds XDMF mixed topology array from packed connectivity
+
+       :param connectivity: - node tags of all elements, element after element
+       :param offsets: - start of each element in connectivity, nElem + 1 entries
+       :param types: - fem-snek element type of each element
+       :return: mixed topology array
+    """
+    lines = np.flatnonzero(types == 1)
+    prefix = np.ones(types.shape[0], dtype=np.int64)
+    prefix[lines] = 2
+
+    counts = np.diff(offsets) + prefix
+    starts = np.zeros(types.shape[0], dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
+
+    topology = np.empty(counts.sum(), dtype=np.int64)
+    is_node = np.ones(topology.shape[0], dtype=bool)
+    is_node[starts] = False
+    is_node[starts[lines] + 1] = False
+
+    topology[starts] = xdmfCellTypes[types]
+    topology[starts[lines] + 1] = 2
+    topology[is_node] = connectivity
+    return topology
+
+
+def write_attributes(path: str, region: (str, int), fields: dict, femesh: FeMesh, npy: bool = False,
+                     center: str = 'Node') -> str:
+    """
+    Writes heavy data of nodal or element values of region
+
+       :param path: - path to files, without extension
+       :param region: - region tuple
+       :param fields: - dict [field name] -> nodal or element values, or None
+       :param femesh: - finite element mesh object
+       :param npy: - store heavy data as .npy instead of raw binary files
+       :param center: - 'Node' or 'Cell'
+       :return: attributes XML of the grid
+    """
+    if fields is None:
+        return ''
+
+    # element values get own files, fields of the same name may be given at nodes too
+    filename = region_filename(path, region, femesh)
+    suffix = '.cell' if center == 'Cell' else ''
+    return ''.join('<Attribute Name=%s AttributeType="%s" Center="%s">\n' %
+                   (quoteattr(name), 'Vector' if values.ndim == 2 else 'Scalar', center) +
+                   data_item(save(filename + '.' + name + suffix, values, npy), values) +
+                   '</Attribute>\n'
+                   for (name, values) in fields.items())
+
+
+def spatial_collection(grids: list, attributes: list, time: float = None) -> str:
+    """
+    Builds XML of spatial collection of region grids
+
+       :param grids: - list of :func:`region_grid` results
+       :param attributes: - list of :func:`write_attributes` results
+       :param time: - time of the collection, or None
+       :return: XML of the collection
+    """
+    return ('<Grid Name="mesh" GridType="Collection" CollectionType="Spatial">\n' +
+            ('<Time Value="%r"/>\n' % float(time) if time is not None else '') +
+            ''.join(grid[0] + grid[1] + attribute + '</Grid>\n' for (grid, attribute) in zip(grids, attributes)) +
+            '</Grid>\n')
+
+
+def write_light(path: str, grids: list) -> None:
+    """
+    Writes <path>.xmf file
+
+       :param path: - path to files, without extension
+       :param grids: - list of XML of the top level grids
+    """
+    with open(path + '.xmf', 'w') as file:
+        file.write('<?xml version="1.0"?>\n'
+                   '<Xdmf Version="3.0">\n'
+                   '<Domain>\n')
+        file.writelines(grids)
+        file.write('</Domain>\n'
+                   '</Xdmf>\n')
+
+
+def save(filename: str, values: np.ndarray, npy: bool = False) -> (str, int):
+    """
+    Writes heavy data file
+
+       :param filename: - path to file, without extension
+       :param values: - array
+       :param npy: - write .npy instead of raw binary file
+       :return: name of the file relative to the .xmf file, offset of data in the file
+    """
+    values = np.ascontiguousarray(values)
+    if npy:
+        filename += '.npy'
+        np.save(filename, values)
+    else:
+        filename += '.bin'
+        values.tofile(filename)
+
+    return os.path.basename(filename), os.path.getsize(filename) - values.nbytes
+
+
+def data_item(location: (str, int), values: np.ndarray) -> str:
+    """
+    Builds XML of binary data item
+
+       :param location: - file name and offset returned by :func:`save`
+       :param values: - array stored in the file, only its shape and type are used
+       :return: XML of the data item
+    """
+    return '<DataItem Dimensions="%s" NumberType="%s" Precision="%d" Format="Binary" Endian="%s" Seek="%d">' \
+           '%s</DataItem>\n' % (' '.join(str(i) for i in values.shape), xdmfNumberTypes[values.dtype.kind],
+                                values.dtype.itemsize, ENDIAN, location[1], escape(location[0]))
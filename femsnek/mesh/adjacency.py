@@ -0,0 +1,152 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: adjacency
+   :synopsis: Vectorized builders of mesh adjacency structures
+.. moduleauthor:: Wojciech Sadowski <github.com/szynka12>
+
+Adjacency is stored in CSR form, a pair of arrays `(offsets, indices)`:
+neighbours of item `i` are `indices[offsets[i]:offsets[i + 1]]`, sorted.
+Elements are numbered through all connectivity lists of a mesh in order.
+"""
+
+import numpy as np
+from femsnek.core.elements import PackedConnectivity
+
+
+def csr(rows: np.ndarray, cols: np.ndarray, n_rows: int) -> (np.ndarray, np.ndarray):
+    """
+    Build CSR structure from pairs of (row, column) indices
+
+    :param rows: row of each entry
+    :param cols: column of each entry
+    :param n_rows: number of rows
+    :return: offsets, column indices sorted within rows
+    """
+    order = np.lexsort((cols, rows))
+    offsets = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=offsets[1:])
+    return offsets, cols[order]
+
+
+def node_to_elements(packed: PackedConnectivity, n_nodes: int) -> (np.ndarray, np.ndarray):
+    """
+    Build node to element adjacency
+
+    :param packed: packed connectivity with local node tags
+    :param n_nodes: number of nodes
+    :return: offsets, element indices
+    """
+    elems = np.repeat(np.arange(packed.n_elements()), np.diff(packed.offsets()))
+
+    return csr(packed.connectivity(), elems, n_nodes)
+
+
+def element_to_elements(lists: tuple, n_nodes: int) -> (np.ndarray, np.ndarray):
+    """
+    Build element to element adjacency, elements are neighbours when they share a facet
+
+    Facets are edges for 2D elements and end points for lines. Every facet is
+    turned into integer key, elements with equal keys are paired after one sort.
+
+    :param lists: connectivity lists with local node tags, all of one dimension
+    :param n_nodes: number of nodes
+    :return: offsets, element indices
+    """
+    keys = []
+    elems = []
+    first = 0
+    for con_list in lists:
+        n_el = con_list.n_elements()
+        # packed tags are int32, keys need 64 bits
+        facets = con_list.facets().astype(np.int64)
+
+        # facets have at most two nodes in 1D and 2D meshes, key does not depend on their order
+        low = np.minimum(facets[:, :, 0], facets[:, :, -1])
+        high = np.maximum(facets[:, :, 0], facets[:, :, -1])
+        keys.append((low * n_nodes + high).ravel())
+        elems.append(np.repeat(np.arange(first, first + n_el), facets.shape[1]))
+        first += n_el
+
+    keys = np.concatenate(keys + [np.empty(0, dtype=np.int64)])
+    elems = np.concatenate(elems + [np.empty(0, dtype=np.int64)])
+
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    elems = elems[order]
+
+    # pair every facet with the following ones of the same key (more than two only at junctions)
+    rows = []
+    cols = []
+    shift = 1
+    while shift < keys.shape[0]:
+        same = np.flatnonzero(keys[shift:] == keys[:-shift])
+        if same.shape[0] == 0:
+            break
+        rows.append(elems[same])
+        cols.append(elems[same + shift])
+        shift += 1
+
+    rows = np.concatenate(rows + [np.empty(0, dtype=np.int64)])
+    cols = np.concatenate(cols + [np.empty(0, dtype=np.int64)])
+
+    # symmetric pairs without duplicates (elements sharing more than one facet)
+    pairs = np.sort(np.concatenate((rows * first + cols, cols * first + rows)))
+    pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))[:pairs.shape[0]]]
+
+    return csr(pairs // first, pairs % first, first)
+
+
+def element_colors(packed: PackedConnectivity, n_nodes: int, seed: int = 0) -> (np.ndarray, np.ndarray):
+    """
+    Color elements so that elements of one color share no node
+
+    Every color is built as a maximal independent set in rounds: an element
+    is taken when its random priority is the highest among remaining elements
+    at all of its nodes, its nodes are then blocked for the rest of the color.
+    Priorities come from a seeded permutation, coloring is reproducible.
+
+    :param packed: packed connectivity with local node tags
+    :param n_nodes: number of nodes
+    :param seed: seed of element priorities
+    :return: offsets, element indices (elements of color `c` are `indices[offsets[c]:offsets[c + 1]]`, sorted)
+    """
+    n_elem = packed.n_elements()
+    connectivity = packed.connectivity()
+    counts = np.diff(packed.offsets())
+    elems = np.repeat(np.arange(n_elem), counts)
+    priority = np.random.default_rng(seed).permutation(n_elem) + 1
+
+    colors = np.full(n_elem, -1, dtype=np.int64)
+    remaining = np.ones(n_elem, dtype=bool)
+    color = 0
+    while np.any(remaining):
+        blocked = np.zeros(n_nodes, dtype=bool)
+        candidates = remaining.copy()
+        while np.any(candidates):
+            # highest priority of candidates at every node
+            entry_priority = np.where(candidates[elems], priority[elems], 0)
+            best = np.zeros(n_nodes, dtype=priority.dtype)
+            np.maximum.at(best, connectivity, entry_priority)
+
+            wins = np.logical_and.reduceat(entry_priority == best[connectivity], packed.offsets()[:-1])
+            taken = candidates & wins
+
+            colors[taken] = color
+            remaining[taken] = False
+            blocked[connectivity[taken[elems]]] = True
+            candidates &= remaining
+            candidates &= ~np.logical_or.reduceat(blocked[connectivity], packed.offsets()[:-1])
+        color += 1
+
+    offsets = np.zeros(color + 1, dtype=np.int64)
+    np.cumsum(np.bincount(colors, minlength=color), out=offsets[1:])
+    return offsets, np.argsort(colors, kind='stable')
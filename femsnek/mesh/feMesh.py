@@ -14,8 +14,12 @@ IGNORE: -----------------------------------------------------------
 .. moduleauthor:: Wojciech Sadowski <github.com/szynka12>
 """
 
-from numpy import unique, int64, empty, append, ndarray, array
+from numpy import int64, ndarray, array, empty, full, arange, asarray, unique, concatenate
+from femsnek.core.assembly import SparsityPattern
+from femsnek.core.elements import PackedConnectivity
 from femsnek.fio.error import MeshError
+import femsnek.mesh.adjacency as adjacency
+import femsnek.mesh.partition as partition
 
 
 class Mesh:
@@ -25,42 +29,105 @@ class Mesh:
     Attributes:
 
         - `_connectivityLists: list<femsnek.core.elements.connectivityList>` - list of connectivity lists
+        - `_packed: femsnek.core.elements.PackedConnectivity` - all elements packed, `_tags` of the lists view it
         - `_id` - mesh id
-        - `_node_tags` - nodes that are mentioned in _connectivityLists
+        - `_node_tags` - nodes that are mentioned in _connectivityLists, sorted (local to global map)
+        - `_global2local` - global to local node map, -1 for nodes outside the mesh (built on first use)
+        - `_node2elements` - node to element adjacency in CSR form (built on first use)
+        - `_element2elements` - element to element adjacency in CSR form (built on first use)
+        - `_sparsity` - sparsity pattern of global matrices (built on first use)
+        - `_colors` - element coloring in CSR form, no shared nodes within a color (built on first use)
     """
 
     __slots__ = (
             '_connectivityLists',
+            '_packed',
             '_id',
-            '_node_tags'
+            '_node_tags',
+            '_global2local',
+            '_node2elements',
+            '_element2elements',
+            '_sparsity',
+            '_colors'
             )
 
     def __init__(self, lists: list, mesh_id: int):
         """
         Constructs instance of Mesh class.
 
+        Node tags of the lists are renumbered to local numbering while they are
+        packed, `_tags` of the lists become views of the packed connectivity.
+
         :param lists: list of elements connectivity lists
         :param mesh_id: physical id of the mesh
         """
 
         self._id = mesh_id
-        self._node_tags = empty((1, 0), dtype=int64)
-        for i in range(len(lists)):
-            self._node_tags = append(self._node_tags, lists[i]._tags[:])
-
-        self._node_tags = unique(self._node_tags)
 
-        translator = dict()
-        for i in range(self._node_tags.shape[0]):
-            translator[self._node_tags[i]] = i
+        # sorted used global nodes and local tag of every packed entry, cost depends only on region size
+        self._node_tags, local = unique(concatenate([con_list._tags.T.ravel() for con_list in lists] +
+                                                    [empty(0, dtype=int64)]), return_inverse=True)
 
-        for i in range(len(lists)):
-            for j in range(lists[i].n_elements()):
-                for k in range(lists[i].n_nodes()):
-                    lists[i]._tags[k, j] = translator[lists[i]._tags[k, j]]
+        self._packed = PackedConnectivity.pack(lists, local.ravel())
 
+        # dense map spans all global nodes, it is kept only when asked for
+        self._global2local = None
+        self._node2elements = None
+        self._element2elements = None
+        self._sparsity = None
+        self._colors = None
         self._connectivityLists = tuple(lists)
 
+    @classmethod
+    def from_local(cls, lists: list, mesh_id: int, node_tags: ndarray, packed: PackedConnectivity = None):
+        """
+        Constructs instance of Mesh class from lists that already use local node numbering.
+
+        :param lists: list of elements connectivity lists with local node tags
+        :param mesh_id: physical id of the mesh
+        :param node_tags: global tags of local nodes
+        :param packed: (optional) packed connectivity viewed by the lists, lists are packed when omitted
+        """
+        mesh = cls.__new__(cls)
+        mesh._packed = packed if packed is not None else PackedConnectivity.pack(lists)
+        mesh._id = mesh_id
+        mesh._node_tags = node_tags
+        mesh._global2local = None
+        mesh._node2elements = None
+        mesh._element2elements = None
+        mesh._sparsity = None
+        mesh._colors = None
+        mesh._connectivityLists = tuple(lists)
+        return mesh
+
+    def local2global(self) -> ndarray:
+        """
+        Get global tags of local nodes
+
+        :return: array with global node tag of every local node
+        """
+        return self._node_tags
+
+    def global2local(self, tags: ndarray = None) -> ndarray:
+        """
+        Get local tags of global nodes
+
+        :param tags: (optional) global node tags, whole map is returned when omitted
+        :return: local node tags, -1 for nodes that are not part of the mesh
+        """
+        if self._global2local is None:
+            size = self._node_tags[-1] + 1 if self._node_tags.shape[0] else 0
+            self._global2local = full(size, -1, dtype=int64)
+            self._global2local[self._node_tags] = arange(self._node_tags.shape[0])
+
+        if tags is None:
+            return self._global2local
+
+        tags = asarray(tags)
+        local = full(tags.shape, -1, dtype=int64)
+        inside = (tags >= 0) & (tags < self._global2local.shape[0])
+        local[inside] = self._global2local[tags[inside]]
+        return local
 
     def n_nodes(self) -> int:
         """
@@ -70,6 +137,75 @@ class Mesh:
         """
         return self._node_tags.shape[0]
 
+    def n_elements(self) -> int:
+        """
+        Get number of elements in the mesh
+
+        :return: Number of elements in all connectivity lists
+        """
+        return self._packed.n_elements()
+
+    def packed(self) -> PackedConnectivity:
+        """
+        Get connectivity of all elements packed into flat arrays
+
+        :return: packed connectivity, shared by all users of the mesh
+        """
+        return self._packed
+
+    def node2elements(self) -> (ndarray, ndarray):
+        """
+        Get node to element adjacency in CSR form, built on first use.
+
+        Elements are numbered through all connectivity lists in order, elements
+        of local node `i` are `indices[offsets[i]:offsets[i + 1]]`.
+
+        :return: offsets, element indices
+        """
+        if self._node2elements is None:
+            self._node2elements = adjacency.node_to_elements(self._packed, self.n_nodes())
+        return self._node2elements
+
+    def element2elements(self) -> (ndarray, ndarray):
+        """
+        Get element to element adjacency in CSR form, built on first use.
+
+        Elements are neighbours when they share a facet (edge of 2D element,
+        end point of line), numbering as in :meth:`node2elements`.
+
+        :return: offsets, element indices
+        """
+        if self._element2elements is None:
+            self._element2elements = adjacency.element_to_elements(self._connectivityLists, self.n_nodes())
+        return self._element2elements
+
+    def sparsity(self) -> SparsityPattern:
+        """
+        Get sparsity pattern of global matrices, built on first use.
+
+        Element matrices of the connectivity lists (in order of the lists) are
+        assembled by :meth:`femsnek.core.assembly.SparsityPattern.assemble`.
+
+        :return: sparsity pattern shared by all users of the mesh
+        """
+        if self._sparsity is None:
+            self._sparsity = SparsityPattern(self._connectivityLists, self.n_nodes())
+        return self._sparsity
+
+    def colors(self) -> (ndarray, ndarray):
+        """
+        Get element coloring in CSR form, built on first use.
+
+        Elements of one color share no node, their entries of global matrices
+        can be added concurrently. Elements of color `c` are
+        `indices[offsets[c]:offsets[c + 1]]`, numbering as in :meth:`node2elements`.
+
+        :return: offsets, element indices
+        """
+        if self._colors is None:
+            self._colors = adjacency.element_colors(self._packed, self.n_nodes())
+        return self._colors
+
     def id(self) -> str:
         """
         Get mesh id
@@ -90,6 +226,8 @@ class FeMesh:
         - `_nodes: np_array` - table with node coordinates, its shape is equal to (3,nNodes)
         - `_internalMesh: touple<femsnek.feMesh.mesh>` - internal mesh objects
         - `_boundar mesh: touple<femsnek.feMesh.mesh>` - boundary mesh objects
+        - `_regionIndex: dict` - physical name/id -> region tuple
+        - `_meshIndex: dict` - region tuple -> mesh object (reverse index)
 
     Each mesh partition can be described by region double: `('i'/'b', N)`:
     - `'i'` means internal and 'b' boundary
@@ -100,7 +238,9 @@ class FeMesh:
             '_info',
             '_nodes',
             '_internalMesh',
-            '_boundaryMesh'
+            '_boundaryMesh',
+            '_regionIndex',
+            '_meshIndex'
             )
 
     def __init__(self, info: str, nodes: ndarray, element_lists: list, physical_ids: list):
@@ -114,86 +254,94 @@ class FeMesh:
         """
         self._info = info
         self._nodes = nodes
-        self._internalMesh = []
-        self._boundaryMesh = []
 
         # get max dimension of the mesh
         max_dim = max([i.dim() for i in element_lists])
 
-        # extract indices in element lists that correspond to internal mesh
-        internal_index = [i for (i, elist) in enumerate(element_lists) if elist.dim() == max_dim]
-
-        # extract indices in element lists that correspond to boundary mesh
-        boundary_index = [i for (i, elist) in enumerate(element_lists) if elist.dim() < max_dim]
-
-        # extract boundary data
-        b_ids = [physical_ids[i] for i in boundary_index]
-        b_lists = [element_lists[i] for i in boundary_index]
-
-        # sort boundary data
-        while b_ids:
-            same_ids = [i for (i, id) in enumerate(b_ids) if id == b_ids[0]]
+        # group lists by physical id in one pass, dicts keep the order of first appearance
+        internal = {}
+        boundary = {}
+        for (element_list, physical_id) in zip(element_lists, physical_ids):
+            group = internal if element_list.dim() == max_dim else boundary
+            group.setdefault(physical_id, []).append(element_list)
 
-            self._boundaryMesh.append(
-                    Mesh(
-                            [b_lists[i] for i in same_ids],
-                            b_ids[0]
-                            )
-                    )
+        self._internalMesh = tuple(Mesh(lists, mesh_id) for (mesh_id, lists) in internal.items())
+        self._boundaryMesh = tuple(Mesh(lists, mesh_id) for (mesh_id, lists) in boundary.items())
 
-            b_lists = [b_lists[i] for i in range(len(b_lists))
-                       if i not in same_ids]
+        self.index_regions()
 
-            b_ids = list(filter(lambda a: a != b_ids[0], b_ids))
-
-        # extract internal data
-        i_ids = [physical_ids[i] for i in internal_index]
-        i_lists = [element_lists[i] for i in internal_index]
-
-        # sort internal data
-        while i_ids:
-            same_ids = [i for (i, id) in enumerate(i_ids) if id == i_ids[0]]
-            self._internalMesh.append(
-                    Mesh(
-                            [i_lists[i] for i in same_ids],
-                            i_ids[0]
-                            )
-                    )
+    @classmethod
+    def from_regions(cls, info: str, nodes: ndarray, internal_mesh: list, boundary_mesh: list):
+        """
+        Constructs instance of feMesh class from already built mesh regions.
 
-            i_ids = list(filter(lambda a: a != i_ids[0], i_ids))
+        :param info: information about mesh version or original format
+        :param nodes: table with node coordinates, its shape is equal to (3,nNodes)
+        :param internal_mesh: list of internal Mesh objects
+        :param boundary_mesh: list of boundary Mesh objects
+        """
+        femesh = cls.__new__(cls)
+        femesh._info = info
+        femesh._nodes = nodes
+        femesh._internalMesh = tuple(internal_mesh)
+        femesh._boundaryMesh = tuple(boundary_mesh)
+        femesh.index_regions()
+        return femesh
+
+    def index_regions(self) -> None:
+        """
+        Build lookup indices of mesh regions.
 
-        # convert to tuple
-        self._internalMesh = tuple(self._internalMesh)
-        self._boundaryMesh = tuple(self._boundaryMesh)
+        Boundary regions are indexed after internal ones, so a boundary wins
+        when both have the same name.
+        """
+        self._meshIndex = {}
+        self._regionIndex = {}
+        for (kind, regions) in (('i', self._internalMesh), ('b', self._boundaryMesh)):
+            for (i, mesh) in enumerate(regions):
+                self._meshIndex[(kind, i)] = mesh
+                self._regionIndex[mesh.id()] = (kind, i)
 
     # Importers ----------------------------------------------------------------------------
     @classmethod
-    def from_gmsh(cls, path_to_file: str):
+    def from_gmsh(cls, path_to_file: str, cache: bool = False, cache_dir: str = None, content_hash: bool = False):
         """
-                Importer of ascii .msh meshes.
+                Importer of .msh meshes.
 
                 Imports meshes generated in Gmsh software.
-                Supported version: MSH 4.1
+                Supported version: MSH 4.1 (ascii and binary)
                 Supported elements:
                     - Line (2 node)
                     - Triangle (3 node)
                     - Quadrangle (4 node)
+
+                With `cache` enabled the finished mesh is stored in `cache_dir`
+                (directory of the .msh file by default) and later imports of the
+                unchanged file (same path, size and modification time, or same
+                content with `content_hash`) load it memory mapped, see
+                :mod:`femsnek.fio.cache`.
+
+                :param path_to_file: path to .msh file
+                :param cache: use on-disk mesh cache
+                :param cache_dir: directory with cached meshes
+                :param content_hash: key cache entries by file content, reads the whole file
             """
         import femsnek.fio.gmsh as gmsh
 
-        # dict that will be passed to any reader
-        data = {}
+        if cache:
+            import femsnek.fio.cache as mesh_cache
+            entry = mesh_cache.entry_path(path_to_file, cache_dir, content_hash)
+            if mesh_cache.exists(entry):
+                return mesh_cache.load(entry)
+
+        data = gmsh.read(path_to_file)
 
-        with open(path_to_file) as file:
-            while True:
-                section_name = file.readline()
-                if len(section_name) == 0:
-                    break
+        femesh = cls(data['version'], array(data['nodes']), data['element_lists'], data['id_list'])
 
-                reader = gmsh.get_section_reader(section_name)
-                reader(file, data)
+        if cache:
+            mesh_cache.save(femesh, entry)
 
-        return cls(data['version'], array(data['nodes']), data['element_lists'], data['id_list'])
+        return femesh
 
     # Getters --------------------------------------------------------------------
     def n_nodes(self, region: (str, int) = ('', -1)) -> int:
@@ -203,12 +351,47 @@ class FeMesh:
         :return: Number of nodes in the mesh
         """
         if region != ('', -1):
-            if region[0] is 'i':
-                return self._internalMesh[region[1]].n_nodes()
-            else:
-                return self._boundaryMesh[region[1]].n_nodes()
+            return self[region].n_nodes()
         return self._nodes.shape[1]
 
+    def coordinates(self, region: (str, int)) -> ndarray:
+        """
+        Get coordinates of region nodes, indexed by local node tags of the region
+
+        :param region: region tuple
+        :return: array with shape `(3, nNodes)`
+        """
+        return self._nodes[:, self[region]._node_tags]
+
+    def node_map(self, source: (str, int), target: (str, int)) -> ndarray:
+        """
+        Get local tags in target region of the nodes of source region, e.g. internal nodes of a boundary
+
+        :param source: region tuple of mapped nodes
+        :param target: region tuple containing all nodes of source
+        :return: array with target local tag of every source local node
+        """
+        local = self[target].global2local(self[source].local2global())
+        if local.shape[0] and local.min() < 0:
+            raise MeshError('Nodes of region <' + str(self[source].id()) + '> are not part of region <' +
+                            str(self[target].id()) + '>!')
+        return local
+
+    def partition(self, region: (str, int), n_parts: int) -> (ndarray, ndarray):
+        """
+        Partition elements of region into compact parts of equal size (recursive coordinate bisection
+        of element centroids)
+
+        The partition is not cached, keep it to reuse it across assemblies.
+
+        :param region: region tuple
+        :param n_parts: number of parts
+        :return: offsets, element indices (elements of part `p` are `indices[offsets[p]:offsets[p + 1]]`)
+        """
+        mesh = self[region]
+        points = partition.centroids(mesh.packed(), self.coordinates(region))
+        return partition.parts_csr(partition.rcb(points, n_parts), n_parts)
+
     def name2region(self, name: str) -> (str, int):
         """
         Returns region touple of mesh, given its name.
@@ -216,15 +399,19 @@ class FeMesh:
         :param name: name of the boundary mesh e.g. 'wall'
         :return: region touple of chosen mesh
         """
-        for i in range(len(self._boundaryMesh)):
-            if name == self._boundaryMesh[i].id():
-                return 'b', i
-        else:
-            for i in range(len(self._internalMesh)):
-                if name == self._internalMesh[i].id():
-                    return 'i', i
-            else:
-                raise MeshError('No boundary named <' + name + '> found!')
+        try:
+            return self._regionIndex[name]
+        except (KeyError, TypeError):
+            raise MeshError('No boundary named <' + str(name) + '> found!')
+
+    def region2name(self, region: (str, int)):
+        """
+        Returns name of the mesh, given its region tuple.
+
+        :param region: region tuple
+        :return: name (physical id) of chosen mesh
+        """
+        return self[region].id()
 
     def mesh_by_region(self, region: (str, int)) -> Mesh:
         """
@@ -233,6 +420,12 @@ class FeMesh:
         :param region: region tuple
         :return: internal or boundary mesh
         """
+        try:
+            return self._meshIndex[region]
+        except (KeyError, TypeError):
+            pass
+
+        # not indexed (negative index, list instead of tuple) or invalid
         if region[0] == "i":
             try:
                 return self._internalMesh[region[1]]
@@ -268,8 +461,14 @@ class FeMesh:
     # Operators --------------------------------------------------------------------
 
     def __getitem__(self, region: (str, int)):
-        return self.mesh_by_region(region)
+        try:
+            return self._meshIndex[region]
+        except (KeyError, TypeError):
+            return self.mesh_by_region(region)
 
     def __call__(self, name: str):
-        return self.name2region(name)
+        try:
+            return self._regionIndex[name]
+        except (KeyError, TypeError):
+            return self.name2region(name)
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -0,0 +1,83 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: partition
+   :synopsis: Partitioning of mesh elements into compact parts
+.. moduleauthor:: Wojciech Sadowski <github.com/szynka12>
+
+Partitions are stored in CSR form like adjacency, a pair of arrays
+`(offsets, indices)`: elements of part `p` are `indices[offsets[p]:offsets[p + 1]]`,
+sorted. Elements are numbered through all connectivity lists of a mesh in order.
+"""
+
+import numpy as np
+from femsnek.core.elements import PackedConnectivity
+
+
+def centroids(packed: PackedConnectivity, coordinates: np.ndarray) -> np.ndarray:
+    """
+    Compute centroids of elements, mean of element nodes
+
+    :param packed: packed connectivity with local node tags
+    :param coordinates: node coordinates (3, nNodes) indexed by local tags
+    :return: centroids (nElem, 3)
+    """
+    sums = np.add.reduceat(coordinates.T[packed.connectivity()], packed.offsets()[:-1], axis=0) \
+        if packed.n_elements() else np.empty((0, 3))
+    return sums / np.diff(packed.offsets())[:, None]
+
+
+def rcb(points: np.ndarray, n_parts: int) -> np.ndarray:
+    """
+    Recursive coordinate bisection
+
+    Points are split across the longest extent of their bounding box, sizes
+    of the halves are proportional to the number of parts they receive, so
+    parts differ by at most one point.
+
+    :param points: point coordinates (nPoints, 3)
+    :param n_parts: number of parts
+    :return: part of every point (nPoints,)
+    """
+    parts = np.empty(points.shape[0], dtype=np.int64)
+
+    # (indices of points, first part, number of parts)
+    stack = [(np.arange(points.shape[0]), 0, n_parts)]
+    while stack:
+        (indices, first, count) = stack.pop()
+        if count == 1:
+            parts[indices] = first
+            continue
+
+        left = count // 2
+        split = (indices.shape[0] * left) // count
+        box = points[indices]
+        axis = np.argmax(box.max(axis=0) - box.min(axis=0)) if indices.shape[0] else 0
+        order = np.argpartition(box[:, axis], split) if 0 < split < indices.shape[0] else \
+            np.arange(indices.shape[0])
+
+        stack.append((indices[order[:split]], first, left))
+        stack.append((indices[order[split:]], first + left, count - left))
+
+    return parts
+
+
+def parts_csr(parts: np.ndarray, n_parts: int) -> (np.ndarray, np.ndarray):
+    """
+    Convert part of every element to CSR form
+
+    :param parts: part of every element
+    :param n_parts: number of parts
+    :return: offsets, element indices
+    """
+    offsets = np.zeros(n_parts + 1, dtype=np.int64)
+    np.cumsum(np.bincount(parts, minlength=n_parts), out=offsets[1:])
+    return offsets, np.argsort(parts, kind='stable')
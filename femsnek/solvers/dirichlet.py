@@ -0,0 +1,239 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: dirichlet
+   :synopsis: Dirichlet boundary conditions of assembled systems
+.. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
+
+Boundary regions number their nodes locally. A condition maps them once to
+local nodes (DOFs) of the internal region with :meth:`FeMesh.node_map` and
+applies prescribed values to CSR matrices and right hand sides with masks
+over the `data` array, without loops over nodes:
+    rows        constrained rows are zeroed, diagonal set to one
+    symmetric   constrained columns are zeroed too, their contribution is
+                moved to the right hand side (lift), the matrix stays symmetric
+
+Positions of constrained entries are cached for the matrix structure, so
+matrices reassembled in place (:meth:`SparsityPattern.assemble` with `out`)
+are constrained again without searching.
+
+Example:
+    walls = DirichletBC.merge([DirichletBC(femesh, femesh('inlet'), 1.),
+                               DirichletBC(femesh, femesh('wall'), 0.)])
+    walls.apply(matrix, rhs)
+    for step in range(n_steps):
+        x = solver.solve(walls.apply_vector(mass @ x))
+"""
+
+import numpy as np
+import scipy.sparse as sparse
+
+from femsnek.fields.scalar import ScalarField
+from femsnek.fio.error import FieldOperationError, SolverError
+
+
+class DirichletBC:
+    """
+    Prescribed values of DOFs of an internal region.
+
+    Attributes:
+
+        -`_region: (str, int)` - internal region tuple, DOFs are its local nodes
+        -`_dofs: nparray` - constrained DOFs, sorted and unique
+        -`_values: nparray` - prescribed value of every constrained DOF
+        -`_symmetric: bool` - columns are eliminated in the last applied matrix
+        -`_lift: nparray` - product of the last applied matrix and prescribed values (nDofs,)
+        -`_structure: nparray` - column indices of matrix the positions were found for
+        -`_positions: tuple` - positions in `data` of (row entries, column entries, diagonal entries)
+    """
+    __slots__ = (
+                '_region',
+                '_dofs',
+                '_values',
+                '_symmetric',
+                '_lift',
+                '_structure',
+                '_positions'
+                )
+
+    def __init__(self, femesh, boundary: (str, int), value, region: (str, int) = ('i', 0)):
+        """
+        Creates Dirichlet condition on boundary region
+
+        :param femesh: finite element mesh
+        :param boundary: region tuple of constrained nodes, e.g. femesh('wall')
+        :param value: scalar, values of boundary nodes or ScalarField on boundary or internal region
+        :param region: internal region tuple
+        """
+        dofs = femesh.node_map(boundary, region)
+
+        if isinstance(value, ScalarField):
+            if value.region() == boundary:
+                value = value.nodal()
+            elif value.region() == region:
+                value = value.nodal()[dofs]
+            else:
+                raise FieldOperationError('Field <' + value.name() + '> is not defined on boundary or internal '
+                                          'region!')
+
+        values = np.broadcast_to(np.asarray(value, dtype=np.float64), dofs.shape)
+        self.set(region, dofs, values)
+
+    @classmethod
+    def by_region_name(cls, femesh, boundary_name: str, value, region: (str, int) = ('i', 0)):
+        """
+        Creates Dirichlet condition on boundary region given by its physical name
+
+        :param femesh: finite element mesh
+        :param boundary_name: name of the boundary region
+        :param value: scalar, values of boundary nodes or ScalarField on boundary or internal region
+        :param region: internal region tuple
+        """
+        return cls(femesh, femesh(boundary_name), value, region)
+
+    @classmethod
+    def from_dofs(cls, region: (str, int), dofs: np.ndarray, values):
+        """
+        Creates Dirichlet condition of given DOFs
+
+        :param region: internal region tuple
+        :param dofs: local node tags of the internal region
+        :param values: scalar or value of every DOF
+        """
+        condition = cls.__new__(cls)
+        dofs = np.asarray(dofs, dtype=np.int64)
+        condition.set(region, dofs, np.broadcast_to(np.asarray(values, dtype=np.float64), dofs.shape))
+        return condition
+
+    @classmethod
+    def merge(cls, conditions: list):
+        """
+        Merges conditions of one region into single condition, later conditions win on shared DOFs
+
+        :param conditions: list of DirichletBC objects
+        :return: DirichletBC object
+        """
+        region = conditions[0].region()
+        if any(condition.region() != region for condition in conditions):
+            raise SolverError('Merged Dirichlet conditions belong to different regions!')
+        return cls.from_dofs(region, np.concatenate([condition.dofs() for condition in conditions]),
+                             np.concatenate([condition.values() for condition in conditions]))
+
+    def set(self, region: (str, int), dofs: np.ndarray, values: np.ndarray) -> None:
+        """
+        Set constrained DOFs, duplicates keep the last value
+
+        :param region: internal region tuple
+        :param dofs: local node tags of the internal region
+        :param values: value of every DOF
+        """
+        # unique of reversed arrays finds the last occurrence of every DOF
+        self._dofs, last = np.unique(dofs[::-1], return_index=True)
+        self._values = np.ascontiguousarray(values[::-1][last])
+        self._region = region
+        self._symmetric = False
+        self._lift = None
+        self._structure = None
+        self._positions = None
+
+    def region(self) -> (str, int):
+        """
+        Get internal region of the condition.
+
+        :return: region tuple
+        """
+        return self._region
+
+    def dofs(self) -> np.ndarray:
+        """
+        Get constrained DOFs.
+
+        :return: sorted local node tags of the internal region
+        """
+        return self._dofs
+
+    def values(self) -> np.ndarray:
+        """
+        Get prescribed values.
+
+        :return: value of every constrained DOF
+        """
+        return self._values
+
+    def positions(self, matrix: sparse.csr_matrix) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+        Get positions of constrained entries in `data` of CSR matrix, cached for matrix structure
+
+        :param matrix: CSR matrix with sorted indices
+        :return: positions of entries in constrained rows, constrained columns, diagonal of constrained rows
+        """
+        if self._structure is not matrix.indices:
+            constrained = np.zeros(matrix.shape[0], dtype=bool)
+            constrained[self._dofs] = True
+            rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+
+            in_rows = np.flatnonzero(constrained[rows])
+            in_columns = np.flatnonzero(constrained[matrix.indices])
+            diagonal = in_rows[matrix.indices[in_rows] == rows[in_rows]]
+            if diagonal.shape[0] != self._dofs.shape[0]:
+                raise SolverError('Matrix has no diagonal entry in some constrained rows!')
+
+            self._structure = matrix.indices
+            self._positions = (in_rows, in_columns, diagonal)
+        return self._positions
+
+    def apply(self, matrix: sparse.csr_matrix, rhs: np.ndarray = None, symmetric: bool = True) -> None:
+        """
+        Apply condition to matrix and right hand side, in place
+
+        Symmetric elimination stores the lift of prescribed values, right hand
+        sides of the same matrix are then constrained by :meth:`apply_vector`.
+        The lift is taken from the matrix as assembled, conditions sharing DOFs
+        have to be merged before they are applied.
+
+        :param matrix: CSR matrix with sorted indices
+        :param rhs: (optional) right hand side (nDofs,) or block (nDofs, k)
+        :param symmetric: eliminate columns too, rows only otherwise
+        """
+        if not sparse.isspmatrix_csr(matrix):
+            raise SolverError('Dirichlet condition needs CSR matrix!')
+        (in_rows, in_columns, diagonal) = self.positions(matrix)
+
+        self._symmetric = symmetric
+        self._lift = None
+        if symmetric:
+            prescribed = np.zeros(matrix.shape[0])
+            prescribed[self._dofs] = self._values
+            self._lift = matrix @ prescribed
+            matrix.data[in_columns] = 0.
+
+        matrix.data[in_rows] = 0.
+        matrix.data[diagonal] = 1.
+
+        if rhs is not None:
+            self.apply_vector(rhs)
+
+    def apply_vector(self, rhs: np.ndarray) -> np.ndarray:
+        """
+        Apply condition to right hand side of the last applied matrix, in place
+
+        :param rhs: right hand side (nDofs,) or block (nDofs, k)
+        :return: constrained right hand side
+        """
+        if rhs.ndim == 1:
+            if self._symmetric:
+                rhs -= self._lift
+            rhs[self._dofs] = self._values
+        else:
+            if self._symmetric:
+                rhs -= self._lift[:, None]
+            rhs[self._dofs] = self._values[:, None]
+        return rhs
@@ -0,0 +1,472 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+.. module:: linear
+   :synopsis: Solvers of sparse linear systems
+.. moduleauthor:: Wojciech Sadowski <wojciech1sadowski@gmail.com>
+
+Solvers hold an operator (assembled matrix of a mesh region or matrix-free
+operator) and the data derived from it: LU factorization of the direct
+solver, preconditioner of Krylov solvers. The data is built on the first
+solve and reused until :meth:`LinearSolver.update` is called. Matrices
+reassembled in place keep their identity, the solver has to be told about
+the change.
+
+Many right hand sides (load cases) are solved together by
+:meth:`LinearSolver.solve_many`: the direct solver applies one factorization
+to the whole block, conjugate gradients with matrix-free operators iterate
+all columns at once with one operator application per iteration.
+
+Example:
+    solver = DirectSolver(matrix)
+    for step in range(n_steps):
+        x = solver.solve(rhs(x))
+        if step % 200 == 0:
+            mesh.sparsity().assemble(element_matrices(), out=matrix)
+            solver.update()
+
+    displacements = solver.solve_many(load_cases)
+"""
+
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+import scipy.sparse as sparse
+import scipy.sparse.linalg as linalg
+
+from femsnek.fields.scalar import ScalarField
+from femsnek.fio.error import SolverError, FieldOperationError
+
+
+class SolverStats:
+    """
+    Counters and timings of a solver.
+
+    Attributes:
+
+        -`n_solves: int` - number of solved systems (right hand sides)
+        -`n_setups: int` - number of factorizations or preconditioner builds
+        -`iterations: int` - iterations of the last solve (0 for direct solver)
+        -`total_iterations: int` - iterations of all solves
+        -`setup_time: float` - time spent in setups [s]
+        -`solve_time: float` - time spent in solves, without setups [s]
+        -`last_solve_time: float` - time of the last solve [s]
+    """
+    __slots__ = (
+                'n_solves',
+                'n_setups',
+                'iterations',
+                'total_iterations',
+                'setup_time',
+                'solve_time',
+                'last_solve_time'
+                )
+
+    def __init__(self):
+        self.n_solves = 0
+        self.n_setups = 0
+        self.iterations = 0
+        self.total_iterations = 0
+        self.setup_time = 0.
+        self.solve_time = 0.
+        self.last_solve_time = 0.
+
+    def __repr__(self) -> str:
+        return ('SolverStats(solves=%d, setups=%d, iterations=%d, total_iterations=%d, '
+                'setup_time=%.4g, solve_time=%.4g)' %
+                (self.n_solves, self.n_setups, self.iterations, self.total_iterations,
+                 self.setup_time, self.solve_time))
+
+
+class LinearSolver(ABC):
+    """
+    Base class of linear solvers.
+
+    Attributes:
+
+        -`_operator` - system matrix or linear operator
+        -`_ready: bool` - data derived from the operator is up to date
+        -`_stats: SolverStats` - counters and timings
+    """
+    __slots__ = (
+                '_operator',
+                '_ready',
+                '_stats'
+                )
+
+    def __init__(self, operator=None):
+        """
+        Creates instance of solver
+
+        :param operator: (optional) system matrix or linear operator
+        """
+        self._operator = operator
+        self._ready = False
+        self._stats = SolverStats()
+
+    def update(self, operator=None) -> None:
+        """
+        Marks operator as changed, derived data is rebuilt on the next solve
+
+        :param operator: (optional) new operator, the current one changed in place when omitted
+        """
+        if operator is not None:
+            self._operator = operator
+        self._ready = False
+
+    def operator(self):
+        """
+        Get system operator.
+
+        :return: system matrix or linear operator
+        """
+        return self._operator
+
+    def stats(self) -> SolverStats:
+        """
+        Get counters and timings of the solver.
+
+        :return: SolverStats object
+        """
+        return self._stats
+
+    def solve(self, b: np.ndarray, x0: np.ndarray = None) -> np.ndarray:
+        """
+        Solve the system
+
+        :param b: right hand side (n,)
+        :param x0: (optional) initial guess, ignored by direct solvers
+        :return: solution (n,)
+        """
+        self.prepare()
+
+        start = time.perf_counter()
+        x, iterations = self.run(np.asarray(b, dtype=np.float64), x0)
+        self.record(time.perf_counter() - start, 1, iterations)
+        return x
+
+    def solve_many(self, b, x0: np.ndarray = None, names: list = None):
+        """
+        Solve the system for block of right hand sides
+
+        Right hand sides given as scalar fields have to be defined on one
+        region of one mesh, solutions are returned as scalar fields of the
+        same region. Their values are columns of one Fortran ordered block.
+
+        :param b: right hand sides (n, k) or list of k ScalarField objects
+        :param x0: (optional) initial guesses (n, k), ignored by direct solvers
+        :param names: (optional) names of solution fields, 'solution_<rhs name>' by default
+        :return: solutions (n, k) or list of k ScalarField objects
+        """
+        fields = None
+        if isinstance(b, (list, tuple)):
+            fields = b
+            b = field_block(fields)
+        b = np.asfortranarray(b, dtype=np.float64)
+        if b.ndim != 2:
+            raise SolverError('Block of right hand sides has to be 2D array!')
+        if x0 is not None:
+            x0 = np.asfortranarray(x0, dtype=np.float64)
+
+        self.prepare()
+
+        start = time.perf_counter()
+        x, iterations = self.run_many(b, x0)
+        self.record(time.perf_counter() - start, b.shape[1], iterations)
+        x = np.asfortranarray(x)
+
+        if fields is None:
+            return x
+        if names is None:
+            names = ['solution_' + field.name() for field in fields]
+        return [ScalarField(name, x[:, i], fields[0]._ref_feMesh, fields[0].region()) for (i, name) in
+                enumerate(names)]
+
+    def prepare(self) -> None:
+        """
+        Build data derived from the operator if it is out of date
+        """
+        if self._operator is None:
+            raise SolverError('No operator given to the solver!')
+
+        if not self._ready:
+            start = time.perf_counter()
+            self.setup()
+            self._stats.setup_time += time.perf_counter() - start
+            self._stats.n_setups += 1
+            self._ready = True
+
+    def record(self, elapsed: float, n_solves: int, iterations: int) -> None:
+        """
+        Update counters and timings after solve
+
+        :param elapsed: time of the solve [s]
+        :param n_solves: number of solved right hand sides
+        :param iterations: number of iterations
+        """
+        self._stats.last_solve_time = elapsed
+        self._stats.solve_time += elapsed
+        self._stats.n_solves += n_solves
+        self._stats.iterations = iterations
+        self._stats.total_iterations += iterations
+
+    def setup(self) -> None:
+        """
+        Build data derived from the operator
+        """
+        pass
+
+    @abstractmethod
+    def run(self, b: np.ndarray, x0: np.ndarray) -> (np.ndarray, int):
+        """
+        Solve the system with up to date derived data
+
+        :param b: right hand side
+        :param x0: initial guess or None
+        :return: solution, number of iterations
+        """
+        pass
+
+    def run_many(self, b: np.ndarray, x0: np.ndarray) -> (np.ndarray, int):
+        """
+        Solve the system for block of right hand sides with up to date derived data,
+        by default column by column
+
+        :param b: right hand sides (n, k)
+        :param x0: initial guesses (n, k) or None
+        :return: solutions (n, k), number of iterations of all columns
+        """
+        x = np.empty_like(b, order='F')
+        total = 0
+        for i in range(b.shape[1]):
+            x[:, i], iterations = self.run(b[:, i], None if x0 is None else x0[:, i])
+            total += iterations
+        return x, total
+
+
+class DirectSolver(LinearSolver):
+    """
+    Sparse direct solver, LU factorization (SuperLU) is reused until the
+    operator is updated.
+    """
+    __slots__ = (
+                '_factor',
+                )
+
+    def __init__(self, operator=None):
+        """
+        Creates instance of DirectSolver
+
+        :param operator: (optional) sparse system matrix
+        """
+        super().__init__(operator)
+        self._factor = None
+
+    def setup(self) -> None:
+        if not sparse.issparse(self._operator):
+            raise SolverError('Direct solver needs assembled sparse matrix!')
+        self._factor = None
+        try:
+            self._factor = linalg.splu(sparse.csc_matrix(self._operator))
+        except RuntimeError as error:
+            raise SolverError('Factorization failed: ' + str(error))
+
+    def run(self, b: np.ndarray, x0: np.ndarray) -> (np.ndarray, int):
+        return self._factor.solve(b), 0
+
+    def run_many(self, b: np.ndarray, x0: np.ndarray) -> (np.ndarray, int):
+        # triangular solves of all columns in one call
+        return self._factor.solve(b), 0
+
+
+# Dictionary [<method name>] -> scipy Krylov solver
+krylovMethods = {
+        'cg': linalg.cg,
+        'bicgstab': linalg.bicgstab,
+        'gmres': linalg.gmres,
+        'minres': linalg.minres
+        }
+
+
+class KrylovSolver(LinearSolver):
+    """
+    Krylov solver with optional Jacobi or ILU preconditioner, the
+    preconditioner is reused until the operator is updated.
+
+    Jacobi needs `diagonal()` of the operator (sparse matrices and
+    :class:`femsnek.core.operators.MatrixFree` have it), ILU needs sparse
+    matrix. Incomplete LU factors are not symmetric, use ILU with 'bicgstab'
+    or 'gmres' rather than 'cg'.
+    """
+    __slots__ = (
+                '_method',
+                '_preconditioner',
+                '_rtol',
+                '_maxiter',
+                '_ilu_options',
+                '_M'
+                )
+
+    def __init__(self, operator=None, method: str = 'cg', preconditioner: str = 'jacobi', rtol: float = 1e-8,
+                 maxiter: int = None, **ilu_options):
+        """
+        Creates instance of KrylovSolver
+
+        :param operator: (optional) system matrix or linear operator
+        :param method: 'cg', 'bicgstab', 'gmres' or 'minres'
+        :param preconditioner: None, 'jacobi' or 'ilu'
+        :param rtol: relative tolerance of residual
+        :param maxiter: (optional) maximal number of iterations
+        :param ilu_options: options of scipy.sparse.linalg.spilu (drop_tol, fill_factor)
+        """
+        super().__init__(operator)
+        if method not in krylovMethods:
+            raise SolverError('Unknown Krylov method <' + str(method) + '>!')
+        if preconditioner not in (None, 'jacobi', 'ilu'):
+            raise SolverError('Unknown preconditioner <' + str(preconditioner) + '>!')
+
+        self._method = method
+        self._preconditioner = preconditioner
+        self._rtol = rtol
+        self._maxiter = maxiter
+        self._ilu_options = ilu_options
+        self._M = None
+
+    def setup(self) -> None:
+        n = self._operator.shape[0]
+        self._M = None
+
+        if self._preconditioner == 'jacobi':
+            inverse = 1. / self._operator.diagonal()
+            self._M = linalg.LinearOperator((n, n), matvec=lambda x: inverse * np.ravel(x),
+                                            matmat=lambda x: inverse[:, None] * x, dtype=np.float64)
+        elif self._preconditioner == 'ilu':
+            if not sparse.issparse(self._operator):
+                raise SolverError('ILU preconditioner needs assembled sparse matrix!')
+            try:
+                ilu = linalg.spilu(sparse.csc_matrix(self._operator), **self._ilu_options)
+            except RuntimeError as error:
+                raise SolverError('Incomplete factorization failed: ' + str(error))
+            self._M = linalg.LinearOperator((n, n), matvec=ilu.solve, matmat=ilu.solve, dtype=np.float64)
+
+    def run(self, b: np.ndarray, x0: np.ndarray) -> (np.ndarray, int):
+        iterations = [0]
+
+        def count(_):
+            iterations[0] += 1
+
+        options = {'callback_type': 'pr_norm'} if self._method == 'gmres' else {}
+        x, info = krylovMethods[self._method](self._operator, b, x0=x0, rtol=self._rtol, maxiter=self._maxiter,
+                                              M=self._M, callback=count, **options)
+
+        if info != 0:
+            raise SolverError('Krylov solver <' + self._method + '> did not converge (info = ' + str(info) +
+                              ', iterations = ' + str(iterations[0]) + ')!')
+        return x, iterations[0]
+
+    def run_many(self, b: np.ndarray, x0: np.ndarray) -> (np.ndarray, int):
+        if self._method != 'cg' or sparse.issparse(self._operator):
+            return super().run_many(b, x0)
+
+        x, iterations, converged = block_cg(self._operator, b, x0, self._rtol, self._maxiter, self._M)
+        if not np.all(converged):
+            raise SolverError('Krylov solver <cg> did not converge for ' + str(np.count_nonzero(~converged)) +
+                              ' of ' + str(b.shape[1]) + ' right hand sides (iterations = ' + str(iterations) +
+                              ')!')
+        return x, iterations
+
+
+def field_block(fields: list) -> np.ndarray:
+    """
+    Stack values of scalar fields into block of right hand sides
+
+    :param fields: ScalarField objects of one region of one mesh
+    :return: block (n, k), one column per field
+    """
+    if len(fields) == 0:
+        raise SolverError('No right hand sides given!')
+    for field in fields:
+        if not isinstance(field, ScalarField):
+            raise FieldOperationError('Right hand side of type ' + str(type(field)) + ' is not a scalar field!')
+        if field._ref_feMesh is not fields[0]._ref_feMesh:
+            raise FieldOperationError('Right hand sides defined on different meshes!')
+        fields[0].region_check(field)
+    return np.column_stack([field.nodal() for field in fields])
+
+
+def block_cg(operator, b: np.ndarray, x0: np.ndarray = None, rtol: float = 1e-8, maxiter: int = None,
+             M=None) -> (np.ndarray, int, np.ndarray):
+    """
+    Preconditioned conjugate gradients of all columns of right hand side block
+
+    Columns are independent CG recurrences sharing operator and preconditioner
+    applications (one sparse matrix - block product per iteration). Converged
+    columns are dropped from the working block.
+
+    :param operator: symmetric positive definite matrix or linear operator
+    :param b: right hand sides (n, k)
+    :param x0: (optional) initial guesses (n, k)
+    :param rtol: relative tolerance of residual of every column
+    :param maxiter: (optional) maximal number of iterations, 10 * n by default
+    :param M: (optional) preconditioner, linear operator
+    :return: solutions (n, k), number of iterations, converged flag of every column (k,)
+    """
+    (n, k) = b.shape
+    if maxiter is None:
+        maxiter = 10 * n
+
+    def precondition(r):
+        return r.copy() if M is None else np.ascontiguousarray(M.matmat(r))
+
+    def dot(u, v):
+        return np.einsum('ij,ij->j', u, v)
+
+    solution = np.zeros((n, k), order='F') if x0 is None else np.array(x0, dtype=np.float64, order='F')
+    tolerance = (rtol * np.linalg.norm(b, axis=0)) ** 2
+    r = np.ascontiguousarray(b - operator @ solution if x0 is not None else b)
+
+    # working block of not converged columns, C ordered for sparse matrix - block products
+    active = np.flatnonzero(dot(r, r) > tolerance)
+    x = np.ascontiguousarray(solution[:, active])
+    r = r[:, active]
+    z = precondition(r)
+    p = z.copy()
+    rz = dot(r, z)
+
+    iterations = 0
+    while active.shape[0] > 0 and iterations < maxiter:
+        iterations += 1
+        q = operator @ p
+        alpha = rz / dot(p, q)
+        x += alpha * p
+        q *= alpha
+        r -= q
+
+        # store and drop converged columns
+        remaining = dot(r, r) > tolerance[active]
+        if not np.all(remaining):
+            solution[:, active[~remaining]] = x[:, ~remaining]
+            active, x, r, p, rz = active[remaining], x[:, remaining], r[:, remaining], p[:, remaining], \
+                rz[remaining]
+            if active.shape[0] == 0:
+                break
+
+        z = precondition(r)
+        rz_new = dot(r, z)
+        p *= rz_new / rz
+        p += z
+        rz = rz_new
+
+    solution[:, active] = x
+    converged = np.ones(k, dtype=bool)
+    converged[active] = False
+    return solution, iterations, converged
@@ -0,0 +1,65 @@
+"""
+Benchmark of colored multithreaded assembly.
+
+Stiffness matrix of a triangle mesh of the unit square is assembled serially
+(batched element matrices and in place scatter) and by colored assembly with
+growing number of threads, where every thread computes element matrices of
+its chunk and adds them. Coloring and chunk building are one-off costs,
+reported separately.
+
+Usage: python bench_assembly_threads.py [n] [max threads]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import femsnek.core.matrices as matrices
+from femsnek.mesh.feMesh import FeMesh
+import synthetic_mesh
+
+
+def best_time(fun, repeats: int = 5) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fun()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    max_threads = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'square_%d.msh' % n)
+        synthetic_mesh.write_msh(path, n, binary=True)
+        femesh = FeMesh.from_gmsh(path)
+
+    mesh = femesh[('i', 0)]
+    coordinates = femesh.coordinates(('i', 0))
+    pattern = mesh.sparsity()
+    matrix = pattern.matrix()
+
+    start = time.perf_counter()
+    colors = mesh.colors()
+    print('%d elements, %d colors, coloring %.3f s, %d cpus' %
+          (mesh.n_elements(), colors[0].shape[0] - 1, time.perf_counter() - start, os.cpu_count()))
+
+    serial = best_time(lambda: pattern.assemble([matrices.stiffness(l, coordinates)
+                                                 for l in mesh._connectivityLists], out=matrix))
+    print('%10s %12s %10s' % ('threads', 'assembly [s]', 'speedup'))
+    print('%10s %12.4f %10.2f' % ('serial', serial, 1.))
+
+    threads = 1
+    while threads <= max_threads:
+        start = time.perf_counter()
+        pattern.chunks(mesh.packed(), colors, threads)
+        setup = time.perf_counter() - start
+
+        elapsed = best_time(lambda: pattern.assemble_colored(matrices.stiffness, mesh.packed(), coordinates, colors,
+                                                             threads, out=matrix))
+        print('%10d %12.4f %10.2f   (chunks %.3f s)' % (threads, elapsed, serial / elapsed, setup))
+        threads *= 2
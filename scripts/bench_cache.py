@@ -0,0 +1,47 @@
+"""
+Benchmark of the on-disk mesh cache.
+
+Compares plain import of ascii and binary .msh files with the first (cold,
+cache written) and later (warm, cache memory mapped) cached imports. Warm
+imports look entries up by file path, size and modification time, or with
+`content_hash` by hashing the whole file content.
+
+Usage: python bench_cache.py [n_1 n_2 ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from femsnek.mesh.feMesh import FeMesh
+import synthetic_mesh
+
+
+def timed(fun, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fun(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    sizes = [int(i) for i in sys.argv[1:]] or [100, 300, 1000]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print('%8s %10s %10s %12s %12s %12s %12s' %
+              ('n', 'format', 'MB', 'plain [s]', 'cold [s]', 'warm [s]', 'warm hash [s]'))
+        for n in sizes:
+            for binary in (False, True):
+                path = os.path.join(tmp, 'square_%d_%d.msh' % (n, binary))
+                synthetic_mesh.write_msh(path, n, binary=binary)
+                cache_dir = os.path.join(tmp, 'cache')
+
+                t_plain = timed(FeMesh.from_gmsh, path)
+                t_cold = timed(FeMesh.from_gmsh, path, cache=True, cache_dir=cache_dir)
+                t_warm = timed(FeMesh.from_gmsh, path, cache=True, cache_dir=cache_dir)
+                FeMesh.from_gmsh(path, cache=True, cache_dir=cache_dir, content_hash=True)
+                t_hash = timed(FeMesh.from_gmsh, path, cache=True, cache_dir=cache_dir, content_hash=True)
+
+                print('%8d %10s %10.1f %12.4f %12.4f %12.4f %12.4f' %
+                      (n, 'binary' if binary else 'ascii', os.path.getsize(path) / 2 ** 20,
+                       t_plain, t_cold, t_warm, t_hash))
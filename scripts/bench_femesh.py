@@ -0,0 +1,98 @@
+"""
+Benchmark of FeMesh construction from many small entity blocks.
+
+CAD derived meshes have thousands of Gmsh entity blocks. Every block here
+holds a few line or triangle elements, boundary blocks are spread over 100
+physical ids and internal blocks over 10. Time per block should stay
+constant as the number of blocks grows.
+
+Second table: thousands of tiny boundary regions (two line elements each,
+own physical id) on a large node set. Construction cost of a region has to
+depend on its size, not on the number of mesh nodes.
+
+Usage: python bench_femesh.py [n_blocks_1 n_blocks_2 ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import femsnek.core.elements as elements
+from femsnek.mesh.feMesh import FeMesh
+
+
+def entity_blocks(n_blocks: int, elements_per_block: int = 4) -> (np.ndarray, list, list):
+    """
+    Create synthetic entity blocks
+
+    :param n_blocks: number of blocks, half of them boundary half internal
+    :param elements_per_block: number of elements in each block
+    :return: nodes, element lists, physical ids
+    """
+    rng = np.random.default_rng(0)
+    n_nodes = n_blocks * elements_per_block
+    nodes = rng.random((3, n_nodes))
+
+    element_lists = []
+    physical_ids = []
+    for i in range(n_blocks):
+        if i % 2:
+            element_list = elements.ListLine1(elements_per_block)
+            physical_ids.append('wall_%d' % (i // 2 % 100))
+        else:
+            element_list = elements.ListTri1(elements_per_block)
+            physical_ids.append('internal_%d' % (i // 2 % 10))
+        element_list._tags[:] = rng.integers(0, n_nodes, element_list._tags.shape)
+        element_lists.append(element_list)
+
+    return nodes, element_lists, physical_ids
+
+
+def sparse_regions(n_regions: int, n_nodes: int = 2000000) -> (np.ndarray, list, list):
+    """
+    Create many tiny boundary regions spread over a large node set
+
+    :param n_regions: number of boundary regions
+    :param n_nodes: number of mesh nodes
+    :return: nodes, element lists, physical ids
+    """
+    rng = np.random.default_rng(0)
+    nodes = np.zeros((3, n_nodes))
+
+    internal = elements.ListTri1(1)
+    internal._tags[:, 0] = [0, 1, n_nodes - 1]
+    element_lists = [internal]
+    physical_ids = ['internal']
+    for i in range(n_regions):
+        element_list = elements.ListLine1(2)
+        element_list._tags[:] = rng.integers(0, n_nodes, element_list._tags.shape)
+        element_lists.append(element_list)
+        physical_ids.append('wall_%d' % i)
+
+    return nodes, element_lists, physical_ids
+
+
+if __name__ == '__main__':
+    sizes = [int(i) for i in sys.argv[1:]] or [1000, 2500, 5000, 10000, 20000]
+
+    print('%10s %10s %14s %14s' % ('blocks', 'regions', 'FeMesh [s]', 'us / block'))
+    for n_blocks in sizes:
+        nodes, element_lists, physical_ids = entity_blocks(n_blocks)
+
+        start = time.perf_counter()
+        femesh = FeMesh('synthetic', nodes, element_lists, physical_ids)
+        t = time.perf_counter() - start
+
+        n_regions = len(femesh._internalMesh) + len(femesh._boundaryMesh)
+        print('%10d %10d %14.4f %14.2f' % (n_blocks, n_regions, t, 1e6 * t / n_blocks))
+
+    print()
+    print('%10s %10s %14s %14s' % ('regions', 'nodes', 'FeMesh [s]', 'us / region'))
+    for n_regions in (100, 1000, 4000):
+        nodes, element_lists, physical_ids = sparse_regions(n_regions)
+
+        start = time.perf_counter()
+        FeMesh('synthetic', nodes, element_lists, physical_ids)
+        t = time.perf_counter() - start
+        print('%10d %10d %14.4f %14.2f' % (n_regions, nodes.shape[1], t, 1e6 * t / n_regions))
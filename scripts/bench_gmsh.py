@@ -0,0 +1,72 @@
+"""
+Benchmark of the .msh readers on synthetic meshes of growing size.
+
+Time spent in every section reader is reported per object (node or element),
+for a linear reader this number stays constant as the mesh grows. The last
+columns compare reading whole ascii and binary files.
+
+Usage: python bench_gmsh.py [n_1 n_2 ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import femsnek.fio.gmsh as gmsh
+import synthetic_mesh
+
+
+def time_sections(path: str) -> dict:
+    """
+    Read .msh file section by section and time every reader
+
+    :param path: path to .msh file
+    :return: dict [section name] -> time in seconds
+    """
+    data = {}
+    timings = {}
+    with open(path) as file:
+        while True:
+            section_name = file.readline()
+            if len(section_name) == 0:
+                break
+
+            reader = gmsh.get_section_reader(section_name)
+            start = time.perf_counter()
+            reader(file, data)
+            timings[section_name.strip()[1:]] = time.perf_counter() - start
+
+    return timings
+
+
+if __name__ == '__main__':
+    sizes = [int(i) for i in sys.argv[1:]] or [100, 200, 400, 800]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print('%8s %10s %10s %12s %12s %12s %12s %12s %12s' %
+              ('n', 'nodes', 'elements', 'Nodes [s]', 'ns / node', 'Elements [s]', 'ns / elem',
+               'ascii [s]', 'binary [s]'))
+        for n in sizes:
+            path = os.path.join(tmp, 'square_%d.msh' % n)
+            binary_path = os.path.join(tmp, 'square_%d_binary.msh' % n)
+            synthetic_mesh.write_msh(path, n, node_blocks=max(1, n // 100))
+            synthetic_mesh.write_msh(binary_path, n, node_blocks=max(1, n // 100), binary=True)
+
+            n_nodes = (n + 1) ** 2
+            n_elements = 2 * n ** 2 + 4 * n
+            t = time_sections(path)
+
+            start = time.perf_counter()
+            gmsh.read(path)
+            t_ascii = time.perf_counter() - start
+
+            start = time.perf_counter()
+            gmsh.read(binary_path)
+            t_binary = time.perf_counter() - start
+
+            print('%8d %10d %10d %12.4f %12.1f %12.4f %12.1f %12.4f %12.4f' %
+                  (n, n_nodes, n_elements,
+                   t['Nodes'], 1e9 * t['Nodes'] / n_nodes,
+                   t['Elements'], 1e9 * t['Elements'] / n_elements,
+                   t_ascii, t_binary))
@@ -0,0 +1,45 @@
+"""
+Benchmark of element matrices computed over whole connectivity lists.
+
+Stiffness and mass matrices of all elements of triangle and quad meshes of
+the unit square are computed in batches and reported as elements per second.
+
+Usage: python bench_matrices.py [n_1 n_2 ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import femsnek.core.matrices as matrices
+from femsnek.mesh.feMesh import FeMesh
+import synthetic_mesh
+
+
+if __name__ == '__main__':
+    sizes = [int(i) for i in sys.argv[1:]] or [100, 300, 700]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print('%8s %6s %10s %14s %14s %14s %14s' %
+              ('n', 'type', 'elements', 'stiffness [s]', 'elem / s', 'mass [s]', 'elem / s'))
+        for n in sizes:
+            for quads in (False, True):
+                path = os.path.join(tmp, 'square_%d_%d.msh' % (n, quads))
+                synthetic_mesh.write_msh(path, n, quads=quads, binary=True)
+                femesh = FeMesh.from_gmsh(path)
+                coordinates = femesh.coordinates(('i', 0))
+                con_list = femesh[('i', 0)]._connectivityLists[0]
+
+                start = time.perf_counter()
+                matrices.stiffness(con_list, coordinates)
+                t_stiffness = time.perf_counter() - start
+
+                start = time.perf_counter()
+                matrices.mass(con_list, coordinates)
+                t_mass = time.perf_counter() - start
+
+                n_elements = con_list.n_elements()
+                print('%8d %6s %10d %14.4f %14.3e %14.4f %14.3e' %
+                      (n, 'quad' if quads else 'tri', n_elements,
+                       t_stiffness, n_elements / t_stiffness, t_mass, n_elements / t_mass))
@@ -0,0 +1,84 @@
+"""
+Benchmark of matrix-free operator against assembled CSR matrix.
+
+Stiffness operator of triangle and quad meshes of the unit square is applied
+by scipy CSR matvec and by the matrix-free operator. Memory of the CSR matrix
+(data, indices, indptr) is compared with memory of geometric factors, peak
+memory of building each operator and of one matvec is traced by tracemalloc
+(numpy reports its allocations to it).
+
+Usage: python bench_matrix_free.py [n_1 n_2 ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import femsnek.core.matrices as matrices
+from femsnek.core.operators import MatrixFree
+from femsnek.mesh.feMesh import FeMesh
+import synthetic_mesh
+
+
+def matvec_time(operator, x: np.ndarray, repeat: int = 10) -> float:
+    """
+    Best time of operator application
+
+    :param operator: matrix or linear operator
+    :param x: vector
+    :param repeat: number of applications
+    :return: time in seconds
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operator @ x
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def traced(fun) -> (object, float):
+    """
+    Peak memory allocated while function runs
+
+    :param fun: function without arguments
+    :return: result of the function, peak in MB
+    """
+    tracemalloc.start()
+    try:
+        result = fun()
+        return result, tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    sizes = [int(i) for i in sys.argv[1:]] or [300, 700]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print('%8s %6s %10s %9s %9s %9s %9s %11s %11s %11s %11s' %
+              ('n', 'type', 'nodes', 'CSR [ms]', 'free [ms]', 'CSR [MB]', 'free [MB]',
+               'CSR build', 'free build', 'CSR matvec', 'free matvec'))
+        for n in sizes:
+            for quads in (False, True):
+                path = os.path.join(tmp, 'square_%d_%d.msh' % (n, quads))
+                synthetic_mesh.write_msh(path, n, quads=quads, binary=True)
+                femesh = FeMesh.from_gmsh(path)
+                mesh = femesh[('i', 0)]
+                coordinates = femesh.coordinates(('i', 0))
+
+                (matrix, matrix_build) = traced(lambda: mesh.sparsity().assemble(
+                    [matrices.stiffness(con_list, coordinates) for con_list in mesh._connectivityLists]))
+                (operator, operator_build) = traced(lambda: MatrixFree.from_mesh(femesh, ('i', 0)))
+                x = np.random.rand(mesh.n_nodes())
+
+                print('%8d %6s %10d %9.1f %9.1f %9.1f %9.1f %11.1f %11.1f %11.1f %11.1f' %
+                      (n, 'quad' if quads else 'tri', mesh.n_nodes(),
+                       1e3 * matvec_time(matrix, x), 1e3 * matvec_time(operator, x),
+                       (matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes) / 1e6,
+                       operator.nbytes() / 1e6, matrix_build, operator_build,
+                       traced(lambda: matrix @ x)[1], traced(lambda: operator @ x)[1]))
@@ -0,0 +1,61 @@
+"""
+Benchmark of solves of many right hand sides.
+
+Load cases of the screened Poisson problem (K + M) x = b on a triangle mesh
+of the unit square are solved one by one and as one block. Both share one
+factorization or preconditioner, the block solve applies it (and the
+operator) to all columns at once. Conjugate gradients with the assembled
+matrix solve the block column by column.
+
+Usage: python bench_multi_rhs.py [n] [cases]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import femsnek.core.matrices as matrices
+from femsnek.core.operators import MatrixFree
+from femsnek.mesh.feMesh import FeMesh
+from femsnek.solvers.linear import DirectSolver, KrylovSolver
+import synthetic_mesh
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    cases = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'square_%d.msh' % n)
+        synthetic_mesh.write_msh(path, n, binary=True)
+        femesh = FeMesh.from_gmsh(path)
+
+    mesh = femesh[('i', 0)]
+    coordinates = femesh.coordinates(('i', 0))
+    system = mesh.sparsity().assemble([matrices.mass(l, coordinates) + matrices.stiffness(l, coordinates)
+                                       for l in mesh._connectivityLists])
+    b = np.asfortranarray(np.random.rand(mesh.n_nodes(), cases))
+
+    solvers = [('direct', lambda: DirectSolver(system)),
+               ('cg jacobi', lambda: KrylovSolver(system, 'cg', 'jacobi')),
+               ('cg matrix-free', lambda: KrylovSolver(MatrixFree.from_mesh(femesh, ('i', 0), mass=1.), 'cg',
+                                                       'jacobi'))]
+
+    print('%d nodes, %d right hand sides' % (mesh.n_nodes(), cases))
+    print('%16s %12s %12s %10s' % ('solver', 'loop [s]', 'block [s]', 'speedup'))
+    for (name, create) in solvers:
+        solver = create()
+        solver.solve(b[:, 0])
+        start = time.perf_counter()
+        loop = np.column_stack([solver.solve(b[:, i]) for i in range(cases)])
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        block = solver.solve_many(b)
+        block_time = time.perf_counter() - start
+
+        assert np.allclose(loop, block, atol=1e-6 * np.abs(loop).max())
+        print('%16s %12.4f %12.4f %10.2f' % (name, loop_time, block_time, loop_time / block_time))
@@ -0,0 +1,60 @@
+"""
+Benchmark of assembly of mesh partitions by a pool of processes.
+
+Stiffness matrix of a triangle mesh of the unit square is assembled serially
+(batched element matrices and bincount) and by ParallelAssembler with growing
+number of workers. Partitioning and planning are one-off costs, reported
+separately.
+
+Usage: python bench_parallel_assembly.py [n] [max workers]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import femsnek.core.matrices as matrices
+from femsnek.core.parallel import ParallelAssembler
+from femsnek.mesh.feMesh import FeMesh
+import synthetic_mesh
+
+
+def best_time(fun, repeats: int = 3) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fun()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'square_%d.msh' % n)
+        synthetic_mesh.write_msh(path, n, binary=True)
+        femesh = FeMesh.from_gmsh(path)
+
+    mesh = femesh[('i', 0)]
+    coordinates = femesh.coordinates(('i', 0))
+    pattern = mesh.sparsity()
+    matrix = pattern.assemble([matrices.stiffness(l, coordinates) for l in mesh._connectivityLists])
+
+    serial = best_time(lambda: pattern.assemble([matrices.stiffness(l, coordinates)
+                                                 for l in mesh._connectivityLists], out=matrix))
+    print('%d elements, %d cpus' % (mesh.n_elements(), os.cpu_count()))
+    print('%10s %12s %10s' % ('workers', 'assembly [s]', 'speedup'))
+    print('%10s %12.4f %10.2f' % ('serial', serial, 1.))
+
+    workers = 1
+    while workers <= max_workers:
+        start = time.perf_counter()
+        with ParallelAssembler(femesh, ('i', 0), workers) as assembler:
+            setup = time.perf_counter() - start
+            assembler.assemble(matrices.stiffness, out=matrix)
+            elapsed = best_time(lambda: assembler.assemble(matrices.stiffness, out=matrix))
+        print('%10d %12.4f %10.2f   (setup %.3f s)' % (workers, elapsed, serial / elapsed, setup))
+        workers *= 2
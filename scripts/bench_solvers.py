@@ -0,0 +1,54 @@
+"""
+Benchmark of linear solvers in a transient loop.
+
+Implicit Euler steps of the heat equation (M + dt K) x = M x_old on a triangle
+mesh of the unit square. The direct solver factorizes once and reuses the
+factorization, Krylov solvers reuse their preconditioners. Setup and solve
+times and iteration counts are reported from solver stats.
+
+Usage: python bench_solvers.py [n] [steps]
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+import femsnek.core.matrices as matrices
+from femsnek.mesh.feMesh import FeMesh
+from femsnek.solvers.linear import DirectSolver, KrylovSolver
+import synthetic_mesh
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    dt = 1e-3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'square_%d.msh' % n)
+        synthetic_mesh.write_msh(path, n, binary=True)
+        femesh = FeMesh.from_gmsh(path)
+
+    mesh = femesh[('i', 0)]
+    coordinates = femesh.coordinates(('i', 0))
+    mass = mesh.sparsity().assemble([matrices.mass(l, coordinates) for l in mesh._connectivityLists])
+    system = mesh.sparsity().assemble([matrices.mass(l, coordinates) + matrices.stiffness(l, coordinates, dt)
+                                       for l in mesh._connectivityLists])
+
+    solvers = [('direct', DirectSolver(system)),
+               ('cg jacobi', KrylovSolver(system, 'cg', 'jacobi')),
+               ('bicgstab ilu', KrylovSolver(system, 'bicgstab', 'ilu', drop_tol=1e-3, fill_factor=2))]
+
+    print('%d nodes, %d steps' % (mesh.n_nodes(), steps))
+    print('%12s %8s %12s %12s %12s %14s' % ('solver', 'setups', 'setup [s]', 'solve [s]', 's / step', 'iter / step'))
+    for (name, solver) in solvers:
+        x = np.exp(-50. * ((coordinates[0] - 0.5) ** 2 + (coordinates[1] - 0.5) ** 2))
+        for _ in range(steps):
+            x = solver.solve(mass @ x, x0=x)
+
+        stats = solver.stats()
+        print('%12s %8d %12.4f %12.4f %12.5f %14.1f' %
+              (name, stats.n_setups, stats.setup_time, stats.solve_time, stats.solve_time / steps,
+               stats.total_iterations / steps))
@@ -0,0 +1,37 @@
+"""
+Benchmark of VTK export on mixed quad/triangle meshes.
+
+Exports the internal region and all boundaries with one scalar field and
+reports time per element.
+
+Usage: python bench_vtk.py [n_1 n_2 ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from femsnek.fields.scalar import ScalarField
+import femsnek.fio.vtk as vtk
+from femsnek.mesh.feMesh import FeMesh
+import synthetic_mesh
+
+
+if __name__ == '__main__':
+    sizes = [int(i) for i in sys.argv[1:]] or [100, 300, 800]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print('%8s %10s %10s %12s %12s' % ('n', 'nodes', 'elements', 'write [s]', 'ns / elem'))
+        for n in sizes:
+            path = os.path.join(tmp, 'mixed_%d.msh' % n)
+            synthetic_mesh.write_msh(path, n, mixed=True, binary=True)
+            femesh = FeMesh.from_gmsh(path)
+            field = ScalarField.by_fun('x', lambda x, y, z: x, femesh)
+
+            n_elements = femesh[('i', 0)].n_elements()
+            start = time.perf_counter()
+            vtk.write(os.path.join(tmp, 'out_%d' % n), femesh, [field])
+            t = time.perf_counter() - start
+
+            print('%8d %10d %10d %12.4f %12.1f' % (n, femesh.n_nodes(), n_elements, t, 1e9 * t / n_elements))
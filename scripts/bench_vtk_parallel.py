@@ -0,0 +1,71 @@
+"""
+Benchmark of parallel VTK export against the number of mesh regions.
+
+Triangles of a structured square are split into `k` internal regions
+(bands of rows), every region is written serially, by a thread pool and by
+a process pool. Speedup is reported relative to the serial export.
+
+Usage: python bench_vtk_parallel.py [n [workers]]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import femsnek.core.elements as elements
+import femsnek.fio.vtk as vtk
+from femsnek.mesh.feMesh import FeMesh
+import synthetic_mesh
+
+
+def banded_mesh(n: int, k: int) -> FeMesh:
+    """
+    Build structured square mesh with k internal regions
+
+    :param n: number of cells along each edge
+    :param k: number of internal regions
+    :return: finite element mesh
+    """
+    nodes, surface, boundary = synthetic_mesh.square(n)
+    triangles = surface[0][1] - 1
+
+    element_lists = []
+    physical_ids = []
+    for (j, band) in enumerate(np.array_split(triangles, k)):
+        element_list = elements.ListTri1(band.shape[0])
+        element_list._tags[:] = band.T
+        element_lists.append(element_list)
+        physical_ids.append('part_%d' % j)
+    for (j, lines) in enumerate(boundary):
+        element_list = elements.ListLine1(lines.shape[0])
+        element_list._tags[:] = lines.T - 1
+        element_lists.append(element_list)
+        physical_ids.append('wall_%d' % j)
+
+    return FeMesh('banded', nodes, element_lists, physical_ids)
+
+
+def timed(*args, **kwargs) -> float:
+    start = time.perf_counter()
+    vtk.write(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'out')
+        print('%8s %8s %12s %12s %12s %10s %10s' %
+              ('regions', 'workers', 'serial [s]', 'threads [s]', 'procs [s]', 'threads x', 'procs x'))
+        for k in (1, 2, 4, 8, 16, 32):
+            femesh = banded_mesh(n, k)
+            t_serial = timed(path, femesh)
+            t_threads = timed(path, femesh, workers=workers)
+            t_processes = timed(path, femesh, workers=workers, processes=True)
+            print('%8d %8d %12.4f %12.4f %12.4f %10.2f %10.2f' %
+                  (k + 4, workers, t_serial, t_threads, t_processes, t_serial / t_threads, t_serial / t_processes))
@@ -0,0 +1,71 @@
+"""
+Benchmark of the built-in .vtu writer against pyevtk.
+
+The internal region of a triangle mesh of the unit square is written with one
+scalar field by pyevtk (when installed), by the raw appended writer and by the
+zlib compressed writer with growing number of compression threads. The
+default size gives about 1M nodes.
+
+Usage: python bench_vtu.py [n_1 n_2 ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from femsnek.fields.scalar import ScalarField
+import femsnek.fio.vtk as vtk
+from femsnek.mesh.feMesh import FeMesh
+import synthetic_mesh
+
+try:
+    import pyevtk as evtk
+except ImportError:
+    evtk = None
+
+
+def timed(function, *args) -> float:
+    """
+    Time one call of function
+
+    :param function: callable
+    :param args: its arguments
+    :return: time in seconds
+    """
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    sizes = [int(i) for i in sys.argv[1:]] or [1000]
+    threads = [1, 2, 4]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print('%8s %10s %10s %12s %12s %8s' % ('n', 'nodes', 'elements', 'writer', 'write [s]', 'MB'))
+        for n in sizes:
+            path = os.path.join(tmp, 'square_%d.msh' % n)
+            synthetic_mesh.write_msh(path, n, binary=True)
+            femesh = FeMesh.from_gmsh(path)
+            field = ScalarField.by_fun('x', lambda x, y, z: x, femesh)
+            fields = vtk.convert_field_list([field])[('i', 0)]
+            filename = os.path.join(tmp, 'out')
+
+            points, connectivity, offsets, cell_types = vtk.region_geometry(('i', 0), femesh)
+            runs = []
+            if evtk is not None:
+                runs.append(('pyevtk', lambda: evtk.hl.unstructuredGridToVTK(
+                    filename, points[:, 0].copy(), points[:, 1].copy(), points[:, 2].copy(),
+                    connectivity, offsets, cell_types, pointData=fields)))
+            runs.append(('raw', lambda: vtk.write_piece(filename, points, connectivity, offsets, cell_types,
+                                                        fields)))
+            for t in threads:
+                runs.append(('zlib x%d' % t, lambda t=t: vtk.write_piece(filename, points, connectivity, offsets,
+                                                                         cell_types, fields, 1, t)))
+
+            for (name, run) in runs:
+                t = timed(run)
+                print('%8d %10d %10d %12s %12.4f %8.1f' %
+                      (n, points.shape[0], cell_types.shape[0], name, t,
+                       os.path.getsize(filename + '.vtu') / 1e6))
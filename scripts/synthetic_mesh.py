@@ -0,0 +1,149 @@
+"""
+IGNORE: -----------------------------------------------------------
+        ____                                            __
+       / __/___   ____ ___          _____ ____   ___   / /__
+      / /_ / _ \ / __ `__ \ ______ / ___// __ \ / _ \ / //_/
+     / __//  __// / / / / //_____/(__  )/ / / //  __// ,<
+    /_/   \___//_/ /_/ /_/       /____//_/ /_/ \___//_/|_|
+    ~~~~~~~~~ Finite element method python package ~~~~~~~~~
+
+------------------------------------------------------------ IGNORE
+
+Generator of structured MSH 4.1 meshes of the unit square used by the benchmarks.
+
+The square is split into `n x n` cells (triangles, quads or quads in the lower
+and triangles in the upper half), boundary curves get physical ids 1-4
+(bottom, right, top, left) and the surface gets id 5.
+"""
+
+import numpy as np
+
+
+def square(n: int, quads: bool = False, mixed: bool = False) -> (np.ndarray, list, list):
+    """
+    Build structured mesh of the unit square
+
+    :param n: number of cells along each edge
+    :param quads: use quadrangles instead of triangles
+    :param mixed: use quadrangles in the lower half and triangles in the upper half
+    :return: nodes (3, nNodes), surface blocks [(gmsh type, connectivity (nElem, nNodes))], boundary connectivities
+    """
+    x, y = np.meshgrid(np.linspace(0., 1., n + 1), np.linspace(0., 1., n + 1))
+    nodes = np.vstack((x.ravel(), y.ravel(), np.zeros(x.size)))
+
+    # 1-based gmsh node tags of the grid
+    tags = np.arange(1, (n + 1) ** 2 + 1).reshape(n + 1, n + 1)
+    a = tags[:-1, :-1].ravel()
+    b = tags[:-1, 1:].ravel()
+    c = tags[1:, 1:].ravel()
+    d = tags[1:, :-1].ravel()
+
+    # cells are numbered row by row, first n_quad of them become quads
+    n_quad = n * n if quads else (n // 2) * n if mixed else 0
+    surface = []
+    if n_quad:
+        surface.append((3, np.vstack((a, b, c, d))[:, :n_quad].T))
+    if n_quad < n * n:
+        a, b, c, d = a[n_quad:], b[n_quad:], c[n_quad:], d[n_quad:]
+        surface.append((2, np.vstack((np.vstack((a, b, c)).T, np.vstack((a, c, d)).T))))
+
+    edges = [tags[0, :], tags[:, -1], tags[-1, ::-1], tags[::-1, 0]]
+    boundary = [np.vstack((e[:-1], e[1:])).T for e in edges]
+
+    return nodes, surface, boundary
+
+
+def write_msh(path: str, n: int, quads: bool = False, node_blocks: int = 1, binary: bool = False,
+              mixed: bool = False):
+    """
+    Write structured mesh of the unit square as MSH 4.1 file
+
+    :param path: path of the created file
+    :param n: number of cells along each edge
+    :param quads: use quadrangles instead of triangles
+    :param node_blocks: number of entity blocks the nodes are split into
+    :param binary: write binary instead of ascii file
+    :param mixed: use quadrangles in the lower half and triangles in the upper half
+    """
+    nodes, surface, boundary = square(n, quads, mixed)
+    n_nodes = nodes.shape[1]
+
+    with open(path, 'wb') as file:
+        def text(string):
+            file.write(string.encode('ascii'))
+
+        def numbers(values, dtype, fmt='%d'):
+            # write a row of numbers in binary or ascii form
+            values = np.asarray(values)
+            if binary:
+                file.write(values.astype(dtype).tobytes())
+            else:
+                np.savetxt(file, values, fmt=fmt)
+
+        text('$MeshFormat\n4.1 %d 8\n' % int(binary))
+        if binary:
+            numbers([1], np.int32)
+            text('\n')
+        text('$EndMeshFormat\n')
+
+        text('$PhysicalNames\n5\n1 1 "bottom"\n1 2 "right"\n1 3 "top"\n1 4 "left"\n2 5 "internal"\n'
+             '$EndPhysicalNames\n')
+
+        text('$Entities\n')
+        if binary:
+            numbers([0, 4, 1, 0], np.uint64)
+            for (tag, physical) in [(1, 1), (2, 2), (3, 3), (4, 4), (1, 5)]:
+                numbers([tag], np.int32)
+                numbers([0., 0., 0., 1., 1., 0.], np.float64)
+                numbers([1], np.uint64)
+                numbers([physical], np.int32)
+                numbers([0], np.uint64)
+            text('\n')
+        else:
+            text('0 4 1 0\n')
+            for i in range(4):
+                text('%d 0 0 0 1 1 0 1 %d 0 \n' % (i + 1, i + 1))
+            text('1 0 0 0 1 1 0 1 5 0 \n')
+        text('$EndEntities\n')
+
+        # nodes are split into blocks of the surface entity
+        bounds = np.linspace(0, n_nodes, node_blocks + 1).astype(np.int64)
+        text('$Nodes\n')
+        if binary:
+            numbers([node_blocks, n_nodes, 1, n_nodes], np.uint64)
+        else:
+            text('%d %d 1 %d\n' % (node_blocks, n_nodes, n_nodes))
+        for i in range(node_blocks):
+            n_block = bounds[i + 1] - bounds[i]
+            if binary:
+                numbers([2, 1, 0], np.int32)
+                numbers([n_block], np.uint64)
+            else:
+                text('2 1 0 %d\n' % n_block)
+            numbers(np.arange(bounds[i] + 1, bounds[i + 1] + 1), np.uint64)
+            numbers(nodes[:, bounds[i]:bounds[i + 1]].T, np.float64, '%.16g')
+        if binary:
+            text('\n')
+        text('$EndNodes\n')
+
+        blocks = [(1, i + 1, 1, con) for (i, con) in enumerate(boundary)] + \
+                 [(2, 1, el_type, con) for (el_type, con) in surface]
+        n_elements = sum(block[3].shape[0] for block in blocks)
+        text('$Elements\n')
+        if binary:
+            numbers([len(blocks), n_elements, 1, n_elements], np.uint64)
+        else:
+            text('%d %d 1 %d\n' % (len(blocks), n_elements, n_elements))
+        first = 1
+        for (dim, tag, el_type, con) in blocks:
+            n_el = con.shape[0]
+            if binary:
+                numbers([dim, tag, el_type], np.int32)
+                numbers([n_el], np.uint64)
+            else:
+                text('%d %d %d %d\n' % (dim, tag, el_type, n_el))
+            numbers(np.hstack((np.arange(first, first + n_el)[:, None], con)), np.uint64)
+            first += n_el
+        if binary:
+            text('\n')
+        text('$EndElements\n')
@@ -0,0 +1,70 @@
+import pytest
+sparse = pytest.importorskip('scipy.sparse')
+
+import femsnek.core.matrices as matrices
+from femsnek.mesh.feMesh import FeMesh
+import numpy as np
+import os
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+
+def coo_assembly(mesh, element_matrices, n):
+    rows = np.concatenate([np.repeat(l._tags.T, l.n_nodes(), axis=1).ravel() for l in mesh._connectivityLists])
+    cols = np.concatenate([np.tile(l._tags.T, l.n_nodes()).ravel() for l in mesh._connectivityLists])
+    values = np.concatenate([m.ravel() for m in element_matrices])
+    return sparse.coo_matrix((values, (rows, cols)), shape=(n, n)).tocsr()
+
+
+def test_assemble_mixed():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    mesh = femesh[('i', 0)]
+    coordinates = femesh.coordinates(('i', 0))
+    stiffness = [matrices.stiffness(l, coordinates) for l in mesh._connectivityLists]
+
+    pattern = mesh.sparsity()
+    assert mesh.sparsity() is pattern
+
+    matrix = pattern.assemble(stiffness)
+    expected = coo_assembly(mesh, stiffness, mesh.n_nodes())
+    assert matrix.shape == (mesh.n_nodes(), mesh.n_nodes())
+    assert matrix.nnz == pattern.n_nonzero()
+    assert abs(matrix - expected).max() < 1e-12
+    assert np.allclose(matrix @ np.ones(mesh.n_nodes()), 0.)
+
+    # reassembly reuses structure of the matrix
+    scaled = pattern.assemble([2. * m for m in stiffness], out=matrix)
+    assert scaled is matrix
+    assert np.shares_memory(scaled.indices, pattern.indices())
+    assert abs(scaled - 2. * expected).max() < 1e-12
+
+
+def test_assemble_vector():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    mesh = femesh[('i', 0)]
+    coordinates = femesh.coordinates(('i', 0))
+    mass = [matrices.mass(l, coordinates) for l in mesh._connectivityLists]
+
+    lumped = mesh.sparsity().assemble_vector([m.sum(axis=2) for m in mass])
+    assert np.allclose(lumped, mesh.sparsity().assemble(mass) @ np.ones(mesh.n_nodes()))
+
+
+@pytest.mark.parametrize('threads', [1, 3])
+def test_assemble_colored(threads):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    mesh = femesh[('i', 0)]
+    coordinates = femesh.coordinates(('i', 0))
+
+    pattern = mesh.sparsity()
+    expected = pattern.assemble([matrices.stiffness(l, coordinates) for l in mesh._connectivityLists])
+    matrix = pattern.assemble_colored(matrices.stiffness, mesh.packed(), coordinates, mesh.colors(), threads)
+    assert abs(matrix - expected).max() < 1e-12
+
+    # chunks are reused, reassembly into the same matrix
+    chunks = pattern.chunks(mesh.packed(), mesh.colors(), threads)
+    mass = pattern.assemble_colored(matrices.mass, mesh.packed(), coordinates, mesh.colors(), threads, out=matrix)
+    assert mass is matrix
+    assert pattern.chunks(mesh.packed(), mesh.colors(), threads) is chunks
+    assert abs(matrix - pattern.assemble([matrices.mass(l, coordinates) for l in mesh._connectivityLists])).max() \
+        < 1e-12
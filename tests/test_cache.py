@@ -0,0 +1,69 @@
+import femsnek.fio.cache as cache
+from femsnek.mesh.feMesh import FeMesh
+import numpy as np
+import os
+import shutil
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+
+def assert_same_mesh(a: FeMesh, b: FeMesh):
+    assert a._info == b._info
+    assert np.array_equal(a._nodes, b._nodes)
+    assert len(a._internalMesh) == len(b._internalMesh)
+    assert len(a._boundaryMesh) == len(b._boundaryMesh)
+    for (ra, rb) in zip(a._internalMesh + a._boundaryMesh, b._internalMesh + b._boundaryMesh):
+        assert ra.id() == rb.id()
+        assert np.array_equal(ra._node_tags, rb._node_tags)
+        for (la, lb) in zip(ra._connectivityLists, rb._connectivityLists):
+            assert type(la) == type(lb)
+            assert np.array_equal(la._tags, lb._tags)
+
+
+def test_cache_roundtrip(tmp_path):
+    path = str(tmp_path / 'quadtri.msh')
+    shutil.copy(os.path.join(data_dir, 'quadtri.msh'), path)
+
+    reference = FeMesh.from_gmsh(path)
+    first = FeMesh.from_gmsh(path, cache=True)
+    entry = cache.entry_path(path)
+    assert cache.exists(entry)
+    assert os.path.dirname(entry) == str(tmp_path)
+
+    second = FeMesh.from_gmsh(path, cache=True)
+    assert isinstance(second._nodes, np.memmap)
+    assert_same_mesh(reference, first)
+    assert_same_mesh(reference, second)
+
+
+def test_cache_key_follows_content(tmp_path):
+    path = str(tmp_path / 'named.msh')
+    shutil.copy(os.path.join(data_dir, 'named.msh'), path)
+    FeMesh.from_gmsh(path, cache=True, cache_dir=str(tmp_path / 'cache'))
+    old_entry = cache.entry_path(path, str(tmp_path / 'cache'))
+
+    shutil.copy(os.path.join(data_dir, 'square.msh'), path)
+    new_entry = cache.entry_path(path, str(tmp_path / 'cache'))
+    assert new_entry != old_entry
+    assert not cache.exists(new_entry)
+
+    assert_same_mesh(FeMesh.from_gmsh(path, cache=True, cache_dir=str(tmp_path / 'cache')),
+                     FeMesh.from_gmsh(os.path.join(data_dir, 'square.msh')))
+
+
+def test_cache_key_content_hash(tmp_path):
+    path = str(tmp_path / 'named.msh')
+    shutil.copy(os.path.join(data_dir, 'named.msh'), path)
+    stat_entry = cache.entry_path(path)
+    content_entry = cache.entry_path(path, content_hash=True)
+    assert content_entry != stat_entry
+    FeMesh.from_gmsh(path, cache=True, content_hash=True)
+    assert cache.exists(content_entry)
+
+    # touched file: new entry by modification time, same entry by content
+    os.utime(path, ns=(0, 0))
+    assert cache.entry_path(path) != stat_entry
+    assert cache.entry_path(path, content_hash=True) == content_entry
+    assert_same_mesh(FeMesh.from_gmsh(path, cache=True, content_hash=True),
+                     FeMesh.from_gmsh(os.path.join(data_dir, 'named.msh')))
@@ -0,0 +1,105 @@
+import pytest
+pytest.importorskip('scipy')
+
+import femsnek.core.matrices as matrices
+from femsnek.fields.scalar import ScalarField
+from femsnek.fio.error import MeshError, FieldOperationError
+from femsnek.mesh.feMesh import FeMesh
+from femsnek.solvers.dirichlet import DirichletBC
+from femsnek.solvers.linear import DirectSolver
+import numpy as np
+import os
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+
+def system():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    mesh = femesh[('i', 0)]
+    coordinates = femesh.coordinates(('i', 0))
+    element_matrices = [matrices.stiffness(l, coordinates) + matrices.mass(l, coordinates)
+                        for l in mesh._connectivityLists]
+    return femesh, mesh.sparsity(), element_matrices
+
+
+def reference_solution(matrix, rhs, dofs, values):
+    # dense elimination of constrained DOFs
+    matrix = matrix.toarray()
+    free = np.setdiff1d(np.arange(matrix.shape[0]), dofs)
+    x = np.zeros(matrix.shape[0])
+    x[dofs] = values
+    x[free] = np.linalg.solve(matrix[np.ix_(free, free)], rhs[free] - matrix[np.ix_(free, dofs)] @ values)
+    return x
+
+
+def test_node_map():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    for boundary in range(len(femesh._boundaryMesh)):
+        dofs = femesh.node_map(('b', boundary), ('i', 0))
+        assert np.array_equal(femesh.coordinates(('i', 0))[:, dofs], femesh.coordinates(('b', boundary)))
+
+    with pytest.raises(MeshError):
+        femesh.node_map(('i', 0), ('b', 0))
+
+
+@pytest.mark.parametrize('symmetric', [True, False])
+def test_apply(symmetric):
+    (femesh, pattern, element_matrices) = system()
+    matrix = pattern.assemble(element_matrices)
+    rhs = np.random.rand(matrix.shape[0])
+
+    condition = DirichletBC.merge([DirichletBC(femesh, femesh(2), 1.),
+                                   DirichletBC.by_region_name(femesh, 4, np.linspace(0., 1., 11))])
+    expected = reference_solution(matrix, rhs, condition.dofs(), condition.values())
+
+    condition.apply(matrix, rhs, symmetric)
+    x = DirectSolver(matrix).solve(rhs)
+    assert np.allclose(x, expected)
+    assert np.allclose(x[condition.dofs()], condition.values())
+    assert (abs(matrix - matrix.T).max() < 1e-12) == symmetric
+
+
+def test_merge_last_wins():
+    (femesh, _, _) = system()
+    first = DirichletBC(femesh, femesh(2), 1.)
+    second = DirichletBC(femesh, femesh(3), 2.)
+    shared = np.intersect1d(first.dofs(), second.dofs())
+    assert shared.shape[0] > 0
+
+    merged = DirichletBC.merge([first, second])
+    assert np.all(np.diff(merged.dofs()) > 0)
+    assert np.all(merged.values()[np.searchsorted(merged.dofs(), shared)] == 2.)
+
+
+def test_field_values():
+    (femesh, _, _) = system()
+    internal = ScalarField.by_fun('t', lambda x, y, z: x + 2. * y, femesh)
+    boundary = ScalarField.by_fun('t', lambda x, y, z: x + 2. * y, femesh, femesh(2))
+
+    assert np.allclose(DirichletBC(femesh, femesh(2), internal).values(),
+                       DirichletBC(femesh, femesh(2), boundary).values())
+
+    with pytest.raises(FieldOperationError):
+        DirichletBC(femesh, femesh(2), ScalarField.by_fun('t', lambda x, y, z: x, femesh, femesh(3)))
+
+
+def test_reassembly_and_vectors():
+    (femesh, pattern, element_matrices) = system()
+    matrix = pattern.assemble(element_matrices)
+    original = matrix.copy()
+    condition = DirichletBC(femesh, femesh(2), 3.)
+
+    condition.apply(matrix)
+    positions = condition.positions(matrix)
+
+    # reassembled in place, same structure, positions are not searched again
+    pattern.assemble(element_matrices, out=matrix)
+    condition.apply(matrix)
+    assert condition.positions(matrix) is positions
+
+    # block of right hand sides with the stored lift
+    rhs = np.random.rand(matrix.shape[0], 3)
+    x = DirectSolver(matrix).solve_many(condition.apply_vector(rhs.copy()))
+    for i in range(3):
+        assert np.allclose(x[:, i], reference_solution(original, rhs[:, i], condition.dofs(), condition.values()))
@@ -0,0 +1,112 @@
+import femsnek.fio.gmsh as gmsh
+from femsnek.fio.error import MeshFormatError
+from femsnek.mesh.feMesh import FeMesh
+import numpy as np
+import os
+import pytest
+import struct
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+
+def read_sections(path: str) -> dict:
+    data = {}
+    with open(path) as file:
+        while True:
+            section_name = file.readline()
+            if len(section_name) == 0:
+                break
+            gmsh.get_section_reader(section_name)(file, data)
+    return data
+
+
+def test_nodes_named():
+    data = read_sections(os.path.join(data_dir, 'named.msh'))
+
+    assert data['nodes'].shape == (3, 77)
+    assert np.array_equal(data['node_tags'], np.arange(1, 78))
+    assert np.allclose(data['nodes'][:, 0], [-1., 0., 0.])
+    assert np.allclose(data['nodes'][:, 2], [0., 0.5, 0.])
+
+
+def test_nodes_parametric(tmp_path):
+    path = str(tmp_path / 'parametric.msh')
+    with open(path, 'w') as file:
+        file.write('$Nodes\n'
+                   '2 3 1 3\n'
+                   '1 1 1 2\n1\n2\n0 0 0 0.0\n1 0 0 1.0\n'
+                   '2 1 1 1\n3\n1 1 0 0.5 0.5\n'
+                   '$EndNodes\n')
+
+    data = read_sections(path)
+
+    assert np.array_equal(data['node_tags'], [1, 2, 3])
+    assert np.array_equal(data['nodes'], [[0., 1., 1.], [0., 0., 1.], [0., 0., 0.]])
+
+
+def test_elements_quadtri():
+    data = read_sections(os.path.join(data_dir, 'quadtri.msh'))
+
+    types = [type(l) for l in data['element_lists']]
+    assert types.count(gmsh.elements.ListTri1) == 1
+    assert types.count(gmsh.elements.ListQuad1) == 1
+    assert sum(l.n_elements() for l in data['element_lists']) == 39 + 100 + 43
+
+    for element_list in data['element_lists']:
+        assert element_list._tags.shape == (element_list.n_nodes(), element_list.n_elements())
+        assert element_list._tags.min() >= 0
+        assert element_list._tags.max() < data['nodes'].shape[1]
+
+    # first line element of the first curve spans gmsh nodes 1 and 6
+    assert np.array_equal(data['element_lists'][0][0], [0, 5])
+
+
+def test_binary_same_as_ascii():
+    ascii_data = gmsh.read(os.path.join(data_dir, 'unit.msh'))
+    binary_data = gmsh.read(os.path.join(data_dir, 'unit_binary.msh'))
+
+    assert ascii_data['version'] == 'MSH 4.1 ASCII'
+    assert binary_data['version'] == 'MSH 4.1 binary'
+    assert set(binary_data['sections']) == {'MeshFormat', 'PhysicalNames', 'Entities', 'Nodes', 'Elements'}
+
+    assert np.array_equal(ascii_data['nodes'], binary_data['nodes'])
+    assert np.array_equal(ascii_data['node_tags'], binary_data['node_tags'])
+    assert ascii_data['id_list'] == binary_data['id_list']
+    for (a, b) in zip(ascii_data['element_lists'], binary_data['element_lists']):
+        assert type(a) == type(b)
+        assert np.array_equal(a._tags, b._tags)
+
+
+def test_binary_node_data_skipped(tmp_path):
+    # $NodeData of binary file holds raw values, they are not valid utf-8
+    values = b''.join(struct.pack('<id', tag, value) for (tag, value) in ((1, -1.), (2, float('nan'))))
+    node_data = b'$NodeData\n1\n"T"\n1\n0.0\n3\n0\n1\n2\n' + values + b'\xff\xfe\n$EndNodeData\n'
+    path = str(tmp_path / 'node_data.msh')
+    with open(os.path.join(data_dir, 'unit_binary.msh'), 'rb') as source, open(path, 'wb') as target:
+        target.write(source.read() + node_data)
+
+    data = gmsh.read(path)
+    assert 'NodeData' in data['sections']
+    assert np.array_equal(data['nodes'], gmsh.read(os.path.join(data_dir, 'unit_binary.msh'))['nodes'])
+    assert FeMesh.from_gmsh(path).n_nodes() == data['nodes'].shape[1]
+
+
+@pytest.mark.parametrize('el_type', [4, 99])
+def test_binary_errors(tmp_path, el_type):
+    # errors raised while blocks of the mapped file are viewed reach the caller
+    with open(os.path.join(data_dir, 'unit_binary.msh'), 'rb') as file:
+        source = file.read()
+    block = source.index(b'$Elements\n') + len(b'$Elements\n') + 32 + 8
+
+    path = str(tmp_path / 'unsupported.msh')
+    with open(path, 'wb') as file:
+        file.write(source[:block] + struct.pack('<i', el_type) + source[block + 4:])
+    with pytest.raises(MeshFormatError, match='Unsupported element type <%d>' % el_type):
+        gmsh.read(path)
+
+    path = str(tmp_path / 'truncated.msh')
+    with open(path, 'wb') as file:
+        file.write(source[:source.index(b'$Nodes\n') + 200])
+    with pytest.raises(MeshFormatError, match='Unexpected end of file'):
+        gmsh.read(path)
@@ -0,0 +1,57 @@
+from femsnek.core.elements import ListLine1, ListTri1, ListQuad1
+import femsnek.core.matrices as matrices
+from femsnek.mesh.feMesh import FeMesh
+import numpy as np
+import os
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+# unit square, lower right triangle and a line on the x axis
+coordinates = np.array([[0., 1., 1., 0.], [0., 0., 1., 1.], [0., 0., 0., 0.]])
+
+
+def test_reference_triangle():
+    # right triangle (0, 0), (1, 0), (0, 1)
+    con_list = ListTri1.from_tags(np.array([[0], [1], [3]]))
+
+    assert np.allclose(matrices.stiffness(con_list, coordinates)[0],
+                       0.5 * np.array([[2., -1., -1.], [-1., 1., 0.], [-1., 0., 1.]]))
+    assert np.allclose(matrices.mass(con_list, coordinates)[0],
+                       0.5 / 12. * np.array([[2., 1., 1.], [1., 2., 1.], [1., 1., 2.]]))
+
+
+def test_unit_square():
+    con_list = ListQuad1.from_tags(np.array([[0], [1], [2], [3]]))
+
+    assert np.allclose(matrices.stiffness(con_list, coordinates)[0],
+                       np.array([[4., -1., -2., -1.], [-1., 4., -1., -2.],
+                                 [-2., -1., 4., -1.], [-1., -2., -1., 4.]]) / 6.)
+    assert np.allclose(matrices.mass(con_list, coordinates, coefficient=36.)[0],
+                       np.array([[4., 2., 1., 2.], [2., 4., 2., 1.], [1., 2., 4., 2.], [2., 1., 2., 4.]]))
+
+
+def test_line():
+    con_list = ListLine1.from_tags(np.array([[0, 1], [1, 2]]))
+
+    assert np.allclose(matrices.stiffness(con_list, coordinates), [[[1., -1.], [-1., 1.]]] * 2)
+    assert np.allclose(matrices.mass(con_list, coordinates, coefficient=np.array([6., 12.])),
+                       [[[2., 1.], [1., 2.]], [[4., 2.], [2., 4.]]])
+
+
+def test_mesh_region():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    coords = femesh.coordinates(('i', 0))
+
+    for con_list in femesh[('i', 0)]._connectivityLists:
+        stiffness = matrices.stiffness(con_list, coords)
+        mass = matrices.mass(con_list, coords)
+        assert stiffness.shape == (con_list.n_elements(), con_list.n_nodes(), con_list.n_nodes())
+        assert np.allclose(stiffness, stiffness.transpose(0, 2, 1))
+        assert np.allclose(stiffness.sum(axis=2), 0.)
+
+        # energy of f = x equals area of elements, which is the sum of mass matrix entries
+        f = coords[0][con_list._tags.T]
+        area = mass.sum(axis=(1, 2))
+        assert np.all(area > 0.)
+        assert np.allclose(np.einsum('en,enm,em->e', f, stiffness, f), area)
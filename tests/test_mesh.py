@@ -0,0 +1,182 @@
+import femsnek.core.elements as elements
+from femsnek.fio.error import MeshError
+from femsnek.mesh.feMesh import Mesh, FeMesh
+import numpy as np
+import os
+import pytest
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+
+def test_mesh_renumbering():
+    tri = elements.ListTri1(2)
+    tri[0] = [10, 4, 7]
+    tri[1] = [4, 12, 7]
+    quad = elements.ListQuad1(1)
+    quad[0] = [7, 12, 20, 10]
+
+    mesh = Mesh([tri, quad], 'internal')
+
+    assert np.array_equal(mesh.local2global(), [4, 7, 10, 12, 20])
+    assert np.array_equal(tri._tags, [[2, 0], [0, 3], [1, 1]])
+    assert np.array_equal(quad[0], [1, 3, 4, 2])
+
+    assert np.array_equal(mesh.global2local([4, 5, 20, 21, -1]), [0, -1, 4, -1, -1])
+    assert np.array_equal(mesh.global2local()[mesh.local2global()], np.arange(5))
+
+    # local tags mapped back give the original global tags
+    assert np.array_equal(mesh.local2global()[tri._tags], [[10, 4], [4, 12], [7, 7]])
+
+
+def test_femesh_grouping():
+    nodes = np.zeros((3, 6))
+    lists = []
+    for tags in ([0, 1, 2], [1, 2, 3], [2, 3, 4], [3, 4, 5]):
+        tri = elements.ListTri1(1)
+        tri[0] = tags
+        lists.append(tri)
+    for tags in ([0, 1], [4, 5], [1, 2]):
+        line = elements.ListLine1(1)
+        line[0] = tags
+        lists.append(line)
+
+    femesh = FeMesh('synthetic', nodes, lists, ['a', 'b', 'a', 'b', 'wall', 'inlet', 'wall'])
+
+    assert [mesh.id() for mesh in femesh._internalMesh] == ['a', 'b']
+    assert [mesh.id() for mesh in femesh._boundaryMesh] == ['wall', 'inlet']
+    assert np.array_equal(femesh[('i', 0)].local2global(), [0, 1, 2, 3, 4])
+    assert np.array_equal(femesh[('i', 1)].local2global(), [1, 2, 3, 4, 5])
+    assert np.array_equal(femesh[('b', 0)].local2global(), [0, 1, 2])
+    assert femesh[('b', 0)]._connectivityLists == (lists[4], lists[6])
+
+
+def test_femesh_region_index():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'named.msh'))
+
+    assert femesh('internal') == ('i', 0)
+    assert femesh('dol') == ('b', 0)
+    assert femesh[femesh('prawa')].id() == 'prawa'
+    assert femesh.region2name(('b', 3)) == 'lewa'
+    assert femesh[('b', -1)] is femesh[('b', 3)]
+    assert femesh.n_nodes(femesh('dol')) == 10
+
+    with pytest.raises(MeshError):
+        femesh('wall')
+    with pytest.raises(MeshError):
+        femesh[('b', 4)]
+    with pytest.raises(MeshError):
+        femesh[('x', 0)]
+
+
+def test_mesh_adjacency():
+    #  3---4---5
+    #  | 0 |1 /|
+    #  0---1 / |
+    #      |/ 2|
+    #      2---6
+    quad = elements.ListQuad1(1)
+    quad[0] = [0, 1, 4, 3]
+    tri = elements.ListTri1(2)
+    tri[0] = [1, 5, 4]
+    tri[1] = [1, 2, 5]
+    tri2 = elements.ListTri1(1)
+    tri2[0] = [2, 6, 5]
+
+    mesh = Mesh([quad, tri, tri2], 'internal')
+    assert mesh.n_elements() == 4
+
+    offsets, indices = mesh.node2elements()
+    assert np.array_equal(offsets, [0, 1, 4, 6, 7, 9, 12, 13])
+    assert np.array_equal(indices[offsets[1]:offsets[2]], [0, 1, 2])
+    assert np.array_equal(indices[offsets[5]:offsets[6]], [1, 2, 3])
+
+    offsets, indices = mesh.element2elements()
+    neighbours = [list(indices[offsets[i]:offsets[i + 1]]) for i in range(4)]
+    assert neighbours == [[1], [0, 2], [1, 3], [2]]
+    assert mesh.element2elements() is mesh.element2elements()
+
+
+def test_boundary_adjacency():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'named.msh'))
+    bottom = femesh[femesh('dol')]
+
+    offsets, indices = bottom.element2elements()
+    counts = np.diff(offsets)
+    # open chain of line elements, ends have one neighbour
+    assert counts.sum() == 2 * (bottom.n_elements() - 1)
+    assert np.count_nonzero(counts == 1) == 2
+
+
+def test_mesh_packed():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    mesh = femesh[('i', 0)]
+    packed = mesh.packed()
+
+    assert packed.n_elements() == mesh.n_elements() == 139
+    assert packed.connectivity().dtype == np.int32
+    assert np.array_equal(np.diff(packed.offsets()), np.where(packed.types() == elements.T_Tri1, 3, 4))
+
+    # per type tags are views of the packed array
+    for con_list in mesh._connectivityLists:
+        assert np.shares_memory(con_list._tags, packed.connectivity())
+    mesh._connectivityLists[1][0] = [7, 8, 9, 10]
+    start = packed.offsets()[mesh._connectivityLists[0].n_elements()]
+    assert np.array_equal(packed.connectivity()[start:start + 4], [7, 8, 9, 10])
+
+
+@pytest.mark.parametrize('file, region', [('quadtri.msh', ('i', 0)), ('named.msh', ('b', 0))])
+def test_mesh_colors(file, region):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, file))
+    mesh = femesh[region]
+    offsets, indices = mesh.colors()
+    assert mesh.colors()[1] is indices
+
+    # every element has exactly one color
+    assert np.array_equal(np.sort(indices), np.arange(mesh.n_elements()))
+
+    packed = mesh.packed()
+    for color in range(offsets.shape[0] - 1):
+        color_elements = indices[offsets[color]:offsets[color + 1]]
+        nodes = np.concatenate([packed.connectivity()[packed.offsets()[e]:packed.offsets()[e + 1]]
+                                for e in color_elements])
+        # no node shared within a color
+        assert np.unique(nodes).shape[0] == nodes.shape[0]
+
+
+@pytest.mark.parametrize('n_parts', [1, 3, 4])
+def test_mesh_partition(n_parts):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    mesh = femesh[('i', 0)]
+    offsets, indices = femesh.partition(('i', 0), n_parts)
+
+    assert offsets.shape[0] == n_parts + 1
+    assert np.array_equal(np.sort(indices), np.arange(mesh.n_elements()))
+    assert np.diff(offsets).max() - np.diff(offsets).min() <= 1
+    for part in range(n_parts):
+        assert np.all(np.diff(indices[offsets[part]:offsets[part + 1]]) > 0)
+
+
+def test_mesh_sparse_global_tags():
+    # region cost does not depend on the largest global tag
+    line = elements.ListLine1(2)
+    line[0] = [3 * 10 ** 9, 7]
+    line[1] = [7, 2 * 10 ** 9]
+    mesh = Mesh([line], 'wall')
+
+    assert np.array_equal(mesh.local2global(), [7, 2 * 10 ** 9, 3 * 10 ** 9])
+    assert np.array_equal(line._tags, [[2, 0], [0, 1]])
+
+
+def test_element_adjacency_large_tags():
+    # keys of edges (0, 100001) and (42949, 81399) are equal in 32 bit arithmetic
+    n_nodes = 100002
+    rest = np.setdiff1d(np.arange(n_nodes), [0, 100001, 1, 42949, 81399, 2])
+    tags = np.concatenate(([[0, 100001, 1], [42949, 81399, 2]], rest.reshape(-1, 3)))
+    tri = elements.ListTri1.from_tags(tags.T.copy())
+    mesh = Mesh([tri], 'internal')
+    assert mesh.n_nodes() == n_nodes
+
+    offsets, indices = mesh.element2elements()
+    # disjoint triangles have no neighbours
+    assert indices.shape[0] == 0
@@ -0,0 +1,57 @@
+import pytest
+pytest.importorskip('scipy')
+
+import femsnek.core.matrices as matrices
+from femsnek.core.operators import MatrixFree
+from femsnek.mesh.feMesh import FeMesh
+import numpy as np
+import os
+from scipy.sparse.linalg import cg
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+
+# quadtri has distorted quads, square only parallelograms
+@pytest.mark.parametrize('name, region', [('quadtri', ('i', 0)), ('quadtri', ('b', 0)), ('square', ('i', 0))])
+@pytest.mark.parametrize('chunk', [7, 16384])
+def test_matches_assembled(name, region, chunk):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, name + '.msh'))
+    mesh = femesh[region]
+    coordinates = femesh.coordinates(region)
+    conductivity = np.linspace(1., 2., mesh.n_elements())
+
+    first = 0
+    stiffness = []
+    mass = []
+    for con_list in mesh._connectivityLists:
+        n_el = con_list.n_elements()
+        stiffness.append(matrices.stiffness(con_list, coordinates, conductivity[first:first + n_el]))
+        mass.append(matrices.mass(con_list, coordinates, 3.))
+        first += n_el
+    matrix = mesh.sparsity().assemble(stiffness) + mesh.sparsity().assemble(mass)
+
+    operator = MatrixFree.from_mesh(femesh, region, stiffness=conductivity, mass=3., chunk=chunk)
+    x = np.random.rand(mesh.n_nodes())
+    assert np.allclose(operator @ x, matrix @ x)
+    block = np.random.rand(mesh.n_nodes(), 3)
+    assert np.allclose(operator @ block, matrix @ block)
+    assert np.allclose(operator.T @ x, matrix @ x)
+    assert np.allclose(operator.diagonal(), matrix.diagonal())
+
+
+def test_krylov():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    operator = MatrixFree.from_mesh(femesh, ('i', 0), mass=1.)
+    b = np.random.rand(operator.shape[0])
+
+    x, info = cg(operator, b, rtol=1e-10)
+    assert info == 0
+    assert np.allclose(operator @ x, b)
+
+
+def test_affine_factors():
+    # one factor per term and element: 3 stiffness terms and 1 mass term
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'square.msh'))
+    operator = MatrixFree.from_mesh(femesh, ('i', 0), mass=1.)
+    assert [block[2].shape for block in operator._blocks] == [(4, femesh[('i', 0)].n_elements())]
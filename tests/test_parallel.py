@@ -0,0 +1,37 @@
+import pytest
+pytest.importorskip('scipy')
+
+import femsnek.core.matrices as matrices
+from femsnek.core.parallel import ParallelAssembler
+from femsnek.mesh.feMesh import FeMesh
+from multiprocessing import shared_memory
+import functools
+import os
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+
+def test_parallel_assembly():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    mesh = femesh[('i', 0)]
+    coordinates = femesh.coordinates(('i', 0))
+    stiffness = mesh.sparsity().assemble([matrices.stiffness(l, coordinates) for l in mesh._connectivityLists])
+    mass = mesh.sparsity().assemble([matrices.mass(l, coordinates, 2.) for l in mesh._connectivityLists])
+
+    # more parts than workers, partition is reused
+    partition = femesh.partition(('i', 0), 3)
+    with ParallelAssembler(femesh, ('i', 0), workers=2, partition=partition) as assembler:
+        assert assembler.partition() is partition
+
+        matrix = assembler.assemble(matrices.stiffness)
+        assert abs(matrix - stiffness).max() < 1e-12
+
+        assert assembler.assemble(functools.partial(matrices.mass, coefficient=2.), out=matrix) is matrix
+        assert abs(matrix - mass).max() < 1e-12
+
+        names = [name for (name, _, _) in assembler._spec.values()]
+
+    # shared memory is released
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=names[0])
@@ -0,0 +1,74 @@
+from femsnek.core.elements import T_Line1, T_Tri1, T_Quad1
+import femsnek.core.reference as reference
+from femsnek.mesh.feMesh import FeMesh
+import math
+import numpy as np
+import os
+import pytest
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+
+@pytest.mark.parametrize('el_type', [T_Line1, T_Tri1, T_Quad1])
+@pytest.mark.parametrize('order', [1, 2, 3, 4])
+def test_shape_functions(el_type, order):
+    element = reference.reference(el_type, order)
+
+    assert reference.reference(el_type, order) is element
+    assert np.allclose(element.values().sum(axis=1), 1.)
+    assert np.allclose(element.gradients().sum(axis=1), 0.)
+
+
+@pytest.mark.parametrize('order', [1, 2, 3, 4, 5])
+def test_quadrature_exact(order):
+    # integrals of x^i y^j over reference domains, i + j = order
+    line = reference.reference(T_Line1, order)
+    assert np.isclose(line.weights() @ line.points()[:, 0] ** order, (1. + (-1.) ** order) / (order + 1))
+
+    tri = reference.reference(T_Tri1, order)
+    for i in range(order + 1):
+        j = order - i
+        exact = math.factorial(i) * math.factorial(j) / math.factorial(i + j + 2)
+        assert np.isclose(tri.weights() @ (tri.points()[:, 0] ** i * tri.points()[:, 1] ** j), exact)
+
+    quad = reference.reference(T_Quad1, order)
+    assert np.isclose(quad.weights() @ (quad.points()[:, 0] ** order * quad.points()[:, 1] ** order),
+                      ((1. + (-1.) ** order) / (order + 1)) ** 2)
+
+
+def test_batched_geometry():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    mesh = femesh[('i', 0)]
+    coordinates = femesh._nodes[:, mesh._node_tags]
+
+    for con_list in mesh._connectivityLists:
+        element = reference.reference(con_list.el_type())
+        jacobians = element.jacobians(con_list, coordinates)
+        measures = element.measures(jacobians)
+        assert jacobians.shape == (con_list.n_elements(), element.n_points(), 3, 2)
+        assert np.all(measures > 0.)
+
+        # shoelace formula for element areas
+        x = coordinates[0, con_list._tags]
+        y = coordinates[1, con_list._tags]
+        area = 0.5 * np.abs((x * np.roll(y, -1, axis=0) - np.roll(x, -1, axis=0) * y).sum(axis=0))
+        assert np.allclose(measures @ element.weights(), area)
+
+        # gradient of linear function is reproduced exactly
+        gradients = element.physical_gradients(jacobians)
+        f = 2. * coordinates[0] - 3. * coordinates[1]
+        grad_f = np.einsum('eqnc,en->eqc', gradients, f[con_list._tags.T])
+        assert np.allclose(grad_f, [2., -3., 0.])
+
+
+def test_line_measures():
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'named.msh'))
+    mesh = femesh[('b', 0)]
+    con_list = mesh._connectivityLists[0]
+    coordinates = femesh._nodes[:, mesh._node_tags]
+
+    element = reference.reference(T_Line1)
+    length = element.measures(element.jacobians(con_list, coordinates)) @ element.weights()
+    tags = con_list._tags
+    assert np.allclose(length, np.linalg.norm(coordinates[:, tags[1]] - coordinates[:, tags[0]], axis=0))
@@ -0,0 +1,125 @@
+import pytest
+pytest.importorskip('scipy')
+
+import femsnek.core.matrices as matrices
+from femsnek.core.operators import MatrixFree
+from femsnek.fields.scalar import ScalarField
+from femsnek.fio.error import SolverError, FieldOperationError
+from femsnek.mesh.feMesh import FeMesh
+from femsnek.solvers.linear import LinearSolver, DirectSolver, KrylovSolver
+import numpy as np
+import os
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+
+def system(coefficient: float = 1.):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    mesh = femesh[('i', 0)]
+    coordinates = femesh.coordinates(('i', 0))
+    element_matrices = [matrices.stiffness(l, coordinates) + matrices.mass(l, coordinates, coefficient)
+                        for l in mesh._connectivityLists]
+    return femesh, mesh.sparsity(), element_matrices
+
+
+def test_direct_reuses_factorization():
+    (_, pattern, element_matrices) = system()
+    matrix = pattern.assemble(element_matrices)
+    solver = DirectSolver(matrix)
+
+    for _ in range(3):
+        b = np.random.rand(matrix.shape[0])
+        assert np.allclose(matrix @ solver.solve(b), b)
+    assert solver.stats().n_setups == 1
+    assert solver.stats().n_solves == 3
+
+    # matrix changed in place, solver is told about it
+    pattern.assemble([2. * m for m in element_matrices], out=matrix)
+    solver.update()
+    b = np.random.rand(matrix.shape[0])
+    assert np.allclose(matrix @ solver.solve(b), b)
+    assert solver.stats().n_setups == 2
+
+
+@pytest.mark.parametrize('method, preconditioner', [('cg', 'jacobi'), ('cg', 'ilu'), ('gmres', 'ilu'),
+                                                    ('bicgstab', None), ('minres', 'jacobi')])
+def test_krylov(method, preconditioner):
+    (_, pattern, element_matrices) = system()
+    matrix = pattern.assemble(element_matrices)
+    solver = KrylovSolver(matrix, method, preconditioner, rtol=1e-10)
+
+    b = np.random.rand(matrix.shape[0])
+    x = solver.solve(b)
+    assert np.linalg.norm(matrix @ x - b) <= 1e-6 * np.linalg.norm(b)
+    assert solver.stats().iterations > 0
+
+    solver.solve(b, x0=x)
+    assert solver.stats().n_setups == 1
+
+
+def test_krylov_matrix_free():
+    (femesh, _, _) = system()
+    solver = KrylovSolver(MatrixFree.from_mesh(femesh, ('i', 0), mass=1.), 'cg', 'jacobi', rtol=1e-10)
+
+    b = np.random.rand(solver.operator().shape[0])
+    assert np.allclose(solver.operator() @ solver.solve(b), b)
+
+    with pytest.raises(SolverError):
+        KrylovSolver(solver.operator(), 'cg', 'ilu').solve(b)
+
+
+def test_abstract_base():
+    with pytest.raises(TypeError):
+        LinearSolver()
+
+
+def test_not_converged():
+    (_, pattern, element_matrices) = system()
+    solver = KrylovSolver(pattern.assemble(element_matrices), 'cg', None, maxiter=2)
+
+    with pytest.raises(SolverError):
+        solver.solve(np.random.rand(solver.operator().shape[0]))
+
+
+@pytest.mark.parametrize('solver', [DirectSolver(), KrylovSolver(None, 'cg', 'jacobi', rtol=1e-10),
+                                    KrylovSolver(None, 'cg', 'ilu', rtol=1e-10),
+                                    KrylovSolver(None, 'gmres', 'ilu', rtol=1e-10)])
+def test_solve_many(solver):
+    (_, pattern, element_matrices) = system()
+    matrix = pattern.assemble(element_matrices)
+    solver.update(matrix)
+
+    b = np.random.rand(matrix.shape[0], 5)
+    b[:, 2] = 0.
+    x = solver.solve_many(b)
+    assert x.shape == b.shape
+    assert np.allclose(x[:, 2], 0.)
+    assert np.linalg.norm(matrix @ x - b) <= 1e-6 * np.linalg.norm(b)
+    assert solver.stats().n_solves == 5
+    assert solver.stats().n_setups == 1
+
+    # block of one column is the single solve
+    assert np.allclose(solver.solve_many(b[:, :1])[:, 0], solver.solve(b[:, 0]))
+
+
+def test_solve_many_matrix_free_fields():
+    (femesh, pattern, element_matrices) = system()
+    solver = KrylovSolver(MatrixFree.from_mesh(femesh, ('i', 0), mass=1.), 'cg', 'jacobi', rtol=1e-10)
+    loads = [ScalarField.by_fun('load_' + str(i), lambda x, y, z, i=i: np.sin(i * x) + y, femesh)
+             for i in range(4)]
+
+    solutions = solver.solve_many(loads)
+    assert [field.name() for field in solutions] == ['solution_load_' + str(i) for i in range(4)]
+    assert all(field.region() == ('i', 0) for field in solutions)
+
+    direct = DirectSolver(pattern.assemble(element_matrices))
+    for (load, solution) in zip(loads, solutions):
+        assert np.allclose(solution.nodal(), direct.solve(load.nodal()))
+
+    # one block iteration per operator application, not per column
+    assert solver.stats().iterations == solver.stats().total_iterations
+
+    with pytest.raises(FieldOperationError):
+        solver.solve_many([loads[0], ScalarField('boundary', np.zeros(femesh[('b', 0)].n_nodes()), femesh,
+                                                 ('b', 0))])
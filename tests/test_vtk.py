@@ -0,0 +1,120 @@
+import pytest
+from femsnek.fields.scalar import ScalarField
+from femsnek.fields.vector import VectorField
+from femsnek.fio.error import WriterError
+import femsnek.fio.vtk as vtk
+import femsnek.fio.xdmf as xdmf
+from femsnek.mesh.feMesh import FeMesh
+import numpy as np
+import os
+import re
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+
+def piece_sizes(filename: str) -> (int, int):
+    with open(filename, 'rb') as file:
+        header = file.read(1024).decode('latin-1')
+    match = re.search(r'NumberOfPoints="(\d+)" NumberOfCells="(\d+)"', header)
+    return int(match.group(1)), int(match.group(2))
+
+
+def test_write_mixed_regions(tmp_path):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    field = ScalarField.by_fun('x', lambda x, y, z: x, femesh)
+
+    vtk.write(str(tmp_path / 'out'), femesh, [field])
+
+    files = sorted(os.listdir(str(tmp_path)))
+    assert files == ['out.b.1.vtu', 'out.b.2.vtu', 'out.b.3.vtu', 'out.b.4.vtu', 'out.b.5.vtu', 'out.i.6.vtu']
+
+    # both triangles and quads end up in one piece
+    assert piece_sizes(str(tmp_path / 'out.i.6.vtu')) == (142, 39 + 100)
+    assert piece_sizes(str(tmp_path / 'out.b.5.vtu')) == (6, 5)
+
+
+@pytest.mark.parametrize('processes', [False, True])
+def test_parallel_write_identical(tmp_path, processes):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'named.msh'))
+    field = ScalarField.by_fun('y', lambda x, y, z: y, femesh)
+    boundary_field = ScalarField.by_fun('x', lambda x, y, z: x, femesh, femesh('dol'))
+
+    vtk.write(str(tmp_path / 'serial'), femesh, [field, boundary_field])
+    vtk.write(str(tmp_path / 'parallel'), femesh, [field, boundary_field], workers=3, processes=processes)
+
+    for name in ('i.internal', 'b.dol', 'b.prawa', 'b.gora', 'b.lewa'):
+        with open(str(tmp_path / ('serial.' + name + '.vtu')), 'rb') as serial, \
+                open(str(tmp_path / ('parallel.' + name + '.vtu')), 'rb') as parallel:
+            assert serial.read() == parallel.read()
+
+
+def test_async_series(tmp_path):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'named.msh'))
+    field = ScalarField.by_fun('u', lambda x, y, z: x, femesh)
+    area = np.ones(femesh[('i', 0)].n_elements())
+
+    series = xdmf.TimeSeries(str(tmp_path / 'run'), femesh)
+    with vtk.AsyncWriter() as writer:
+        for time in [0.0, 0.5]:
+            writer.write_series(series, time, [field], {('i', 0): {'area': area}})
+            # snapshot is taken on submit
+            field.nodal()[:] += 1.
+            area[:] = 2.
+
+    with open(str(tmp_path / 'run.xmf')) as file:
+        xml = file.read()
+    assert re.findall(r'<Time Value="([^"]+)"/>', xml) == ['0.0', '0.5']
+    assert np.array_equal(np.fromfile(str(tmp_path / 'run.1.i.internal.u.bin')),
+                          femesh._nodes[0, femesh[('i', 0)]._node_tags] + 1.)
+    assert np.array_equal(np.fromfile(str(tmp_path / 'run.0.i.internal.area.cell.bin')), np.ones_like(area))
+
+
+def test_async_writer(tmp_path):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'named.msh'))
+    field = ScalarField.by_fun('x', lambda x, y, z: x, femesh)
+
+    vtk.write(str(tmp_path / 'sync'), femesh, [field])
+    with vtk.AsyncWriter(depth=1) as writer:
+        writer.write(str(tmp_path / 'async'), femesh, [field])
+        # snapshot is taken on submit
+        field.nodal()[:] = 0.
+        writer.flush()
+
+    for name in ['i.internal', 'b.lewa']:
+        with open(str(tmp_path / ('sync.' + name + '.vtu')), 'rb') as sync, \
+                open(str(tmp_path / ('async.' + name + '.vtu')), 'rb') as asynchronous:
+            assert sync.read() == asynchronous.read()
+
+
+def test_async_writer_error(tmp_path):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'named.msh'))
+
+    writer = vtk.AsyncWriter()
+    writer.write(str(tmp_path / 'missing' / 'out'), femesh)
+    with pytest.raises(OSError):
+        writer.flush()
+    writer.close()
+    with pytest.raises(WriterError):
+        writer.write(str(tmp_path / 'out'), femesh)
+
+    # error of the with body is not hidden by the failed write
+    with pytest.raises(KeyError) as info:
+        with vtk.AsyncWriter() as writer:
+            writer.write(str(tmp_path / 'missing' / 'out'), femesh)
+            raise KeyError('body')
+    assert isinstance(info.value.__cause__, OSError)
+
+
+def test_vector_and_cell_data(tmp_path):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    velocity = VectorField.by_fun('U', lambda x, y, z: (x, y, z + 1.), femesh)
+    area = np.arange(femesh[('i', 0)].n_elements(), dtype=np.float64)
+
+    vtk.write(str(tmp_path / 'out'), femesh, [velocity], cell_fields={('i', 0): {'area': area}})
+
+    with open(str(tmp_path / 'out.i.6.vtu'), 'rb') as file:
+        header = file.read(2048).decode('latin-1')
+    assert '<DataArray type="Float64" Name="U" NumberOfComponents="3"' in header
+    assert '<CellData>\n<DataArray type="Float64" Name="area" NumberOfComponents="1"' in header
+    assert 'U_x' not in header
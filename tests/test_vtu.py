@@ -0,0 +1,71 @@
+import femsnek.fio.vtu as vtu
+import numpy as np
+import pytest
+import re
+import zlib
+
+
+def read_arrays(filename: str) -> dict:
+    with open(filename, 'rb') as file:
+        content = file.read()
+    start = content.index(b'<AppendedData encoding="raw">\n_') + len(b'<AppendedData encoding="raw">\n_')
+    header = content[:start].decode('ascii')
+    compressed = 'vtkZLibDataCompressor' in header
+
+    arrays = {}
+    for (dtype, name, components, offset) in re.findall(
+            r'<DataArray type="(\w+)" Name="(\w+)" NumberOfComponents="(\d+)" format="appended" offset="(\d+)"/>',
+            header):
+        position = start + int(offset)
+        if compressed:
+            n_blocks = int(np.frombuffer(content, np.uint64, 1, position)[0])
+            sizes = np.frombuffer(content, np.uint64, n_blocks, position + 24).astype(np.int64)
+            position += 24 + 8 * n_blocks
+            data = b''
+            for size in sizes:
+                data += zlib.decompress(content[position:position + size])
+                position += size
+        else:
+            n_bytes = int(np.frombuffer(content, np.uint64, 1, position)[0])
+            data = content[position + 8:position + 8 + n_bytes]
+        values = np.frombuffer(data, dtype=np.dtype(dtype.lower()))
+        arrays[name] = values.reshape(-1, int(components)) if int(components) > 1 else values
+    return arrays
+
+
+@pytest.mark.parametrize('compression, threads', [(None, 1), (6, 1), (1, 3)])
+def test_round_trip(tmp_path, monkeypatch, compression, threads):
+    # small blocks, so arrays span several of them
+    monkeypatch.setattr(vtu, 'BLOCK_SIZE', 64)
+    points = np.random.rand(50, 3)
+    connectivity = np.arange(60, dtype=np.int32) % 50
+    offsets = np.arange(3, 61, 3, dtype=np.int64)
+    types = np.full(20, 5, dtype=np.uint8)
+    u = np.linspace(0., 1., 50)
+
+    filename = str(tmp_path / 'grid.vtu')
+    vtu.write_unstructured(filename, points, connectivity, offsets, types, point_data={'u': u},
+                           compression=compression, threads=threads)
+
+    arrays = read_arrays(filename)
+    assert np.array_equal(arrays['Points'], points)
+    assert np.array_equal(arrays['connectivity'], connectivity)
+    assert np.array_equal(arrays['offsets'], offsets)
+    assert np.array_equal(arrays['types'], types)
+    assert np.array_equal(arrays['u'], u)
+
+
+def test_multi_component_and_cell_data(tmp_path):
+    points = np.random.rand(4, 3)
+    velocity = np.random.rand(4, 3)
+    # strided view, written interleaved
+    gradient = np.random.rand(2, 6)[:, ::2]
+
+    filename = str(tmp_path / 'grid.vtu')
+    vtu.write_unstructured(filename, points, np.array([0, 1, 2, 1, 3, 2], dtype=np.int32),
+                           np.array([3, 6]), np.array([5, 5], dtype=np.uint8),
+                           point_data={'U': velocity}, cell_data={'grad': gradient})
+
+    arrays = read_arrays(filename)
+    assert np.array_equal(arrays['U'], velocity)
+    assert np.array_equal(arrays['grad'], gradient)
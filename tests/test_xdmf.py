@@ -0,0 +1,86 @@
+from femsnek.fields.scalar import ScalarField
+import femsnek.fio.xdmf as xdmf
+from femsnek.mesh.feMesh import FeMesh
+import numpy as np
+import os
+import pytest
+import re
+import xml.etree.ElementTree as ElementTree
+
+
+data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'msh.gmsh')
+
+
+def read_item(directory: str, item: tuple) -> np.ndarray:
+    (dimensions, number_type, precision, seek, filename) = item
+    dtype = np.dtype({'Int': 'i', 'UInt': 'u', 'Float': 'f'}[number_type] + precision)
+    shape = tuple(int(i) for i in dimensions.split())
+    return np.fromfile(os.path.join(directory, filename), dtype=dtype, offset=int(seek)).reshape(shape)
+
+
+def data_items(xml: str) -> list:
+    return re.findall(r'<DataItem Dimensions="([\d ]+)" NumberType="(\w+)" Precision="(\d)" Format="Binary" '
+                      r'Endian="\w+" Seek="(\d+)">([^<]+)</DataItem>', xml)
+
+
+@pytest.mark.parametrize('npy', [False, True])
+def test_write_mixed(tmp_path, npy):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'quadtri.msh'))
+    field = ScalarField.by_fun('x', lambda x, y, z: x, femesh)
+
+    xdmf.write(str(tmp_path / 'out'), femesh, [field], npy)
+
+    with open(str(tmp_path / 'out.xmf')) as file:
+        xml = file.read()
+    assert xml.count('GridType="Uniform"') == 6
+    assert '<Topology TopologyType="Mixed" NumberOfElements="139">' in xml
+    assert xml.count('TopologyType="Polyline"') == 5
+
+    # internal region: topology, points, field
+    (topology, points, values) = [read_item(str(tmp_path), item) for item in data_items(xml) if '.i.' in item[4]]
+    packed = femesh[('i', 0)].packed()
+    assert topology.shape[0] == packed.connectivity().shape[0] + packed.n_elements()
+    assert np.array_equal(points, femesh._nodes.T[femesh[('i', 0)]._node_tags])
+    assert np.array_equal(values, field.nodal())
+
+    # first element is a triangle, followed by its nodes
+    assert topology[0] == 4
+    assert np.array_equal(topology[1:4], packed.connectivity()[:3])
+
+
+def test_time_series_shares_geometry(tmp_path):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'named.msh'))
+    series = xdmf.TimeSeries(str(tmp_path / 'run'), femesh)
+
+    for time in [0.0, 0.5]:
+        series.write(time, [ScalarField.by_fun('u', lambda x, y, z: x * time, femesh)],
+                     {('i', 0): {'u': np.full(femesh[('i', 0)].n_elements(), time)}})
+
+    with open(str(tmp_path / 'run.xmf')) as file:
+        xml = file.read()
+    assert re.findall(r'<Time Value="([^"]+)"/>', xml) == ['0.0', '0.5']
+
+    files = [item[4] for item in data_items(xml)]
+    assert files.count('run.i.internal.points.bin') == 2
+    assert 'run.1.i.internal.u.bin' in files
+    assert xml.count('Center="Cell"') == 2
+
+    # geometry is written once, steps add only values
+    assert sorted(name for name in os.listdir(str(tmp_path)) if '.internal.' in name) == \
+        ['run.0.i.internal.u.bin', 'run.0.i.internal.u.cell.bin', 'run.1.i.internal.u.bin',
+         'run.1.i.internal.u.cell.bin', 'run.i.internal.points.bin', 'run.i.internal.topology.bin']
+    assert np.allclose(read_item(str(tmp_path), [item for item in data_items(xml)
+                                                 if item[4] == 'run.1.i.internal.u.bin'][0]),
+                       0.5 * femesh._nodes[0, femesh[('i', 0)]._node_tags])
+
+
+def test_names_escaped(tmp_path):
+    femesh = FeMesh.from_gmsh(os.path.join(data_dir, 'named.msh'))
+    name = 'p<&"q'
+    xdmf.write(str(tmp_path / 'out'), femesh, [ScalarField.by_fun(name, lambda x, y, z: x, femesh)])
+
+    root = ElementTree.parse(str(tmp_path / 'out.xmf')).getroot()
+    attribute = root.find('.//Attribute')
+    assert attribute.get('Name') == name
+    assert attribute.find('DataItem').text == 'out.i.internal.' + name + '.bin'
+    assert os.path.isfile(str(tmp_path / attribute.find('DataItem').text))